@@ -4,6 +4,7 @@ PART 2/5 - Authentication Base Classes and Helper Functions
 Run Order: Second
 """
 import tkinter as tk
+from tkinter import messagebox
 import sqlite3
 from config import LOGIN_BG, LOGIN_CARD_BG, LOGIN_ACCENT, BORDER, TEXT_MAIN, TEXT_MUTED, FONT_NORMAL
 
@@ -12,9 +13,30 @@ class Authbase:
         self.app = app
 
     def clear_window(self):
+        # Drop results of queries started from the page we are leaving
+        self.app.repo.cancel_all()
         for widget in self.app.winfo_children():
             widget.destroy()
 
+    def run_async(self, button, fn, args, on_done):
+        # Run a data call on the worker pool, showing a busy button meanwhile
+        idle_text = button.cget("text")
+        button.config(state="disabled", text="PLEASE WAIT...", cursor="watch")
+
+        def restore():
+            if button.winfo_exists():
+                button.config(state="normal", text=idle_text, cursor="hand2")
+
+        def on_success(result):
+            restore()
+            on_done(result)
+
+        def on_error(error):
+            restore()
+            messagebox.showerror("Error", f"Database error: {error}")
+
+        self.app.repo.submit(fn, *args, on_success=on_success, on_error=on_error)
+
     def create_logo_header(self, parent):
         logo_frame = tk.Frame(parent, bg=LOGIN_CARD_BG)
         logo_frame.pack(pady=(0, 20))
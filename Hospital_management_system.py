@@ -2,8 +2,14 @@ import tkinter as tk
 from tkinter import messagebox, ttk
 from PIL import Image, ImageTk
 import os
-import random
-import string
+from passwords import HAVE_SCRYPT, PasswordHasher
+from storage import MemoryStorage
+from reset_codes import ResetCodeStore
+
+# The accounts here live in memory and vanish on exit, so they are hashed
+# at a small fixed cost: no calibration, and login/register/reset run the
+# KDF on the Tk thread in well under a frame
+DEMO_HASHER = PasswordHasher(cost=2 ** 10 if HAVE_SCRYPT else 1_000)
 
 # ------------- Global colors / fonts -------------
 BG_MAIN = "#f3e9ef"
@@ -38,17 +44,11 @@ class HospitalApp(tk.Tk):
         self.configure(bg=LOGIN_BG)
         self.resizable(True, True)
 
-        # Store user data (simulated database)
-        self.users = {
-            "admin": {
-                "password": "password",
-                "email": "admin@nima-hospital.com",
-                "name": "Administrator"
-            }
-        }
+        # Store user data (simulated database, shared with main_app via storage.py)
+        self.users = MemoryStorage(hasher=DEMO_HASHER)
         
-        # Temporary storage for password reset codes
-        self.reset_codes = {}
+        # Password reset codes (expiring and capped, in memory only)
+        self.reset_codes = ResetCodeStore()
 
         # notifications data
         self.notifications = [
@@ -174,18 +174,11 @@ class HospitalApp(tk.Tk):
                 return
             
             # Check if email exists in our "database"
-            user_found = False
-            username = None
-            for uname, user_data in self.users.items():
-                if user_data["email"] == email:
-                    user_found = True
-                    username = uname
-                    break
-            
-            if user_found:
+            username = self.users.find_user_by_email(email)
+
+            if username:
                 # Generate a random reset code
-                reset_code = ''.join(random.choices(string.digits, k=6))
-                self.reset_codes[email] = reset_code
+                reset_code = self.reset_codes.issue(email)
                 
                 # In a real app, you would send an email here
                 # For demo, we'll show the code in a messagebox
@@ -310,17 +303,16 @@ class HospitalApp(tk.Tk):
         # Verify code button
         def verify_code():
             entered_code = code_entry.get().strip()
-            stored_code = self.reset_codes.get(email)
             
             if not entered_code:
                 messagebox.showerror("Error", "Please enter the reset code")
                 return
             
-            if stored_code and entered_code == stored_code:
+            if self.reset_codes.verify(email, entered_code):
                 # Code correct, show new password page
                 self.show_new_password_page(email, username)
             else:
-                messagebox.showerror("Error", "Invalid reset code")
+                messagebox.showerror("Error", "Invalid or expired reset code")
 
         verify_button = tk.Button(
             card_inner,
@@ -349,8 +341,7 @@ class HospitalApp(tk.Tk):
         
         def resend_code():
             # Generate new code
-            new_code = ''.join(random.choices(string.digits, k=6))
-            self.reset_codes[email] = new_code
+            new_code = self.reset_codes.issue(email)
             messagebox.showinfo("Code Resent", f"DEMO MODE - New code: {new_code}")
         
         resend_link.bind("<Button-1>", lambda e: resend_code())
@@ -491,11 +482,10 @@ class HospitalApp(tk.Tk):
                 return
             
             # Update password in our "database"
-            self.users[username]["password"] = newpass
+            self.users.update_user_password(username, newpass)
             
             # Clear the reset code
-            if email in self.reset_codes:
-                del self.reset_codes[email]
+            self.reset_codes.discard(email)
             
             messagebox.showinfo("Success", "Password reset successful! Please login with your new password.")
             self.show_login_page()
@@ -666,7 +656,7 @@ class HospitalApp(tk.Tk):
             password = password_entry.get().strip()
             
             # Check credentials
-            if username in self.users and self.users[username]["password"] == password:
+            if self.users.validate_login(username, password):
                 messagebox.showinfo("Success", "Login successful!")
                 self.show_main_app()
             else:
@@ -931,17 +921,12 @@ class HospitalApp(tk.Tk):
                 messagebox.showerror("Error", "Please accept the Terms and Conditions")
                 return
             
-            if username in self.users:
-                messagebox.showerror("Error", "Username already exists")
-                return
-            
             # Add new user to our "database"
-            self.users[username] = {
-                "password": password,
-                "email": email,
-                "name": name
-            }
-            
+            created, error_message = self.users.create_user(name, email, username, password)
+            if not created:
+                messagebox.showerror("Error", error_message)
+                return
+
             messagebox.showinfo("Success", "Registration successful! Please login.")
             self.show_login_page()
 
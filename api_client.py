@@ -0,0 +1,173 @@
+"""
+API Client - talk to api_service.py from a terminal
+
+ApiClient keeps one socket per thread (like ConnectionPool does for
+SQLite connections), so HospitalApp's worker threads can call in
+parallel. RemoteStorage and RemoteAuditLog put the usual storage and
+audit interfaces on top of it, which is all HospitalApp needs to run
+against the service instead of hospital.db.
+
+Addresses are ``host:port`` or ``unix:/path/to.sock``. Every request
+carries the service's shared token (NIMA_API_TOKEN unless given).
+"""
+import itertools
+import json
+import os
+import socket
+import threading
+
+from api_service import IDENTITIES_PAGE
+from audit_log import AuditLog
+from storage import UserStorage
+
+
+class ApiError(Exception):
+    """The service answered a request with an error."""
+
+
+class ApiClient:
+    def __init__(self, address, timeout=30, token=None):
+        self.address = address
+        self.timeout = timeout
+        self.token = token or os.environ.get("NIMA_API_TOKEN", "")
+        self._ids = itertools.count(1)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._sockets = []
+
+    def _open(self):
+        if self.address.startswith("unix:"):
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout)
+            sock.connect(self.address[5:])
+        else:
+            host, port = self.address.rsplit(":", 1)
+            sock = socket.create_connection((host, int(port)), timeout=self.timeout)
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        with self._lock:
+            self._sockets.append(sock)
+        return sock, sock.makefile("rb")
+
+    def _roundtrip(self, message):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = self._open()
+        sock, reader = conn
+        try:
+            sock.sendall(json.dumps(message, separators=(",", ":")).encode("utf-8") + b"\n")
+            line = reader.readline()
+        except OSError:
+            # Drop the broken socket so the next call reconnects
+            self._local.conn = None
+            raise
+        if not line:
+            self._local.conn = None
+            raise ConnectionError("API service closed the connection")
+        return json.loads(line)
+
+    def call(self, method, *params):
+        response = self._roundtrip(
+            {"id": next(self._ids), "token": self.token, "method": method, "params": params}
+        )
+        if "error" in response:
+            raise ApiError(response["error"])
+        return response["result"]
+
+    def batch(self, calls):
+        """Run [(method, *params), ...] in one round trip; returns results in order."""
+        responses = self._roundtrip(
+            [
+                {"id": i, "token": self.token, "method": method, "params": params}
+                for i, (method, *params) in enumerate(calls)
+            ]
+        )
+        results = []
+        for response in responses:
+            if "error" in response:
+                raise ApiError(response["error"])
+            results.append(response["result"])
+        return results
+
+    def close(self):
+        with self._lock:
+            sockets, self._sockets = self._sockets, []
+        for sock in sockets:
+            try:
+                sock.close()
+            except OSError:
+                pass
+        self._local = threading.local()
+
+
+class RemoteStorage(UserStorage):
+    """UserStorage backed by an API service.
+
+    The service only changes a password against a reset code it issued,
+    so update_user_password is replaced by the reset_* calls.
+    """
+
+    def __init__(self, address, token=None):
+        self.client = ApiClient(address, token=token)
+
+    def validate_login(self, username, password):
+        return self.client.call("validate_login", username, password)
+
+    def username_exists(self, username):
+        return self.client.call("username_exists", username)
+
+    def create_user(self, full_name, email, username, password):
+        created, error_message = self.client.call("create_user", full_name, email, username, password)
+        return created, error_message
+
+    def find_user_by_email(self, email):
+        return self.client.call("find_user_by_email", email)
+
+    def update_user_password(self, username, new_password):
+        raise PermissionError("the API service only changes passwords with a reset code")
+
+    def issue_reset_code(self, email):
+        """Whether the service issued a code for email; it delivers the code itself."""
+        return self.client.call("issue_reset_code", email)
+
+    def verify_reset_code(self, email, code):
+        return self.client.call("verify_reset_code", email, code)
+
+    def reset_password(self, email, code, new_password):
+        return self.client.call("reset_password", email, code, new_password)
+
+    def get_profile(self, username):
+        profile = self.client.call("get_profile", username)
+        return tuple(profile) if profile else None
+
+    def user_count(self):
+        return self.client.call("user_count")
+
+    def iter_identities(self):
+        after_id = 0
+        while True:
+            rows = self.client.call("identities_page", after_id, IDENTITIES_PAGE)
+            for _, username, email in rows:
+                yield username, email
+            if len(rows) < IDENTITIES_PAGE:
+                break
+            after_id = rows[-1][0]
+
+    def close(self):
+        self.client.close()
+
+
+class RemoteAuditLog(AuditLog):
+    """Write-behind audit log that ships each batch to the service."""
+
+    write_errors = (ApiError, OSError)
+
+    def __init__(self, client, **kwargs):
+        self.client = client
+        super().__init__(None, **kwargs)
+
+    def write(self, batch):
+        self.client.call("write_audit", batch)
+
+
+if __name__ == "__main__":
+    print("api_client.py is a support module. Run main_app.py for the full application.")
@@ -0,0 +1,429 @@
+"""
+API Service - one process owns hospital.db and serves it to many terminals
+
+Usage (headless):
+    NIMA_API_TOKEN=<secret> python api_service.py [--db hospital.db] [--host 127.0.0.1] [--port 8765]
+    python api_service.py --unix /tmp/nima.sock --token <secret>
+    python api_service.py --backup-dir backups       # plus online snapshots (backups.py)
+    NIMA_API=127.0.0.1:8765 NIMA_API_TOKEN=<secret> python main_app.py   # point a terminal at it
+
+Front-desk PCs talk to the service instead of opening the database file,
+so writes are serialized in one place (the storage's DatabaseWriter,
+which group-commits them) and every terminal shares the same warm
+connections and statement caches.
+
+Protocol: newline-delimited JSON over TCP or a Unix socket. A request is
+``{"id": 1, "token": "...", "method": "list_doctors", "params": []}`` and
+the answer is ``{"id": 1, "result": ...}`` or ``{"id": 1, "error": "..."}``.
+Requests on one connection may be pipelined; answers carry the request
+id and can come back out of order. A JSON array of requests is a batch:
+it runs on one worker in a single hop and is answered with an array.
+
+Every request, including each one in a batch, must carry the shared
+secret the service was started with (NIMA_API_TOKEN); anything else is
+refused before it reaches the database. The service listens on
+127.0.0.1 unless told otherwise.
+
+Identical read-only requests that arrive while one is already running
+share its result instead of running again.
+
+Passwords are only changed with a reset code the service itself issued
+and checks (reset_password); there is no raw password update. The code
+never travels back over the API: issue_reset_code only acknowledges,
+and the code goes to the account's owner through ``deliver``. The demo
+delivery writes it to the service's log. Failed
+logins are counted per client address and username. After
+LOGIN_MAX_FAILURES within LOGIN_WINDOW seconds, validate_login answers
+False to that client without checking until the window has passed;
+other terminals can still log in with the right password, so one
+client's guessing can't lock the real user out.
+"""
+import argparse
+import asyncio
+import hmac
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import dashboard_stats
+import global_search
+import messages
+import notifications
+import schedule
+from audit_log import query_events, write_events
+from backups import BackupScheduler
+from change_feed import change_versions
+from reset_codes import ResetCodeStore
+from storage import SQLiteStorage
+
+DEFAULT_PORT = 8765
+WORKERS = 8
+# Lines can carry a whole batch or an identities page
+LINE_LIMIT = 16 * 1024 * 1024
+IDENTITIES_PAGE = 5000
+# Room for every terminal to connect at once
+BACKLOG = 512
+LOGIN_MAX_FAILURES = 5
+LOGIN_WINDOW = 5 * 60
+LOGIN_TRACKED = 10_000
+
+log = logging.getLogger("nima.api")
+
+
+def identities_page(conn, after_id=0, limit=IDENTITIES_PAGE):
+    return conn.execute(
+        "SELECT id, username, email FROM users WHERE id > ? ORDER BY id LIMIT ?",
+        (after_id, limit),
+    ).fetchall()
+
+
+# Data-layer calls shared by HospitalApp (local file) and the service;
+# each takes a connection first
+QUERIES = {
+    "audit_events": query_events,
+    "write_audit": write_events,
+    "dashboard_counts": dashboard_stats.dashboard_counts,
+    "appointments_today": schedule.appointments_today,
+    "doctor_week": schedule.doctor_week,
+    "list_doctors": schedule.list_doctors,
+    "recent_messages": messages.recent_messages,
+    "messages_after": messages.messages_after,
+    "search_messages": messages.search_messages,
+    "post_message": messages.post_message,
+    "search_source": global_search.search_source,
+    "add_notification": notifications.add_notification,
+    "unread_count": notifications.unread_count,
+    "unread_since": notifications.unread_since,
+    "mark_all_read": notifications.mark_all_read,
+    "identities_page": identities_page,
+    "change_versions": change_versions,
+}
+STORAGE_METHODS = (
+    "username_exists",
+    "create_user",
+    "find_user_by_email",
+    "get_profile",
+    "user_count",
+)
+# Implemented by ApiService itself: they check before they touch storage
+SERVICE_METHODS = ("validate_login", "issue_reset_code", "verify_reset_code", "reset_password", "stats")
+READ_ONLY = {
+    "username_exists", "find_user_by_email", "get_profile", "user_count",
+    "audit_events", "dashboard_counts", "appointments_today", "doctor_week",
+    "list_doctors", "recent_messages", "search_messages", "search_source",
+    "unread_count", "unread_since", "identities_page", "messages_after", "change_versions",
+}
+
+
+def log_reset_code(email, username, code):
+    # Demo delivery on the service host; a real one mails the code to email
+    log.warning("DEMO MODE reset code for %s <%s>: %s", username, email, code)
+
+
+class LoginThrottle:
+    """Counts failed logins per (client, username) and locks that pair out for a while.
+
+    Entries are kept in first-failure order in a bounded OrderedDict, like
+    the reset codes, so guessing at many names can't grow it without limit.
+    """
+
+    def __init__(self, max_failures=LOGIN_MAX_FAILURES, window=LOGIN_WINDOW, capacity=LOGIN_TRACKED,
+                 clock=time.monotonic):
+        self.max_failures = max_failures
+        self.window = window
+        self.capacity = capacity
+        self.clock = clock
+        self._failures = OrderedDict()   # (client, username) -> (count, first failure)
+        self._lock = threading.Lock()
+        self.refused = 0
+
+    def allowed(self, key):
+        with self._lock:
+            entry = self._failures.get(key)
+            if entry is None:
+                return True
+            if self.clock() - entry[1] >= self.window:
+                del self._failures[key]
+                return True
+            if entry[0] >= self.max_failures:
+                self.refused += 1
+                return False
+            return True
+
+    def record(self, key, ok):
+        with self._lock:
+            if ok:
+                self._failures.pop(key, None)
+                return
+            count, first = self._failures.get(key, (0, self.clock()))
+            self._failures[key] = (count + 1, first)
+            while len(self._failures) > self.capacity:
+                self._failures.popitem(last=False)
+
+
+class ApiService:
+    def __init__(self, db_path, workers=WORKERS, hasher=None, token=None, deliver=log_reset_code):
+        token = token or os.environ.get("NIMA_API_TOKEN")
+        if not token:
+            raise ValueError("the API service needs a shared token (NIMA_API_TOKEN or --token)")
+        self.token = token
+        self._token = token.encode("utf-8")
+        self.storage = SQLiteStorage(db_path, hasher=hasher)
+        self.reset_codes = ResetCodeStore(self.storage.pool, writer=self.storage.writer)
+        self.deliver = deliver
+        self.logins = LoginThrottle()
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="api")
+        self._inflight = {}
+        self.requests = 0
+        self.batches = 0
+        self.coalesced = 0
+        self.unauthorized = 0
+        self.server = None
+
+    def authorized(self, request):
+        token = request.get("token") if isinstance(request, dict) else None
+        if isinstance(token, str) and hmac.compare_digest(token.encode("utf-8"), self._token):
+            return True
+        self.unauthorized += 1
+        return False
+
+    # ------------- SERVICE METHODS -------------
+    def validate_login(self, username, password, peer=None):
+        key = (peer, username)
+        if not self.logins.allowed(key):
+            return False
+        ok = self.storage.validate_login(username, password)
+        self.logins.record(key, ok)
+        return ok
+
+    def issue_reset_code(self, email):
+        """Issues and delivers a code for a registered email; returns whether it did.
+
+        The code itself is not returned: whoever holds the API token must
+        not be able to reset an account they can't read the mail of.
+        """
+        username = self.storage.find_user_by_email(email)
+        if username is None:
+            return False
+        self.deliver(email, username, self.reset_codes.issue(email))
+        return True
+
+    def verify_reset_code(self, email, code):
+        return self.reset_codes.verify(email, code)
+
+    def reset_password(self, email, code, new_password):
+        """Sets the password of email's account if code is its live reset code."""
+        if not self.reset_codes.verify(email, code):
+            return False
+        username = self.storage.find_user_by_email(email)
+        updated = username is not None and self.storage.update_user_password(username, new_password)
+        if updated:
+            self.reset_codes.discard(email)
+        return updated
+
+    # ------------- DISPATCH (worker threads) -------------
+    def dispatch(self, method, params, peer=None):
+        if method == "validate_login":
+            return self.validate_login(*params, peer=peer)
+        if method in STORAGE_METHODS:
+            return getattr(self.storage, method)(*params)
+        if method in READ_ONLY:
+            return QUERIES[method](self.storage.connect(), *params)
+        if method in QUERIES:
+            # Writes share the storage's writer thread and its group commits
+            return self.storage.writer.execute(QUERIES[method], *params)
+        if method in SERVICE_METHODS:
+            return getattr(self, method)(*params)
+        raise LookupError(f"unknown method {method!r}")
+
+    def answer(self, request, peer=None):
+        request_id = request.get("id") if isinstance(request, dict) else None
+        if not self.authorized(request):
+            return {"id": request_id, "error": "unauthorized"}
+        try:
+            result = self.dispatch(request["method"], request.get("params", []), peer)
+        except Exception as e:
+            return {"id": request_id, "error": f"{type(e).__name__}: {e}"}
+        return {"id": request_id, "result": result}
+
+    def answer_batch(self, requests, peer=None):
+        return [self.answer(request, peer) for request in requests]
+
+    def stats(self):
+        return {
+            "requests": self.requests,
+            "batches": self.batches,
+            "coalesced": self.coalesced,
+            "unauthorized": self.unauthorized,
+            "logins_refused": self.logins.refused,
+            "pool": self.storage.pool.stats(),
+            "writer": self.storage.writer.stats(),
+        }
+
+    # ------------- EVENT LOOP -------------
+    async def handle(self, request, peer=None):
+        self.requests += 1
+        loop = asyncio.get_running_loop()
+        if not isinstance(request, dict) or request.get("method") not in READ_ONLY:
+            return await loop.run_in_executor(self.executor, self.answer, request, peer)
+
+        # Checked here, before a request can share another's result
+        if not self.authorized(request):
+            return {"id": request.get("id"), "error": "unauthorized"}
+        key = (request["method"], json.dumps(request.get("params", [])))
+        shared = self._inflight.get(key)
+        if shared is None:
+            shared = loop.run_in_executor(self.executor, self.answer, {**request, "id": None})
+            self._inflight[key] = shared
+            shared.add_done_callback(lambda _: self._inflight.pop(key, None))
+        else:
+            self.coalesced += 1
+        response = await asyncio.shield(shared)
+        return {**response, "id": request.get("id")}
+
+    async def handle_line(self, line, writer, write_lock, peer=None):
+        try:
+            message = json.loads(line)
+        except json.JSONDecodeError as e:
+            response = {"id": None, "error": f"bad request: {e}"}
+        else:
+            if isinstance(message, list):
+                self.batches += 1
+                self.requests += len(message)
+                loop = asyncio.get_running_loop()
+                response = await loop.run_in_executor(self.executor, self.answer_batch, message, peer)
+            else:
+                response = await self.handle(message, peer)
+
+        data = json.dumps(response, separators=(",", ":")).encode("utf-8") + b"\n"
+        async with write_lock:
+            writer.write(data)
+            await writer.drain()
+
+    async def client_connected(self, reader, writer):
+        write_lock = asyncio.Lock()
+        # The client's host (not its port, so reconnecting starts no new
+        # count); Unix-socket clients all share the local host's
+        peername = writer.get_extra_info("peername")
+        peer = peername[0] if isinstance(peername, tuple) else "local"
+        tasks = set()
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                task = asyncio.ensure_future(self.handle_line(line, writer, write_lock, peer))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            if tasks:
+                await asyncio.gather(*tasks, return_exceptions=True)
+        except (ConnectionError, asyncio.LimitOverrunError, ValueError, asyncio.CancelledError):
+            # Dropped clients, oversized lines and service shutdown all just
+            # end this connection
+            pass
+        finally:
+            writer.close()
+
+    async def start(self, host="127.0.0.1", port=DEFAULT_PORT, unix_path=None):
+        if unix_path:
+            if os.path.exists(unix_path):
+                os.unlink(unix_path)
+            self.server = await asyncio.start_unix_server(
+                self.client_connected, unix_path, limit=LINE_LIMIT, backlog=BACKLOG
+            )
+        else:
+            self.server = await asyncio.start_server(
+                self.client_connected, host, port, limit=LINE_LIMIT, backlog=BACKLOG
+            )
+        return self.server
+
+    def close(self):
+        if self.server is not None:
+            self.server.close()
+        self.executor.shutdown(wait=True)
+        self.storage.close()
+
+
+class ServiceThread:
+    """Runs an ApiService on its own event loop thread (tests, benchmarks)."""
+
+    def __init__(self, service, host="127.0.0.1", port=0, unix_path=None):
+        self.service = service
+        self.loop = asyncio.new_event_loop()
+        started = threading.Event()
+
+        def run():
+            asyncio.set_event_loop(self.loop)
+            server = self.loop.run_until_complete(service.start(host, port, unix_path))
+            if unix_path:
+                self.address = f"unix:{unix_path}"
+            else:
+                self.address = "%s:%d" % server.sockets[0].getsockname()[:2]
+            started.set()
+            self.loop.run_forever()
+
+        self.thread = threading.Thread(target=run, name="api-service", daemon=True)
+        self.thread.start()
+        started.wait()
+
+    def stop(self):
+        async def shutdown():
+            self.service.server.close()
+            tasks = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+        asyncio.run_coroutine_threadsafe(shutdown(), self.loop).result(timeout=10)
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+        self.loop.close()
+        self.service.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve hospital.db to front-desk terminals")
+    parser.add_argument(
+        "--db",
+        default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "hospital.db"),
+    )
+    parser.add_argument("--host", default="127.0.0.1", help="address to listen on (default loopback only)")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--unix", help="listen on a Unix socket instead of TCP")
+    parser.add_argument("--workers", type=int, default=WORKERS)
+    parser.add_argument("--backup-dir", help="take online snapshots of the database here")
+    parser.add_argument("--backup-every", type=float, default=6 * 60 * 60, help="seconds between snapshots")
+    parser.add_argument("--token", default=os.environ.get("NIMA_API_TOKEN"),
+                        help="shared secret every request must carry (default NIMA_API_TOKEN)")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(levelname)s %(message)s")
+    if not args.token:
+        parser.error("set NIMA_API_TOKEN or pass --token")
+
+    service = ApiService(args.db, args.workers, token=args.token)
+    backups = BackupScheduler(args.db, args.backup_dir, args.backup_every).start() if args.backup_dir else None
+
+    async def serve():
+        server = await service.start(args.host, args.port, args.unix)
+        where = args.unix or f"{args.host}:{args.port}"
+        print(f"serving {args.db} on {where} with {args.workers} workers")
+        async with server:
+            await server.serve_forever()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print(f"stats: {service.stats()}")
+        if backups is not None:
+            backups.stop()
+        service.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,301 @@
+"""
+Archive - move old messages, audit events and appointments out of hospital.db
+
+Usage (headless):
+    python archive.py [--db hospital.db] --keep-days 365 [--vacuum]
+    python archive.py --before "2025-01-01 00:00:00"
+
+Rows older than the cutoff move to one file per year next to the main
+database (``hospital-archive-2024.db``, ...), so hospital.db only holds
+the recent rows the pages actually show. Its indexes stay small enough
+to live in the page cache, and backups copy less.
+
+Archive files are attached on demand with ``ATTACH DATABASE``. Query
+functions pass their SELECT through ``select`` with ``{t}`` in place of
+the table, plus the result order and limit. When the requested range
+starts after the table's archive cutoff (archive_state, migration 0013),
+that is the plain hot query. For older ranges the same SELECT runs
+against the hot table and each archive year the range touches, and the
+results are combined with UNION. SQLite attaches at most 10 databases,
+so when a range spans more than MAX_ATTACHED years the union runs over
+groups of years that fit, each ordered and limited, and the groups'
+rows are merged, deduplicated, ordered and limited again in Python.
+
+Each batch is first committed to the archive file and only then deleted
+from the main file, and only if the archive holds the row. A crash
+between the two steps therefore leaves a row in both places and never
+in neither. The union's duplicate removal hides the overlap, and the
+next run removes it. archive_state is advanced before any row moves, so
+readers look in the archives from then on. Archived rows are treated as
+history: later edits to them are not carried over. An archived table
+gets the hot table's FTS index too (messages_fts), kept by the same
+triggers, so search reaches archived messages. Archive files from
+before that get the index built on the next run.
+"""
+import argparse
+import glob
+import os
+import re
+import sqlite3
+import time
+from datetime import datetime, timedelta, timezone
+
+from db_pool import BUSY_TIMEOUT_MS
+from timestamps import TIMESTAMP_FORMAT
+
+# Table -> timestamp column that decides which year (and whether) it is archived
+ARCHIVED = {"messages": "created_at", "audit_events": "ts", "appointments": "starts_at"}
+BATCH = 500
+PAUSE = 0.01
+# SQLite allows 10 attached databases by default
+MAX_ATTACHED = 8
+
+
+def archive_path(db_path, year):
+    stem, _ = os.path.splitext(db_path)
+    return f"{stem}-archive-{year}.db"
+
+
+def archive_years(db_path):
+    stem, _ = os.path.splitext(db_path)
+    years = []
+    for path in glob.glob(f"{glob.escape(stem)}-archive-*.db"):
+        year = path[len(stem) + len("-archive-"):-3]
+        if year.isdigit():
+            years.append(year)
+    return sorted(years)
+
+
+def databases(conn):
+    return {row[1]: row[2] for row in conn.execute("PRAGMA database_list")}
+
+
+def attach(conn, year, create=False, keep=()):
+    """Attach the archive for year as ``archive_<year>``; None if there is no such file.
+
+    At MAX_ATTACHED archives, the attached ones not named in keep are
+    detached first.
+    """
+    schema = f"archive_{year}"
+    attached = databases(conn)
+    if schema in attached:
+        return schema
+    path = archive_path(attached["main"], year)
+    if not create and not os.path.exists(path):
+        return None
+    archives = [name for name in attached if name.startswith("archive_")]
+    if len(archives) >= MAX_ATTACHED:
+        for name in archives:
+            if name not in keep:
+                conn.execute(f"DETACH DATABASE {name}")
+    conn.execute(f"ATTACH DATABASE ? AS {schema}", (path,))
+    return schema
+
+
+def has_table(conn, schema, table):
+    return conn.execute(f"SELECT 1 FROM {schema}.sqlite_master WHERE name = ?", (table,)).fetchone() is not None
+
+
+def archived_before(conn, table):
+    row = conn.execute("SELECT archived_before FROM archive_state WHERE tbl = ?", (table,)).fetchone()
+    return row[0] if row else None
+
+
+def sources(conn, table, low=None):
+    """Archive years holding table rows at or after timestamp low (None: all history)."""
+    before = archived_before(conn, table)
+    if before is None or (low is not None and low >= before):
+        return []
+    return [
+        year for year in archive_years(databases(conn)["main"])
+        if (low is None or year >= low[:4]) and year <= before[:4]
+    ]
+
+
+def order_by(order):
+    return "ORDER BY " + ", ".join(f"{column}{' DESC' if desc else ''}" for column, desc in order)
+
+
+def merge(groups, order, limit):
+    # What UNION, ORDER BY and LIMIT do in SQL, across the groups' results
+    rows = list(dict.fromkeys(row for group in groups for row in group))
+    for column, desc in reversed(order):
+        # NULLs sort first ascending and last descending, as in SQLite
+        rows.sort(key=lambda row: (row[column - 1] is not None, row[column - 1]), reverse=desc)
+    return rows if limit is None else rows[:limit]
+
+
+def select(conn, table, low, sql, params, order, limit=None, tables=None):
+    """Run sql (``{t}`` = table) over the hot table plus any archives at or after low.
+
+    params must be named, since sql is repeated once per schema. order is
+    a sequence of (result column position, descending) pairs and limit
+    an optional row count; both apply to the combined result. Archives
+    missing table, or any of tables when sql reads more than one, are
+    skipped.
+    """
+    tail = f" {order_by(order)}" + ("" if limit is None else " LIMIT :archive_limit")
+    params = {**params, "archive_limit": limit}
+    years = sources(conn, table, low)
+    if not years:
+        return conn.execute(sql.format(t=table) + tail, params).fetchall()
+
+    # One statement covers main plus up to MAX_ATTACHED archive years
+    batches = [years[i:i + MAX_ATTACHED] for i in range(0, len(years), MAX_ATTACHED)]
+    results = []
+    for n, batch in enumerate(batches):
+        keep = {f"archive_{year}" for year in batch}
+        schemas = ["main"] if n == 0 else []
+        schemas += [
+            schema for schema in (attach(conn, year, keep=keep) for year in batch)
+            if schema and all(has_table(conn, schema, name) for name in tables or (table,))
+        ]
+        if schemas:
+            union = "\nUNION\n".join(sql.format(t=f"{schema}.{table}") for schema in schemas)
+            results.append(conn.execute(union + tail, params).fetchall())
+    return results[0] if len(results) == 1 else merge(results, order, limit)
+
+
+# ------------- ARCHIVING JOB -------------
+def ensure_table(conn, schema, table):
+    # Same definition and indexes as the hot table, created in the archive file
+    if has_table(conn, schema, table):
+        return
+    create = conn.execute(
+        "SELECT sql FROM main.sqlite_master WHERE type = 'table' AND name = ?", (table,)
+    ).fetchone()[0]
+    conn.execute(re.sub(r"^CREATE TABLE (\w+)", rf"CREATE TABLE {schema}.\1", create))
+    for (index,) in conn.execute(
+        "SELECT sql FROM main.sqlite_master WHERE type = 'index' AND tbl_name = ? AND sql IS NOT NULL",
+        (table,),
+    ).fetchall():
+        conn.execute(re.sub(r"^CREATE (UNIQUE )?INDEX (\w+)", rf"CREATE \1INDEX {schema}.\2", index))
+
+
+def ensure_search(conn, schema, table):
+    # The hot table's external-content FTS tables and the triggers that
+    # keep them in step, indexing whatever the archive already holds
+    for name, create in conn.execute(
+        "SELECT name, sql FROM main.sqlite_master WHERE type = 'table' "
+        "AND sql LIKE 'CREATE VIRTUAL TABLE%' AND sql LIKE ?",
+        (f"%content='{table}'%",),
+    ).fetchall():
+        if has_table(conn, schema, name):
+            continue
+        conn.execute("BEGIN IMMEDIATE")
+        conn.execute(re.sub(r"^CREATE VIRTUAL TABLE (\w+)", rf"CREATE VIRTUAL TABLE {schema}.\1", create))
+        for (trigger,) in conn.execute(
+            "SELECT sql FROM main.sqlite_master WHERE type = 'trigger' AND tbl_name = ? AND sql LIKE ?",
+            (table, f"%{name}%"),
+        ).fetchall():
+            conn.execute(re.sub(r"^CREATE TRIGGER (\w+)", rf"CREATE TRIGGER {schema}.\1", trigger))
+        conn.execute(f"INSERT INTO {schema}.{name} ({name}) VALUES ('rebuild')")
+        conn.execute("COMMIT")
+
+
+def move_year(conn, schema, table, column, low, high, batch=BATCH, pause=PAUSE):
+    columns = ", ".join(row[1] for row in conn.execute(f"PRAGMA {schema}.table_info({table})"))
+    moved = 0
+    while True:
+        ids = [row[0] for row in conn.execute(
+            f"SELECT id FROM main.{table} WHERE {column} >= ? AND {column} < ? LIMIT ?", (low, high, batch)
+        )]
+        if not ids:
+            return moved
+        marks = ", ".join("?" * len(ids))
+        conn.execute("BEGIN IMMEDIATE")
+        conn.execute(
+            f"INSERT OR IGNORE INTO {schema}.{table} ({columns}) "
+            f"SELECT {columns} FROM main.{table} WHERE id IN ({marks})",
+            ids,
+        )
+        conn.execute("COMMIT")
+        conn.execute("BEGIN IMMEDIATE")
+        conn.execute(
+            f"DELETE FROM main.{table} WHERE id IN ({marks}) "
+            f"AND id IN (SELECT id FROM {schema}.{table} WHERE id IN ({marks}))",
+            ids + ids,
+        )
+        conn.execute("COMMIT")
+        moved += len(ids)
+        # Short transactions with gaps, so the app's writer gets the lock
+        time.sleep(pause)
+
+
+def archive(db_path, cutoff, tables=ARCHIVED, batch=BATCH, pause=PAUSE):
+    """Move rows older than cutoff into per-year archives; returns {table: rows moved}."""
+    conn = sqlite3.connect(db_path, timeout=BUSY_TIMEOUT_MS / 1000, isolation_level=None)
+    moved = {}
+    try:
+        for year in archive_years(db_path):
+            schema = attach(conn, year)
+            for table in tables:
+                if has_table(conn, schema, table):
+                    ensure_search(conn, schema, table)
+        for table, column in tables.items():
+            # Readers must start looking in the archives before rows leave
+            conn.execute(
+                """
+                INSERT INTO archive_state (tbl, archived_before) VALUES (?, ?)
+                ON CONFLICT (tbl) DO UPDATE
+                SET archived_before = max(archived_before, excluded.archived_before)
+                """,
+                (table, cutoff),
+            )
+            years = [row[0] for row in conn.execute(
+                f"SELECT DISTINCT substr({column}, 1, 4) FROM {table} WHERE {column} < ?", (cutoff,)
+            )]
+            moved[table] = 0
+            for year in years:
+                schema = attach(conn, year, create=True)
+                ensure_table(conn, schema, table)
+                ensure_search(conn, schema, table)
+                low = f"{year}-01-01 00:00:00"
+                high = min(f"{int(year) + 1}-01-01 00:00:00", cutoff)
+                moved[table] += move_year(conn, schema, table, column, low, high, batch, pause)
+    finally:
+        conn.close()
+    return moved
+
+
+def vacuum(db_path):
+    conn = sqlite3.connect(db_path, timeout=BUSY_TIMEOUT_MS / 1000, isolation_level=None)
+    try:
+        conn.execute("VACUUM")
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    finally:
+        conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Move old rows from hospital.db into per-year archives")
+    parser.add_argument(
+        "--db",
+        default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "hospital.db"),
+    )
+    when = parser.add_mutually_exclusive_group(required=True)
+    when.add_argument("--before", help="archive rows older than this UTC timestamp")
+    when.add_argument("--keep-days", type=int, help="archive rows older than this many days")
+    parser.add_argument("--vacuum", action="store_true", help="shrink hospital.db afterwards (locks it)")
+    args = parser.parse_args()
+
+    if args.before:
+        cutoff = args.before
+    else:
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+        cutoff = (now - timedelta(days=args.keep_days)).strftime(TIMESTAMP_FORMAT)
+
+    size = os.path.getsize(args.db)
+    start = time.perf_counter()
+    moved = archive(args.db, cutoff)
+    elapsed = time.perf_counter() - start
+    for table, count in moved.items():
+        print(f"{table:<14} {count:>9} rows archived")
+    print(f"cutoff {cutoff}, {elapsed:.1f}s")
+    if args.vacuum:
+        vacuum(args.db)
+        print(f"{args.db}: {size / 1e6:.1f} MB -> {os.path.getsize(args.db) / 1e6:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
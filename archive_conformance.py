@@ -0,0 +1,213 @@
+"""
+Archive Conformance - archived history must read exactly like hot history
+
+Usage (headless):
+    python archive_conformance.py
+
+Generates a database with 13 years of messages, appointments and audit
+events, records what the query functions return (search included),
+archives everything older than a year (more archive years than SQLite
+can attach at once) and checks the same calls return the same rows.
+Raises AssertionError on any deviation.
+"""
+import contextlib
+import io
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import archive
+import backups
+import datagen
+import messages
+import schedule
+from audit_log import query_events, write_events
+from migrate import migrate
+from timestamps import TIMESTAMP_FORMAT
+
+YEARS = 13
+END = datetime(2026, 6, 1)
+COUNTS = {"users": 20, "doctors": 5, "patients": 200, "appointments": 4000,
+          "operations": 10, "messages": 4000}
+AUDIT_EVENTS = 4000
+
+
+def build_database(path):
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode = WAL")
+    migrate(conn)
+    with contextlib.redirect_stdout(io.StringIO()):
+        datagen.generate(conn, COUNTS, seed=3, end=END, history_days=YEARS * 365)
+    rng = random.Random(3)
+    start = END - timedelta(days=YEARS * 365)
+    stamps = sorted(start + timedelta(seconds=rng.randrange(YEARS * 365 * 86400)) for _ in range(AUDIT_EVENTS))
+    write_events(conn, [
+        (ts.strftime(TIMESTAMP_FORMAT), f"user{rng.randrange(5)}", rng.choice(("login", "logout")), "")
+        for ts in stamps
+    ])
+    conn.close()
+
+
+def all_pages(fetch, *args):
+    def pages(conn):
+        ids, before_id = [], None
+        while True:
+            page = fetch(conn, *args, before_id=before_id, limit=500)
+            if not page:
+                return ids
+            ids += [row[0] for row in page]
+            before_id = page[-1][0]
+    return pages
+
+
+# name -> call; each must return the same rows before and after archiving
+VIEWS = {
+    "recent_messages (first page)": lambda conn: messages.recent_messages(conn),
+    "recent_messages (every page)": all_pages(messages.recent_messages),
+    "search_messages (first page)": lambda conn: messages.search_messages(conn, "allergy insul"),
+    "search_messages (every page)": all_pages(messages.search_messages, "insulin"),
+    "query_events (all)": lambda conn: query_events(conn, limit=10 ** 6),
+    "query_events (newest 50)": lambda conn: query_events(conn, limit=50),
+    "query_events (user, since)": lambda conn: query_events(
+        conn, username="user1", since=f"{END.year - 10}-03-01 00:00:00", limit=10 ** 6
+    ),
+    "appointments_between (all years)": lambda conn: schedule.appointments_between(
+        conn, END - timedelta(days=(YEARS + 1) * 365), END + timedelta(days=60)
+    ),
+    "doctor_week (old)": lambda conn: schedule.doctor_week(conn, 1, END - timedelta(days=9 * 365)),
+}
+
+
+def snapshot(conn):
+    return {name: view(conn) for name, view in VIEWS.items()}
+
+
+def check_beyond_attach_limit(conn, before):
+    years = archive.archive_years(archive.databases(conn)["main"])
+    assert len(years) > archive.MAX_ATTACHED, years
+
+
+def check_views_unchanged(conn, before):
+    after = snapshot(conn)
+    for name in VIEWS:
+        assert after[name] == before[name], f"{name}: {len(after[name])} rows, expected {len(before[name])}"
+        assert before[name], f"{name}: no rows to compare"
+
+
+def check_views_in_other_order(conn, before):
+    # Different calls leave different archives attached; none may go stale
+    for name in reversed(list(VIEWS)):
+        assert VIEWS[name](conn) == before[name], name
+
+
+def check_hot_rows_only_in_main(conn, before):
+    cutoff = archive.archived_before(conn, "messages")
+    oldest = conn.execute("SELECT MIN(created_at) FROM main.messages").fetchone()[0]
+    assert oldest >= cutoff, (oldest, cutoff)
+
+
+def check_search_index_backfilled(conn, before):
+    # An archive file written before archives carried the FTS index
+    main = archive.databases(conn)["main"]
+    year = archive.archive_years(main)[0]
+    old = sqlite3.connect(archive.archive_path(main, year))
+    for (trigger,) in old.execute("SELECT name FROM sqlite_master WHERE type = 'trigger'").fetchall():
+        old.execute(f"DROP TRIGGER {trigger}")
+    old.execute("DROP TABLE messages_fts")
+    old.commit()
+    old.close()
+    found = messages.search_messages(conn, "insulin", limit=10 ** 6)
+    assert found and all(row[3][:4] != year for row in found)
+
+    # The next archiving run indexes the file again
+    archive.archive(main, archive.archived_before(conn, "messages"), pause=0)
+    name = "search_messages (every page)"
+    assert VIEWS[name](conn) == before[name]
+
+
+def check_archive_without_table_skipped(conn, before):
+    # A year holding audit events but no messages or appointments
+    main = archive.databases(conn)["main"]
+    year = str(int(archive.archive_years(main)[0]) - 1)
+    other = sqlite3.connect(archive.archive_path(main, year))
+    other.execute("CREATE TABLE audit_events (id INTEGER PRIMARY KEY, ts TEXT, username TEXT, event TEXT, detail TEXT)")
+    other.close()
+    for name in ("recent_messages (every page)", "search_messages (every page)", "appointments_between (all years)"):
+        assert VIEWS[name](conn) == before[name], name
+
+
+def check_backup_keeps_history(conn, before):
+    main = archive.databases(conn)["main"]
+    dest = os.path.join(os.path.dirname(main), "backups")
+    first = backups.backup(main, dest, pages=-1, sleep=0, when=END)
+    assert first["archives"] == len(archive.archive_years(main)), first
+    snapshot_conn = sqlite3.connect(first["path"])
+    try:
+        for name in ("recent_messages (every page)", "search_messages (every page)", "query_events (all)"):
+            assert VIEWS[name](snapshot_conn) == before[name], name
+    finally:
+        snapshot_conn.close()
+
+    backups.backup(main, dest, pages=-1, sleep=0, when=END + timedelta(days=1))
+    removed = backups.rotate(main, dest, keep_last=1, keep_days=0, now=END + timedelta(days=1))
+    assert removed == [first["path"]], removed
+    assert not archive.archive_years(first["path"])
+
+
+def check_merge(conn, before):
+    groups = [[(3, "b"), (1, None)], [(2, "a"), (3, "b")]]
+    assert archive.merge(groups, ((1, True),), None) == [(3, "b"), (2, "a"), (1, None)]
+    assert archive.merge(groups, ((2, False),), 2) == [(1, None), (2, "a")]
+    assert archive.merge(groups, ((2, True), (1, False)), None) == [(3, "b"), (2, "a"), (1, None)]
+
+
+CHECKS = [
+    check_beyond_attach_limit,
+    check_views_unchanged,
+    check_views_in_other_order,
+    check_hot_rows_only_in_main,
+    check_search_index_backfilled,
+    check_archive_without_table_skipped,
+    check_backup_keeps_history,
+    check_merge,
+]
+
+
+def run_conformance(tmp):
+    """Build, snapshot, archive and run every check; returns a list of failures."""
+    path = os.path.join(tmp, "hospital.db")
+    build_database(path)
+    conn = sqlite3.connect(path)
+    try:
+        before = snapshot(conn)
+        cutoff = (END - timedelta(days=365)).strftime(TIMESTAMP_FORMAT)
+        archive.archive(path, cutoff, pause=0)
+        failures = []
+        for check in CHECKS:
+            try:
+                check(conn, before)
+            except Exception as e:
+                failures.append((check.__name__, e))
+        return failures
+    finally:
+        conn.close()
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        start = time.perf_counter()
+        failures = run_conformance(tmp)
+        elapsed = (time.perf_counter() - start) * 1000
+    status = "ok" if not failures else f"{len(failures)} failed"
+    print(f"{'archive':<16} {len(CHECKS):>2} checks  {elapsed:8.1f} ms  {status}")
+    for check_name, error in failures:
+        print(f"    {check_name}: {type(error).__name__}: {error}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,74 @@
+"""
+Async Repository - runs data access off the Tk thread
+"""
+import queue
+from concurrent.futures import ThreadPoolExecutor
+
+POLL_MS = 15
+
+
+class AsyncRepository:
+    """Runs blocking calls on a worker pool and hands results back to Tk.
+
+    Tk widgets may only be touched from the thread running ``mainloop``, so
+    workers never call back directly: finished jobs are put on a queue that
+    is drained from an ``after()`` loop on the UI thread. ``cancel_all`` bumps
+    a generation counter so results for pages that were navigated away from
+    are dropped instead of delivered to destroyed widgets.
+    """
+
+    def __init__(self, app, workers=4, poll_ms=POLL_MS):
+        self.app = app
+        self.poll_ms = poll_ms
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="repo")
+        self.generation = 0
+        self._done = queue.SimpleQueue()
+        self._futures = set()
+        self._polling = False
+
+    def submit(self, fn, *args, on_success=None, on_error=None):
+        generation = self.generation
+        future = self.executor.submit(fn, *args)
+        self._futures.add(future)
+        future.add_done_callback(
+            lambda f: self._done.put((f, generation, on_success, on_error))
+        )
+        if not self._polling:
+            self._polling = True
+            self.app.after(self.poll_ms, self._poll)
+        return future
+
+    def cancel_all(self):
+        self.generation += 1
+        for future in self._futures:
+            future.cancel()
+
+    def _poll(self):
+        while True:
+            try:
+                future, generation, on_success, on_error = self._done.get_nowait()
+            except queue.Empty:
+                break
+            self._futures.discard(future)
+            if future.cancelled() or generation != self.generation:
+                continue
+            error = future.exception()
+            if error is not None:
+                if on_error:
+                    on_error(error)
+                continue
+            if on_success:
+                on_success(future.result())
+
+        if self._futures:
+            self.app.after(self.poll_ms, self._poll)
+        else:
+            self._polling = False
+
+    def shutdown(self):
+        self.cancel_all()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+if __name__ == "__main__":
+    print("async_repo.py is a support module. Run main_app.py for the full application.")
@@ -0,0 +1,126 @@
+"""
+Audit Log - write-behind, append-only log of authentication events
+"""
+import atexit
+import sqlite3
+import threading
+from datetime import datetime, timezone
+
+import archive
+from timestamps import TIMESTAMP_FORMAT
+
+MAX_BATCH = 200
+FLUSH_INTERVAL = 1.0
+
+INSERT_SQL = "INSERT INTO audit_events (ts, username, event, detail) VALUES (?, ?, ?, ?)"
+
+
+class AuditLog:
+    """Buffers audit events in memory and writes them in batches.
+
+    ``record`` only appends to a list, so callers on the login path pay no
+    extra database round trip. A background thread flushes the buffer in
+    one transaction once it holds ``max_batch`` events or every
+    ``flush_interval`` seconds. ``flush`` and ``close`` write whatever is
+    pending synchronously and are called on logout and window close; an
+    atexit hook covers other clean interpreter exits. Given a
+    DatabaseWriter, batches are committed through it rather than on the
+    log's own connection.
+    """
+
+    # What a failed write may raise; the batch is kept for the next flush
+    write_errors = (sqlite3.Error,)
+
+    def __init__(self, pool, max_batch=MAX_BATCH, flush_interval=FLUSH_INTERVAL, writer=None):
+        self.pool = pool
+        self.writer = writer
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval
+        self._buffer = []
+        self._buffer_lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopped = False
+        self._thread = threading.Thread(target=self._run, name="audit-log", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def record(self, event, username=None, detail=""):
+        ts = datetime.now(timezone.utc).strftime(TIMESTAMP_FORMAT)
+        with self._buffer_lock:
+            self._buffer.append((ts, username, event, detail))
+            full = len(self._buffer) >= self.max_batch
+        if full:
+            self._wake.set()
+
+    def pending(self):
+        with self._buffer_lock:
+            return len(self._buffer)
+
+    def flush(self):
+        with self._write_lock:
+            with self._buffer_lock:
+                batch, self._buffer = self._buffer, []
+            if not batch:
+                return 0
+            try:
+                self.write(batch)
+            except self.write_errors:
+                # Keep the events (in order) for the next attempt
+                with self._buffer_lock:
+                    self._buffer[:0] = batch
+                raise
+            return len(batch)
+
+    def write(self, batch):
+        if self.writer is not None:
+            self.writer.execute(write_events, batch)
+        else:
+            write_events(self.pool.connect(), batch)
+
+    def _run(self):
+        while not self._stopped:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except self.write_errors:
+                pass
+
+    def close(self):
+        if self._stopped:
+            return
+        self._stopped = True
+        self._wake.set()
+        self._thread.join(timeout=5)
+        self.flush()
+
+
+def write_events(conn, batch):
+    with conn:
+        conn.executemany(INSERT_SQL, batch)
+    return len(batch)
+
+
+def query_events(conn, username=None, since=None, until=None, event=None, limit=100):
+    # Named parameters, so archive.select can repeat the SELECT per archive year
+    where = []
+    params = {"username": username, "since": since, "until": until, "event": event, "limit": limit}
+    if username is not None:
+        where.append("username = :username")
+    if since:
+        where.append("ts >= :since")
+    if until:
+        where.append("ts < :until")
+    if event:
+        where.append("event = :event")
+
+    sql = "SELECT id, ts, username, event, detail FROM {t}"
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    # Newest first by timestamp, then id
+    return archive.select(conn, "audit_events", since or None, sql, params, ((2, True), (1, True)), limit)
+
+
+if __name__ == "__main__":
+    print("audit_log.py is a support module. Run main_app.py for the full application.")
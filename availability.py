@@ -0,0 +1,145 @@
+"""
+Availability - live "is this username/email free?" checks for the register page
+
+AvailabilityIndex keeps one Bloom filter of taken usernames and one of
+taken emails, loaded from the storage backend on a worker at start-up.
+A Bloom filter never says "absent" for something it holds, so a miss
+means the name is free and is answered on the Tk thread without a query.
+Only a possible hit (a real clash or a rare false positive) is confirmed
+by an indexed lookup on the worker pool, debounced like global search.
+
+The filters only learn about accounts created through this app; anything
+they miss is still caught by the UNIQUE constraints when create_user runs.
+"""
+import hashlib
+import math
+import threading
+
+DEBOUNCE_MS = 250
+FALSE_POSITIVE_RATE = 0.01
+MIN_CAPACITY = 1024
+
+
+class BloomFilter:
+    def __init__(self, capacity, error_rate=FALSE_POSITIVE_RATE):
+        capacity = max(capacity, 1)
+        self.size = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def _positions(self, key):
+        # Double hashing: k positions from two 64-bit halves of one digest
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+
+    def add(self, key):
+        positions = self._positions(key)
+        with self._lock:
+            for pos in positions:
+                self.bits[pos >> 3] |= 1 << (pos & 7)
+            self.count += 1
+
+    def __contains__(self, key):
+        bits = self.bits
+        return all(bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key))
+
+
+class AvailabilityIndex:
+    """Taken-username and taken-email filters; ``ready`` is False until loaded."""
+
+    def __init__(self):
+        self.usernames = None
+        self.emails = None
+
+    @property
+    def ready(self):
+        return self.usernames is not None
+
+    def load(self, storage):
+        capacity = max(MIN_CAPACITY, 2 * storage.user_count())
+        usernames = BloomFilter(capacity)
+        emails = BloomFilter(capacity)
+        for username, email in storage.iter_identities():
+            usernames.add(username)
+            emails.add(email)
+        self.usernames, self.emails = usernames, emails
+        return usernames.count
+
+    def add(self, username, email):
+        if self.ready:
+            self.usernames.add(username)
+            self.emails.add(email)
+
+    def might_be_taken(self, kind, value):
+        # Before the filters load every value is a possible hit
+        if not self.ready:
+            return True
+        if kind == "email":
+            return value in self.emails
+        return value in self.usernames
+
+
+class AvailabilityCheck:
+    """Live status label for a register-page Entry ("username" or "email").
+
+    Every keystroke runs the in-memory filter check; a possible hit starts
+    a DEBOUNCE_MS timer and only the last one sends ``app.identity_taken``
+    to the worker pool. Answers for text that has since changed are
+    dropped.
+    """
+
+    def __init__(self, app, entry, label, kind):
+        self.app = app
+        self.entry = entry
+        self.label = label
+        self.kind = kind
+        self.generation = 0
+        self._after_id = None
+        entry.bind("<KeyRelease>", self._on_key, add="+")
+
+    def _show(self, text, color):
+        if self.label.winfo_exists():
+            self.label.config(text=text, fg=color)
+
+    def _on_key(self, event):
+        if event.keysym in ("Tab", "Return"):
+            return
+        self.generation += 1
+        if self._after_id is not None:
+            self.app.after_cancel(self._after_id)
+            self._after_id = None
+
+        value = self.entry.get().strip()
+        if not value:
+            self._show("", "gray")
+        elif not self.app.availability.might_be_taken(self.kind, value):
+            self._show(f"✓ {self.kind} available", "#27ae60")
+        else:
+            self._show("checking...", "gray")
+            self._after_id = self.app.after(DEBOUNCE_MS, self.run, value)
+
+    def run(self, value):
+        self._after_id = None
+        generation = self.generation
+        self.app.repo.submit(
+            self.app.identity_taken,
+            self.kind,
+            value,
+            on_success=lambda taken: self._deliver(generation, taken),
+        )
+
+    def _deliver(self, generation, taken):
+        if generation != self.generation:
+            return
+        if taken:
+            self._show(f"✗ {self.kind} already taken", "#e74c3c")
+        else:
+            self._show(f"✓ {self.kind} available", "#27ae60")
+
+
+if __name__ == "__main__":
+    print("availability.py is a support module. Run main_app.py for the full application.")
@@ -0,0 +1,301 @@
+"""
+Backups - online, throttled snapshots of hospital.db
+
+Usage (headless):
+    python backups.py [--db hospital.db] [--dest backups] [--every 3600]
+
+A snapshot is taken with SQLite's online backup API while the app keeps
+running. It copies ``pages`` pages per step and sleeps between steps, so
+the copy doesn't hog the disk while the UI and the writer thread are
+busy. In WAL mode the source connection holds one read transaction for
+the whole copy: writers carry on, and the snapshot is the database as it
+was when the backup started. Otherwise a write from another connection
+makes SQLite restart the copy, so after MAX_RESTARTS the rest is copied
+in a single step rather than chasing a busy database forever.
+
+Each copy is written as ``*.partial``. It only gets its final
+``hospital-YYYYmmdd-HHMMSS-ffffff-<pid>.db`` name after ``PRAGMA
+integrity_check`` passes on the copy, so every snapshot in the directory
+is known to open. Microseconds and the process id keep the names of
+several terminals backing up into one directory apart. Rotation keeps
+the newest ``keep_last`` snapshots plus the newest one for each of the
+last ``keep_days`` days; any of those processes may rotate, and a
+snapshot another one already removed is skipped.
+
+The per-year archive files next to the database (archive.py) are copied
+with each snapshot, under the names archive.py expects beside the
+snapshot (``hospital-<stamp>-<pid>-archive-2024.db``), so a snapshot
+restores with its history. The main file is copied first: rows the
+archiving job moves meanwhile then show up in both copies, which reads
+fine, rather than in neither. The archives are renamed into place
+before the main file and rotated with it.
+
+BackupScheduler takes its first snapshot as soon as it starts, then one
+every ``interval`` seconds.
+"""
+import argparse
+import logging
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta
+
+import archive
+
+PAGES_PER_STEP = 256
+STEP_SLEEP = 0.01
+MAX_RESTARTS = 3
+KEEP_LAST = 5
+KEEP_DAYS = 7
+INTERVAL = 6 * 60 * 60
+STAMP_FORMAT = "%Y%m%d-%H%M%S-%f"
+# Names from before the microseconds and pid were added
+OLD_STAMP_FORMAT = "%Y%m%d-%H%M%S"
+
+log = logging.getLogger("nima.backup")
+
+
+class BackupError(Exception):
+    """A snapshot could not be taken or failed verification."""
+
+
+class Restarted(Exception):
+    # Raised from the progress callback to abandon a throttled copy
+    pass
+
+
+def snapshot_name(db_path, when):
+    stem = os.path.splitext(os.path.basename(db_path))[0]
+    return f"{stem}-{when.strftime(STAMP_FORMAT)}-{os.getpid()}.db"
+
+
+def snapshot_time(db_path, filename):
+    stem = os.path.splitext(os.path.basename(db_path))[0]
+    if not (filename.startswith(stem + "-") and filename.endswith(".db")):
+        return None
+    stamp = filename[len(stem) + 1:-3]
+    stamped, _, pid = stamp.rpartition("-")
+    try:
+        if pid.isdigit() and stamped.count("-") == 2:
+            return datetime.strptime(stamped, STAMP_FORMAT)
+        return datetime.strptime(stamp, OLD_STAMP_FORMAT)
+    except ValueError:
+        return None
+
+
+def verify(path):
+    """Returns the integrity_check messages for a copy; ["ok"] when sound."""
+    conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    try:
+        return [row[0] for row in conn.execute("PRAGMA integrity_check")]
+    finally:
+        conn.close()
+
+
+def copy_database(src, dest, pages=PAGES_PER_STEP, sleep=STEP_SLEEP, max_restarts=MAX_RESTARTS):
+    """Online-copy connection src into dest; returns how often the copy restarted."""
+    state = {"copied": 0, "restarts": 0}
+    # Pin a WAL snapshot so other connections' commits don't restart the copy
+    pinned = src.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    if pinned:
+        src.execute("BEGIN")
+        src.execute("SELECT 1 FROM sqlite_master LIMIT 1").fetchone()
+
+    def progress(status, remaining, total):
+        copied = total - remaining
+        # A step that didn't get past the previous one started over
+        if copied <= state["copied"]:
+            state["restarts"] += 1
+            if state["restarts"] > max_restarts:
+                raise Restarted
+        state["copied"] = copied
+        if remaining and sleep:
+            # Locks are released between steps; give the foreground a turn
+            time.sleep(sleep)
+
+    try:
+        src.backup(dest, pages=pages, progress=progress)
+    except Restarted:
+        src.backup(dest)
+    finally:
+        if pinned:
+            src.rollback()
+    return state["restarts"]
+
+
+def copy_file(src_path, partial, pages=PAGES_PER_STEP, sleep=STEP_SLEEP):
+    """Online-copy the database at src_path into partial; returns (pages, page size, restarts)."""
+    src = sqlite3.connect(src_path)
+    dest = sqlite3.connect(partial)
+    try:
+        restarts = copy_database(src, dest, pages, sleep)
+        total = dest.execute("PRAGMA page_count").fetchone()[0]
+        page_size = dest.execute("PRAGMA page_size").fetchone()[0]
+        # A plain rollback-journal file, so the snapshot is one self-contained file
+        dest.execute("PRAGMA journal_mode = DELETE")
+    finally:
+        dest.close()
+        src.close()
+    return total, page_size, restarts
+
+
+def backup(db_path, dest_dir, pages=PAGES_PER_STEP, sleep=STEP_SLEEP, when=None):
+    """Take one verified snapshot of db_path and its archives into dest_dir and return a report."""
+    os.makedirs(dest_dir, exist_ok=True)
+    final = os.path.join(dest_dir, snapshot_name(db_path, when or datetime.now()))
+    # (source, final name), main file first
+    copies = [(db_path, final)] + [
+        (archive.archive_path(db_path, year), archive.archive_path(final, year))
+        for year in archive.archive_years(db_path)
+    ]
+
+    start = time.perf_counter()
+    total = size = restarts = 0
+    try:
+        for src_path, path in copies:
+            pages_copied, page_size, file_restarts = copy_file(src_path, path + ".partial", pages, sleep)
+            total += pages_copied
+            size += pages_copied * page_size
+            restarts += file_restarts
+        copied = time.perf_counter() - start
+
+        for _, path in copies:
+            problems = verify(path + ".partial")
+            if problems != ["ok"]:
+                raise BackupError(f"integrity_check failed on {path}: {'; '.join(problems[:5])}")
+    except Exception:
+        for _, path in copies:
+            if os.path.exists(path + ".partial"):
+                os.unlink(path + ".partial")
+        raise
+    # The main file's final name marks the snapshot complete
+    for _, path in reversed(copies):
+        os.replace(path + ".partial", path)
+
+    elapsed = time.perf_counter() - start
+    return {
+        "path": final,
+        "archives": len(copies) - 1,
+        "pages": total,
+        "bytes": size,
+        "restarts": restarts,
+        "copy_seconds": copied,
+        "verify_seconds": elapsed - copied,
+        "mb_per_second": size / 1e6 / copied if copied else 0.0,
+    }
+
+
+def rotate(db_path, dest_dir, keep_last=KEEP_LAST, keep_days=KEEP_DAYS, now=None):
+    """Delete snapshots outside the retention policy; returns the removed paths."""
+    snapshots = []
+    for filename in os.listdir(dest_dir):
+        when = snapshot_time(db_path, filename)
+        if when is not None:
+            snapshots.append((when, os.path.join(dest_dir, filename)))
+    snapshots.sort(reverse=True)
+
+    keep = {path for _, path in snapshots[:keep_last]}
+    cutoff = (now or datetime.now()).date() - timedelta(days=keep_days)
+    days = set()
+    for when, path in snapshots:
+        if when.date() > cutoff and when.date() not in days:
+            days.add(when.date())
+            keep.add(path)
+
+    removed = []
+    for _, path in snapshots:
+        if path in keep:
+            continue
+        archives = [archive.archive_path(path, year) for year in archive.archive_years(path)]
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            # Another terminal rotating the same directory got there first
+            continue
+        for archive_file in archives:
+            try:
+                os.unlink(archive_file)
+            except FileNotFoundError:
+                continue
+        removed.append(path)
+    return removed
+
+
+class BackupScheduler:
+    """Takes a snapshot on start, then every ``interval`` seconds, on a daemon thread."""
+
+    def __init__(self, db_path, dest_dir, interval=INTERVAL, keep_last=KEEP_LAST, keep_days=KEEP_DAYS,
+                 pages=PAGES_PER_STEP, sleep=STEP_SLEEP):
+        self.db_path = db_path
+        self.dest_dir = dest_dir
+        self.interval = interval
+        self.keep_last = keep_last
+        self.keep_days = keep_days
+        self.pages = pages
+        self.sleep = sleep
+        self.last_report = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="backup", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def run_now(self):
+        with self._lock:
+            report = backup(self.db_path, self.dest_dir, self.pages, self.sleep)
+            report["rotated"] = rotate(self.db_path, self.dest_dir, self.keep_last, self.keep_days)
+            self.last_report = report
+        log.info(
+            "backup %s (+%d archives): %.1f MB in %.2fs (%.1f MB/s, %d restarts), verified in %.2fs",
+            report["path"], report["archives"], report["bytes"] / 1e6, report["copy_seconds"],
+            report["mb_per_second"], report["restarts"], report["verify_seconds"],
+        )
+        return report
+
+    def _run(self):
+        while True:
+            try:
+                self.run_now()
+            except (sqlite3.Error, OSError, BackupError):
+                log.exception("backup of %s failed", self.db_path)
+            if self._stop.wait(self.interval):
+                return
+
+    def stop(self):
+        self._stop.set()
+        if self._thread.is_alive():
+            self._thread.join(timeout=5)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Online, throttled backups of hospital.db")
+    here = os.path.dirname(os.path.abspath(__file__))
+    parser.add_argument("--db", default=os.path.join(here, "hospital.db"))
+    parser.add_argument("--dest", default=os.path.join(here, "backups"))
+    parser.add_argument("--every", type=float, help="keep running, one snapshot every N seconds")
+    parser.add_argument("--pages", type=int, default=PAGES_PER_STEP, help="pages copied per step")
+    parser.add_argument("--sleep", type=float, default=STEP_SLEEP, help="seconds between steps")
+    parser.add_argument("--keep-last", type=int, default=KEEP_LAST)
+    parser.add_argument("--keep-days", type=int, default=KEEP_DAYS)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(levelname)s %(message)s")
+
+    scheduler = BackupScheduler(
+        args.db, args.dest, args.every or INTERVAL, args.keep_last, args.keep_days, args.pages, args.sleep
+    )
+    if not args.every:
+        scheduler.run_now()
+    else:
+        try:
+            scheduler.start()
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            scheduler.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+"""
+Benchmark: 200 front-desk terminals through api_service versus straight at the file.
+
+Each terminal is a thread running a front-desk mix (dashboard and schedule
+reads, availability lookups, logins, the odd message post). "direct" gives
+every terminal its own SQLite connection to the shared file, as terminals
+did before the service; "api" sends the same calls through one ApiService;
+"api-batch" sends each page load (dashboard + schedule + badge) as one
+batched request.
+
+Run from the repository root:
+    python -m benchmarks.bench_api [--terminals 200] [--calls 50]
+"""
+import argparse
+import contextlib
+import io
+import logging
+import os
+import random
+import secrets
+import sqlite3
+import tempfile
+import threading
+import time
+
+import datagen
+from api_client import ApiClient
+from api_service import QUERIES, ApiService, ServiceThread
+from migrate import migrate
+from passwords import HAVE_SCRYPT, PasswordHasher
+from storage import SQLiteStorage
+
+PASSWORD = "secret123"
+HASHER = PasswordHasher(cost=2 ** 10 if HAVE_SCRYPT else 1_000)
+# (weight, name, argument builder)
+MIX = [
+    (30, "dashboard_counts", lambda rng, users: ()),
+    (20, "appointments_today", lambda rng, users: ()),
+    (10, "unread_count", lambda rng, users: ("admin",)),
+    (10, "recent_messages", lambda rng, users: (None,)),
+    (15, "username_exists", lambda rng, users: (rng.choice(users),)),
+    (10, "find_user_by_email", lambda rng, users: (f"{rng.choice(users)}@nima-hospital.com",)),
+    (4, "validate_login", lambda rng, users: (rng.choice(users), PASSWORD)),
+    (1, "post_message", lambda rng, users: ("frontdesk", "Patient at reception")),
+]
+PAGE_LOAD = [("dashboard_counts",), ("appointments_today",), ("unread_count", "admin")]
+
+
+def build_database(path):
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode = WAL")
+    migrate(conn)
+    counts = {"users": 2000, "doctors": 40, "patients": 20000, "appointments": 50000,
+              "operations": 2000, "messages": 20000}
+    with contextlib.redirect_stdout(io.StringIO()):
+        datagen.generate(conn, counts, seed=7)
+    with conn:
+        conn.execute("UPDATE users SET password = ?", (HASHER.hash(PASSWORD),))
+    users = [row[0] for row in conn.execute("SELECT username FROM users")]
+    conn.close()
+    return users
+
+
+def direct_terminal(path, storage):
+    # Before the service: every terminal has its own connection to the file
+    conn = sqlite3.connect(path, timeout=5)
+
+    def call(name, *args):
+        if name in QUERIES:
+            return QUERIES[name](conn, *args)
+        return getattr(storage, name)(*args)
+
+    return call, conn.close
+
+
+def run_terminals(terminals, calls, make_terminal, users, batch=False):
+    weights = [w for w, _, _ in MIX]
+    latencies = []
+    errors = []
+    lock = threading.Lock()
+    barrier = threading.Barrier(terminals)
+
+    def terminal(n):
+        rng = random.Random(n)
+        call, close = make_terminal()
+        samples = []
+        barrier.wait()
+        try:
+            for _ in range(calls):
+                t0 = time.perf_counter()
+                if batch:
+                    call("__batch__", PAGE_LOAD)
+                else:
+                    _, name, args = rng.choices(MIX, weights)[0]
+                    call(name, *args(rng, users))
+                samples.append((time.perf_counter() - t0) * 1000)
+        except Exception as e:
+            with lock:
+                errors.append(repr(e))
+        finally:
+            close()
+        with lock:
+            latencies.extend(samples)
+
+    threads = [threading.Thread(target=terminal, args=(n,)) for n in range(terminals)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+    return sorted(latencies), elapsed, errors
+
+
+def report(label, latencies, elapsed, errors, calls_per_request=1):
+    pick = lambda f: latencies[min(len(latencies) - 1, int(f * len(latencies)))] if latencies else 0
+    print(f"{label:<10} {len(latencies) * calls_per_request / elapsed:>9.0f} calls/s  "
+          f"p50 {pick(0.50):7.2f} ms  p95 {pick(0.95):7.2f} ms  p99 {pick(0.99):7.2f} ms  "
+          f"errors {len(errors)}")
+    for error in errors[:3]:
+        print(f"           {error}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--terminals", type=int, default=200)
+    parser.add_argument("--calls", type=int, default=50, help="requests per terminal")
+    parser.add_argument("--workers", type=int, default=8)
+    args = parser.parse_args()
+    # Queueing behind 200 threads trips the slow-query log constantly
+    logging.getLogger("nima.sql").setLevel(logging.ERROR)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "hospital.db")
+        users = build_database(path)
+        print(f"{args.terminals} terminals x {args.calls} requests\n")
+
+        storage = SQLiteStorage(path, hasher=HASHER)
+        latencies, elapsed, errors = run_terminals(
+            args.terminals, args.calls, lambda: direct_terminal(path, storage), users
+        )
+        report("direct", latencies, elapsed, errors)
+        storage.close()
+
+        served = ServiceThread(ApiService(path, args.workers, hasher=HASHER, token=secrets.token_hex(16)))
+
+        def api_terminal():
+            client = ApiClient(served.address, token=served.service.token)
+
+            def call(name, *params):
+                if name == "__batch__":
+                    return client.batch(params[0])
+                return client.call(name, *params)
+
+            return call, client.close
+
+        latencies, elapsed, errors = run_terminals(args.terminals, args.calls, api_terminal, users)
+        report("api", latencies, elapsed, errors)
+        latencies, elapsed, errors = run_terminals(args.terminals, args.calls, api_terminal, users, batch=True)
+        report("api-batch", latencies, elapsed, errors, calls_per_request=len(PAGE_LOAD))
+        print(f"\nservice stats: {served.service.stats()}")
+        served.stop()
+
+
+if __name__ == "__main__":
+    main()
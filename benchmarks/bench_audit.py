@@ -0,0 +1,50 @@
+"""
+Benchmark: cost on the caller of a synchronous audit insert versus AuditLog.record.
+
+Run from the repository root:
+    python -m benchmarks.bench_audit [--events N]
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from audit_log import INSERT_SQL, AuditLog
+from db_pool import ConnectionPool
+from migrate import migrate
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--events", type=int, default=20000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        pool = ConnectionPool(os.path.join(tmp, "bench.db"))
+        migrate(pool.connect())
+
+        start = time.perf_counter()
+        for i in range(args.events):
+            with pool.connect() as conn:
+                conn.execute(INSERT_SQL, ("2026-01-01 00:00:00", f"user{i % 100}", "login_success", ""))
+        sync = time.perf_counter() - start
+
+        audit = AuditLog(pool)
+        start = time.perf_counter()
+        for i in range(args.events):
+            audit.record("login_success", f"user{i % 100}")
+        buffered = time.perf_counter() - start
+        start = time.perf_counter()
+        audit.close()
+        drain = time.perf_counter() - start
+
+        rows = pool.connect().execute("SELECT COUNT(*) FROM audit_events").fetchone()[0]
+        print(f"synchronous insert+commit  {sync / args.events * 1e6:8.1f} us/event")
+        print(f"AuditLog.record            {buffered / args.events * 1e6:8.1f} us/event")
+        print(f"final drain on close       {drain * 1000:8.1f} ms")
+        print(f"rows written               {rows}")
+        pool.close_all()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,210 @@
+"""
+Benchmark suite: authentication data paths at 1k / 100k / 1M users.
+
+Runs headless against SQLiteStorage (the backend HospitalApp uses) on
+copies of hospital.db populated to each size, and reports p50/p95/p99
+latency and ops/sec for validate_login, username_exists, create_user,
+find_user_by_email and update_user_password.
+
+Run from the repository root:
+    python -m benchmarks.bench_auth                       # all sizes
+    python -m benchmarks.bench_auth --sizes 1000 100000
+    python -m benchmarks.bench_auth --save-baseline       # record results
+    python -m benchmarks.bench_auth --compare             # flag regressions
+
+Populated databases are cached in benchmarks/.data so later runs skip the
+load step; delete the directory to rebuild them. Each run works on a
+temporary copy, so the rows create_user adds never reach the cache and
+every run starts from the same table. --compare only accepts a baseline
+recorded with the same sizes and iteration count.
+
+Passwords are hashed at a small fixed KDF cost so the numbers track the
+database paths; benchmarks/bench_kdf.py measures the KDF itself.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+
+from migrate import migrate
+from passwords import HAVE_SCRYPT, PasswordHasher
+from storage import SQLiteStorage
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+DATA_DIR = os.path.join(HERE, ".data")
+BASELINE_PATH = os.path.join(HERE, "baselines", "auth.json")
+SIZES = (1_000, 100_000, 1_000_000)
+OPERATIONS = ("validate_login", "username_exists", "create_user", "find_user_by_email", "update_user_password")
+PASSWORD = "secret123"
+CHUNK = 50_000
+HASHER = PasswordHasher(cost=2 ** 10 if HAVE_SCRYPT else 1_000)
+
+
+def populate(path, size):
+    conn = sqlite3.connect(path)
+    migrate(conn)
+    # Users that create_user added to the cache before runs used a copy
+    with conn:
+        conn.execute("DELETE FROM users WHERE username LIKE 'new%'")
+    existing = conn.execute("SELECT COUNT(*) FROM users WHERE username LIKE 'bench%'").fetchone()[0]
+    hashed = HASHER.hash(PASSWORD)
+    for start in range(existing, size, CHUNK):
+        with conn:
+            conn.executemany(
+                "INSERT INTO users (username, password, email, full_name) VALUES (?, ?, ?, ?)",
+                (
+                    (f"bench{i}", hashed, f"bench{i}@example.com", f"Bench User {i}")
+                    for i in range(start, min(start + CHUNK, size))
+                ),
+            )
+    conn.execute("ANALYZE")
+    conn.close()
+
+
+def percentile(samples, fraction):
+    return samples[min(len(samples) - 1, int(fraction * len(samples)))]
+
+
+def run_operation(store, name, size, iterations, rng):
+    if name == "validate_login":
+        call = lambda i: store.validate_login(f"bench{rng.randrange(size)}", PASSWORD)
+    elif name == "username_exists":
+        # Half hits, half misses
+        call = lambda i: store.username_exists(f"bench{rng.randrange(size * 2)}")
+    elif name == "create_user":
+        tag = f"{time.time_ns()}"
+        call = lambda i: store.create_user(f"New {i}", f"new{tag}_{i}@example.com", f"new{tag}_{i}", PASSWORD)
+    elif name == "find_user_by_email":
+        call = lambda i: store.find_user_by_email(f"bench{rng.randrange(size)}@example.com")
+    else:
+        call = lambda i: store.update_user_password(f"bench{rng.randrange(size)}", PASSWORD)
+
+    samples = []
+    started = time.perf_counter()
+    for i in range(iterations):
+        t0 = time.perf_counter()
+        call(i)
+        samples.append((time.perf_counter() - t0) * 1000)
+    elapsed = time.perf_counter() - started
+    samples.sort()
+    return {
+        "p50_ms": percentile(samples, 0.50),
+        "p95_ms": percentile(samples, 0.95),
+        "p99_ms": percentile(samples, 0.99),
+        "ops_per_sec": iterations / elapsed,
+    }
+
+
+def run_suite(sizes, iterations, seed):
+    os.makedirs(DATA_DIR, exist_ok=True)
+    results = {}
+    for size in sizes:
+        cached = os.path.join(DATA_DIR, f"auth_{size}_hashed.db")
+        start = time.perf_counter()
+        populate(cached, size)
+        print(f"\n{size} users ({cached}, ready in {time.perf_counter() - start:.1f} s)")
+        print(f"  {'operation':<22}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'ops/s':>11}")
+
+        with tempfile.TemporaryDirectory() as tmp:
+            # The operations write, so they run against a throwaway copy
+            path = os.path.join(tmp, os.path.basename(cached))
+            shutil.copyfile(cached, path)
+            store = SQLiteStorage(path, hasher=HASHER)
+            rng = random.Random(seed)
+            results[str(size)] = {}
+            for name in OPERATIONS:
+                r = run_operation(store, name, size, iterations, rng)
+                results[str(size)][name] = r
+                print(f"  {name:<22}{r['p50_ms']:>9.3f}{r['p95_ms']:>9.3f}{r['p99_ms']:>9.3f}{r['ops_per_sec']:>11.0f}")
+            store.close()
+    return results
+
+
+def mismatch(sizes, iterations, baseline):
+    """Why baseline can't be compared with this run, or None if it can."""
+    if baseline.get("iterations") != iterations:
+        return f"baseline ran {baseline.get('iterations')} iterations, this run {iterations}"
+    missing = [str(size) for size in sizes if str(size) not in baseline.get("results", {})]
+    if missing:
+        return f"baseline has no results for {', '.join(missing)} users"
+    return None
+
+
+def compare(results, baseline, tolerance):
+    regressions = []
+    for size, ops in results.items():
+        for name, r in ops.items():
+            base = baseline.get("results", {}).get(size, {}).get(name)
+            if not base:
+                continue
+            for metric in ("p50_ms", "p95_ms", "p99_ms"):
+                if r[metric] > base[metric] * (1 + tolerance):
+                    regressions.append((size, name, metric, base[metric], r[metric]))
+            if r["ops_per_sec"] < base["ops_per_sec"] * (1 - tolerance):
+                regressions.append((size, name, "ops_per_sec", base["ops_per_sec"], r["ops_per_sec"]))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Authentication data-path benchmark suite")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(SIZES))
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--compare", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="allowed slowdown before a metric counts as a regression")
+    args = parser.parse_args()
+
+    if args.compare:
+        # Checked up front, so a mismatched baseline doesn't cost a full run
+        if not os.path.exists(args.baseline):
+            print(f"no baseline at {args.baseline}; run with --save-baseline first")
+            return 2
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        problem = mismatch(args.sizes, args.iterations, baseline)
+        if problem:
+            print(f"cannot compare: {problem}; re-run with the baseline's settings or --save-baseline")
+            return 2
+
+    results = run_suite(args.sizes, args.iterations, args.seed)
+
+    if args.compare:
+        regressions = compare(results, baseline, args.tolerance)
+        print(f"\ncompared with baseline from {baseline.get('recorded_at', '?')} "
+              f"(tolerance {args.tolerance:.0%})")
+        for size, name, metric, before, after in regressions:
+            print(f"  REGRESSION {size} users {name} {metric}: {before:.3f} -> {after:.3f}")
+        if regressions:
+            return 1
+        print("  no regressions")
+
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "recorded_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+                    "host": platform.node(),
+                    "python": platform.python_version(),
+                    "sqlite": sqlite3.sqlite_version,
+                    "iterations": args.iterations,
+                    "results": results,
+                },
+                f,
+                indent=2,
+            )
+        print(f"\nbaseline saved to {args.baseline}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,147 @@
+"""
+Benchmark: online backup throughput and its cost to foreground queries.
+
+A generated database is backed up while two reader threads run the
+dashboard/schedule/messages queries and a writer posts a message every
+few milliseconds through DatabaseWriter. Foreground latency is measured
+with no backup running, during a one-step (unthrottled) backup, and
+during the default throttled backup.
+
+Run from the repository root:
+    python -m benchmarks.bench_backup [--scale 1.0] [--pages 256] [--sleep 0.01]
+"""
+import argparse
+import contextlib
+import io
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+import backups
+import datagen
+import dashboard_stats
+import messages
+import schedule
+from db_pool import ConnectionPool
+from db_writer import DatabaseWriter
+from migrate import migrate
+
+READERS = 2
+WRITE_EVERY = 0.005
+BASELINE_SECONDS = 2.0
+COUNTS = {"users": 2000, "doctors": 60, "patients": 100_000, "appointments": 400_000,
+          "operations": 20_000, "messages": 200_000}
+
+
+def build_database(path, scale):
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode = WAL")
+    migrate(conn)
+    counts = {table: max(1, int(n * scale)) for table, n in COUNTS.items()}
+    with contextlib.redirect_stdout(io.StringIO()):
+        datagen.generate(conn, counts, seed=7)
+    conn.close()
+
+
+class Foreground:
+    """Readers and a writer running until stopped, recording latencies in ms."""
+
+    def __init__(self, path):
+        self.pool = ConnectionPool(path)
+        self.writer = DatabaseWriter(self.pool)
+        self.reads = []
+        self.writes = []
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._threads = []
+
+    def _reader(self):
+        conn = self.pool.connect()
+        samples = []
+        queries = (dashboard_stats.dashboard_counts, schedule.appointments_today, messages.recent_messages)
+        i = 0
+        while not self._stop.is_set():
+            t0 = time.perf_counter()
+            queries[i % len(queries)](conn)
+            samples.append((time.perf_counter() - t0) * 1000)
+            i += 1
+            time.sleep(0.001)
+        with self._lock:
+            self.reads.extend(samples)
+
+    def _write(self):
+        samples = []
+        while not self._stop.is_set():
+            t0 = time.perf_counter()
+            self.writer.execute(messages.post_message, "frontdesk", "Patient at reception")
+            samples.append((time.perf_counter() - t0) * 1000)
+            time.sleep(WRITE_EVERY)
+        with self._lock:
+            self.writes.extend(samples)
+
+    def __enter__(self):
+        targets = [self._reader] * READERS + [self._write]
+        self._threads = [threading.Thread(target=t) for t in targets]
+        for t in self._threads:
+            t.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        for t in self._threads:
+            t.join()
+        self.writer.close()
+        self.pool.close_all()
+
+
+def pick(samples, fraction):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(fraction * len(samples)))] if samples else 0
+
+
+def report(label, fg, backup_report=None):
+    line = (f"{label:<11} reads p50 {pick(fg.reads, .5):6.2f} p99 {pick(fg.reads, .99):7.2f} "
+            f"max {pick(fg.reads, 1):7.2f} ms | writes p50 {pick(fg.writes, .5):6.2f} "
+            f"p99 {pick(fg.writes, .99):7.2f} max {pick(fg.writes, 1):7.2f} ms")
+    print(line)
+    if backup_report:
+        print(f"{'':<11} backup {backup_report['bytes'] / 1e6:.1f} MB in {backup_report['copy_seconds']:.2f}s "
+              f"({backup_report['mb_per_second']:.0f} MB/s), {backup_report['restarts']} restarts, "
+              f"integrity_check {backup_report['verify_seconds']:.2f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--scale", type=float, default=1.0, help="multiplier for the generated row counts")
+    parser.add_argument("--pages", type=int, default=backups.PAGES_PER_STEP)
+    parser.add_argument("--sleep", type=float, default=backups.STEP_SLEEP)
+    args = parser.parse_args()
+    logging.getLogger("nima.sql").setLevel(logging.ERROR)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "hospital.db")
+        build_database(path, args.scale)
+        dest = os.path.join(tmp, "backups")
+        print(f"database {os.path.getsize(path) / 1e6:.1f} MB\n")
+
+        with Foreground(path):
+            # Warm the page cache so the baseline isn't paying for it
+            time.sleep(BASELINE_SECONDS)
+        with Foreground(path) as fg:
+            time.sleep(BASELINE_SECONDS)
+        report("no backup", fg)
+
+        with Foreground(path) as fg:
+            result = backups.backup(path, dest, pages=-1, sleep=0)
+        report("one step", fg, result)
+
+        with Foreground(path) as fg:
+            result = backups.backup(path, dest, pages=args.pages, sleep=args.sleep)
+        report("throttled", fg, result)
+
+
+if __name__ == "__main__":
+    main()
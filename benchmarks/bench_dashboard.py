@@ -0,0 +1,116 @@
+"""
+Benchmark: dashboard counter queries against a large patients table.
+
+Prints the EXPLAIN QUERY PLAN of each counter query and its latency, then
+compares the indexed aggregates with the trigger-maintained summary row.
+
+Run from the repository root:
+    python -m benchmarks.bench_dashboard [--patients N] [--operations N]
+"""
+import argparse
+import os
+import random
+import sqlite3
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+import dashboard_stats
+from migrate import migrate
+from timestamps import TIMESTAMP_FORMAT
+
+HISTORY_DAYS = 730
+
+
+def timestamps(count, now, rng, future=False):
+    # Spread rows over the last two years (or the next month for
+    # scheduled rows) so "today" is a thin slice of the index
+    span = 30 * 86400 if future else HISTORY_DAYS * 86400
+    for _ in range(count):
+        offset = timedelta(seconds=rng.randrange(span))
+        yield (now + offset if future else now - offset).strftime(TIMESTAMP_FORMAT)
+
+
+def populate(conn, patients, operations, doctors=200, seed=1):
+    rng = random.Random(seed)
+    now = datetime.now(timezone.utc)
+    with conn:
+        conn.executemany(
+            "INSERT INTO doctors (full_name, specialty) VALUES (?, ?)",
+            ((f"Dr. Bench {i}", "General") for i in range(doctors)),
+        )
+        conn.executemany(
+            "INSERT INTO patients (full_name, created_at) VALUES (?, ?)",
+            ((f"Patient {i}", ts) for i, ts in enumerate(timestamps(patients, now, rng))),
+        )
+        conn.executemany(
+            """
+            INSERT INTO operations (patient_id, doctor_id, procedure, scheduled_at)
+            VALUES (?, ?, ?, ?)
+            """,
+            (
+                (rng.randrange(1, patients + 1), rng.randrange(1, doctors + 1), "Procedure", ts)
+                for ts in timestamps(operations, now - timedelta(days=15), rng, future=True)
+            ),
+        )
+    conn.execute("ANALYZE")
+
+
+def measure(conn, label, sql, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        value = conn.execute(sql).fetchone()[0]
+        samples.append((time.perf_counter() - start) * 1000)
+    print(f"{label}: {value}")
+    for line in dashboard_stats.explain(conn, sql):
+        print(f"    plan: {line}")
+    print(f"    median {statistics.median(samples):.3f} ms, max {max(samples):.3f} ms")
+
+
+def render_time(conn, counts, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        counts(conn)
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--patients", type=int, default=1_000_000)
+    parser.add_argument("--operations", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        conn = sqlite3.connect(os.path.join(tmp, "bench.db"))
+        migrate(conn)
+
+        start = time.perf_counter()
+        populate(conn, args.patients, args.operations)
+        print(f"populated {args.patients} patients in {time.perf_counter() - start:.1f} s\n")
+
+        measure(conn, "new patients today", dashboard_stats.NEW_PATIENTS_SQL, args.repeat)
+        measure(conn, "active doctors", dashboard_stats.DOCTORS_SQL, args.repeat)
+        measure(conn, "operations today", dashboard_stats.OPERATIONS_SQL, args.repeat)
+
+        print()
+        measure(conn, "summary row", dashboard_stats.SUMMARY_SQL, args.repeat)
+
+        print()
+        indexed = render_time(conn, dashboard_stats.dashboard_counts_indexed, args.repeat)
+        summary = render_time(conn, dashboard_stats.dashboard_counts, args.repeat)
+        print(f"dashboard counts, indexed aggregates  median {indexed:.3f} ms")
+        print(f"dashboard counts, summary table       median {summary:.3f} ms")
+
+        start = time.perf_counter()
+        mismatches = dashboard_stats.check_counters(conn)
+        print(f"consistency check: {len(mismatches)} mismatch(es) in {time.perf_counter() - start:.2f} s")
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
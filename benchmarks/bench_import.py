@@ -0,0 +1,96 @@
+"""
+Benchmark: bulk_import.import_users versus one create_user-style insert per row.
+
+The first runs use rows that carry one pre-hashed password, so they
+measure the database path rather than the KDF. The plain-text runs then
+import the same rows with a plain-text password each: once at
+bulk_import.IMPORT_COST, and on a small sample at the calibrated login
+cost, extrapolated to --rows, for comparison.
+
+Run from the repository root:
+    python -m benchmarks.bench_import [--rows N] [--calibrated-rows N]
+"""
+import argparse
+import csv
+import os
+import sqlite3
+import tempfile
+import time
+
+from bulk_import import FIELDS, INSERT_SQL, import_hasher, import_users, read_rows
+from migrate import migrate
+from passwords import PasswordHasher, default_hasher
+
+
+def write_csv(path, rows, password):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(FIELDS)
+        for i in range(rows):
+            writer.writerow((f"Staff {i}", f"staff{i}@example.com", f"staff{i}", password))
+
+
+def fresh_db(path):
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode = WAL")
+    migrate(conn)
+    return conn
+
+
+def row_by_row(conn, csv_path):
+    for _, record in read_rows(csv_path):
+        with conn:
+            conn.execute(INSERT_SQL, tuple(record[field] for field in FIELDS))
+
+
+def timed(label, rows, fn):
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<12} {rows:>8} rows  {elapsed:8.2f} s  {rows / elapsed:>10.0f} rows/s")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--calibrated-rows", type=int, default=200,
+                        help="plain-text rows timed at the calibrated cost")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = os.path.join(tmp, "staff.csv")
+        write_csv(csv_path, args.rows, default_hasher().hash("secret123"))
+
+        conn = fresh_db(os.path.join(tmp, "row.db"))
+        slow = timed("row-by-row", args.rows, lambda: row_by_row(conn, csv_path))
+        conn.close()
+
+        conn = fresh_db(os.path.join(tmp, "bulk.db"))
+        fast = timed("bulk", args.rows, lambda: import_users(conn, csv_path))
+        report = import_users(conn, csv_path)
+        print(f"re-import    {report.summary()}")
+        conn.close()
+
+        print(f"speed-up     {slow / fast:.1f}x")
+
+        plain_path = os.path.join(tmp, "plain.csv")
+        write_csv(plain_path, args.rows, "secret123")
+        conn = fresh_db(os.path.join(tmp, "plain.db"))
+        timed("plain", args.rows, lambda: import_users(conn, plain_path))
+        conn.close()
+
+        sample_path = os.path.join(tmp, "sample.csv")
+        write_csv(sample_path, args.calibrated_rows, "secret123")
+        conn = fresh_db(os.path.join(tmp, "calibrated.db"))
+        calibrated = import_hasher(PasswordHasher().cost)
+        elapsed = timed("calibrated", args.calibrated_rows,
+                        lambda: import_users(conn, sample_path, hasher=calibrated))
+        calibrated.shutdown()
+        conn.close()
+        print(f"             {args.rows} rows at the calibrated cost: "
+              f"~{elapsed / args.calibrated_rows * args.rows / 60:.0f} min")
+
+
+if __name__ == "__main__":
+    main()
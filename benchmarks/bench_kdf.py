@@ -0,0 +1,86 @@
+"""
+Benchmark: the login latency budget with calibrated password hashing.
+
+Reports the calibrated KDF cost, hash and verify latency, a full
+SQLiteStorage.validate_login split into lookup and KDF time, and how
+latency grows when several logins arrive at once and queue for the
+hashing pool.
+
+Run from the repository root:
+    python -m benchmarks.bench_kdf [--target-ms 100] [--budget-ms 250] [--logins N]
+"""
+import argparse
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from passwords import PasswordHasher
+from storage import SQLiteStorage
+
+
+def percentiles(samples):
+    samples = sorted(samples)
+    pick = lambda f: samples[min(len(samples) - 1, int(f * len(samples)))]
+    return pick(0.50), pick(0.95), pick(0.99)
+
+
+def timed_ms(fn, *args):
+    start = time.perf_counter()
+    fn(*args)
+    return (time.perf_counter() - start) * 1000
+
+
+def row(label, samples):
+    p50, p95, p99 = percentiles(samples)
+    print(f"  {label:<26}{p50:>9.1f}{p95:>9.1f}{p99:>9.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--target-ms", type=float, default=100)
+    parser.add_argument("--budget-ms", type=float, default=250,
+                        help="end-to-end login latency the UI can afford")
+    parser.add_argument("--logins", type=int, default=30)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16])
+    args = parser.parse_args()
+
+    hasher = PasswordHasher(target_ms=args.target_ms)
+    start = time.perf_counter()
+    cost = hasher.cost
+    print(f"calibrated {hasher.scheme} cost {cost} in {(time.perf_counter() - start) * 1000:.0f} ms "
+          f"(target {args.target_ms:.0f} ms)")
+
+    stored = hasher.hash("secret123")
+    print(f"\n  {'latency ms':<26}{'p50':>9}{'p95':>9}{'p99':>9}")
+    row("hash", [timed_ms(hasher.hash, "secret123") for _ in range(args.logins)])
+    row("verify", [timed_ms(hasher.verify, "secret123", stored) for _ in range(args.logins)])
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = SQLiteStorage(os.path.join(tmp, "bench.db"), hasher=hasher)
+        store.create_user("Bench User", "bench@example.com", "bench", "secret123")
+        conn = store.connect()
+        lookup = lambda: conn.execute("SELECT password FROM users WHERE username = ?", ("bench",)).fetchone()
+        row("user lookup", [timed_ms(lookup) for _ in range(args.logins)])
+        logins = [timed_ms(store.validate_login, "bench", "secret123") for _ in range(args.logins)]
+        row("validate_login", logins)
+        row("validate_login (no user)", [timed_ms(store.validate_login, "nobody", "x") for _ in range(args.logins)])
+
+        # A burst of logins shares the hashing pool; each waits its turn
+        for n in args.concurrency:
+            with ThreadPoolExecutor(max_workers=n) as callers:
+                samples = list(callers.map(
+                    lambda _: timed_ms(store.validate_login, "bench", "secret123"), range(max(n, args.logins))
+                ))
+            row(f"validate_login x{n} at once", samples)
+        store.close()
+    hasher.shutdown()
+
+    p95 = percentiles(logins)[1]
+    status = "within" if p95 <= args.budget_ms else "OVER"
+    print(f"\nlogin p95 {p95:.1f} ms of a {args.budget_ms:.0f} ms budget: {status} "
+          f"({args.budget_ms - p95:+.1f} ms headroom)")
+
+
+if __name__ == "__main__":
+    main()
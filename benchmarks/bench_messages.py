@@ -0,0 +1,76 @@
+"""
+Benchmark: message paging and FTS5 search against a large messages table.
+
+Run from the repository root:
+    python -m benchmarks.bench_messages [--rows N]
+"""
+import argparse
+import os
+import random
+import sqlite3
+import statistics
+import tempfile
+import time
+
+import messages
+from migrate import migrate
+
+WORDS = (
+    "patient report ready blood test appointment reschedule ward discharge "
+    "surgery theatre pharmacy insulin xray scan follow-up urgent meeting shift "
+    "handover consultant nurse bed admission referral allergy dressing"
+).split()
+
+
+def populate(conn, rows, seed=1):
+    rng = random.Random(seed)
+    senders = [f"staff{i}" for i in range(200)]
+    with conn:
+        conn.executemany(
+            "INSERT INTO messages (sender, body) VALUES (?, ?)",
+            (
+                (rng.choice(senders), " ".join(rng.choices(WORDS, k=rng.randint(4, 30))))
+                for _ in range(rows)
+            ),
+        )
+
+
+def measure(label, fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        rows = fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    print(f"{label:<28} {len(rows):>4} rows  median {statistics.median(samples):7.3f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        conn = sqlite3.connect(os.path.join(tmp, "bench.db"))
+        migrate(conn)
+
+        start = time.perf_counter()
+        populate(conn, args.rows)
+        print(f"populated {args.rows} messages in {time.perf_counter() - start:.1f} s\n")
+
+        first = messages.recent_messages(conn)
+        deep_cursor = args.rows // 2
+        measure("latest page", lambda: messages.recent_messages(conn), args.repeat)
+        measure("page below id N/2", lambda: messages.recent_messages(conn, deep_cursor), args.repeat)
+        measure("search 'insulin'", lambda: messages.search_messages(conn, "insulin"), args.repeat)
+        measure("search 'allergy insul'", lambda: messages.search_messages(conn, "allergy insul"), args.repeat)
+        measure(
+            "search next page",
+            lambda: messages.search_messages(conn, "insulin", first[-1][0]),
+            args.repeat,
+        )
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+Benchmark: notification badge and popup queries with a long history.
+
+Run from the repository root:
+    python -m benchmarks.bench_notifications [--history N]
+"""
+import argparse
+import os
+import sqlite3
+import statistics
+import tempfile
+import time
+
+import notifications
+from migrate import migrate
+
+
+def measure(label, fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    size = len(result) if isinstance(result, list) else result
+    print(f"{label:<30} -> {size!s:>6}  median {statistics.median(samples):7.3f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--history", type=int, default=100_000)
+    parser.add_argument("--unread", type=int, default=25)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        conn = sqlite3.connect(os.path.join(tmp, "bench.db"))
+        migrate(conn)
+        with conn:
+            conn.executemany(
+                "INSERT INTO notifications (username, message, read_at) VALUES ('admin', ?, CURRENT_TIMESTAMP)",
+                ((f"Old notification {i}",) for i in range(args.history)),
+            )
+        for i in range(args.unread):
+            notifications.add_notification(conn, "admin", f"New notification {i}")
+        newest = conn.execute("SELECT MAX(id) FROM notifications").fetchone()[0]
+        print(f"{args.history} read + {args.unread} unread notifications for admin\n")
+
+        measure("badge: unread_count", lambda: notifications.unread_count(conn, "admin"), args.repeat)
+        measure("popup: first fill", lambda: notifications.unread_since(conn, "admin"), args.repeat)
+        measure(
+            "popup: incremental (none new)",
+            lambda: notifications.unread_since(conn, "admin", newest),
+            args.repeat,
+        )
+        measure("add_notification", lambda: notifications.add_notification(conn, "admin", "x"), 50)
+        measure("clear all", lambda: notifications.mark_all_read(conn, "admin"), 1)
+        measure("badge after clear", lambda: notifications.unread_count(conn, "admin"), args.repeat)
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
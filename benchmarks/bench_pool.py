@@ -0,0 +1,79 @@
+"""
+Benchmark: per-call sqlite3.connect() versus the pooled connection.
+
+Run from the repository root:
+    python -m benchmarks.bench_pool [--iterations N]
+"""
+import argparse
+import os
+import sqlite3
+import tempfile
+import time
+
+from db_pool import ConnectionPool
+
+LOOKUP_SQL = "SELECT 1 FROM users WHERE username = ?"
+
+
+def make_database(path, users=1000):
+    with sqlite3.connect(path) as conn:
+        conn.execute(
+            """
+            CREATE TABLE users (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                username TEXT NOT NULL UNIQUE,
+                password TEXT NOT NULL,
+                email TEXT NOT NULL UNIQUE,
+                full_name TEXT NOT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+            """
+        )
+        conn.executemany(
+            "INSERT INTO users (username, password, email, full_name) VALUES (?, ?, ?, ?)",
+            ((f"user{i}", "secret", f"user{i}@example.com", f"User {i}") for i in range(users)),
+        )
+
+
+def per_call_lookup(db_path, username):
+    conn = sqlite3.connect(db_path)
+    try:
+        return conn.execute(LOOKUP_SQL, (username,)).fetchone() is not None
+    finally:
+        conn.close()
+
+
+def pooled_lookup(pool, username):
+    with pool.connect() as conn:
+        return conn.execute(LOOKUP_SQL, (username,)).fetchone() is not None
+
+
+def timed(label, iterations, fn):
+    start = time.perf_counter()
+    for i in range(iterations):
+        fn(f"user{i % 1000}")
+    elapsed = time.perf_counter() - start
+    per_call_us = elapsed / iterations * 1e6
+    print(f"{label:<12} {iterations:>8} calls  {elapsed:8.3f} s  {per_call_us:8.1f} us/call")
+    return per_call_us
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=20000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "bench.db")
+        make_database(db_path)
+
+        pool = ConnectionPool(db_path)
+        per_call = timed("per-call", args.iterations, lambda u: per_call_lookup(db_path, u))
+        pooled = timed("pooled", args.iterations, lambda u: pooled_lookup(pool, u))
+        print(f"speed-up     {per_call / pooled:.1f}x")
+        print(f"pool stats   {pool.stats()}")
+        pool.close_all()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Benchmark: schedule range queries against a large appointments table.
+
+Run from the repository root:
+    python -m benchmarks.bench_schedule [--rows N] [--doctors N]
+"""
+import argparse
+import os
+import random
+import sqlite3
+import statistics
+import tempfile
+import time
+from datetime import timedelta
+
+import dashboard_stats
+import schedule
+from migrate import migrate
+from timestamps import TIMESTAMP_FORMAT
+
+SLOT_MINUTES = (15, 30, 60, 120, 240)
+
+
+def populate(conn, rows, doctors, seed=1):
+    rng = random.Random(seed)
+    # Appointments spread over roughly two years either side of today
+    origin = schedule.utc_now().replace(minute=0, second=0, microsecond=0) - timedelta(days=365)
+    span_quarters = 730 * 24 * 4
+
+    def appointments():
+        for _ in range(rows):
+            start = origin + timedelta(minutes=15 * rng.randrange(span_quarters))
+            end = start + timedelta(minutes=rng.choice(SLOT_MINUTES))
+            yield (
+                rng.randrange(1, doctors + 1),
+                start.strftime(TIMESTAMP_FORMAT),
+                end.strftime(TIMESTAMP_FORMAT),
+                "Consultation",
+            )
+
+    with conn:
+        conn.executemany(
+            "INSERT INTO doctors (full_name, specialty) VALUES (?, ?)",
+            ((f"Dr. Bench {i}", "General") for i in range(doctors)),
+        )
+        conn.executemany(
+            "INSERT INTO appointments (doctor_id, starts_at, ends_at, notes) VALUES (?, ?, ?, ?)",
+            appointments(),
+        )
+    conn.execute("ANALYZE")
+
+
+def measure(label, fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        rows = fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    print(
+        f"{label:<22} {len(rows):>6} rows  "
+        f"median {statistics.median(samples):7.3f} ms  max {max(samples):7.3f} ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=5_000_000)
+    parser.add_argument("--doctors", type=int, default=300)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        conn = sqlite3.connect(os.path.join(tmp, "bench.db"))
+        migrate(conn)
+
+        start = time.perf_counter()
+        populate(conn, args.rows, args.doctors)
+        print(f"populated {args.rows} appointments in {time.perf_counter() - start:.1f} s\n")
+
+        day_start, day_end = schedule.day_bounds()
+        week_start, week_end = schedule.week_bounds()
+        params = {
+            "start": day_start.strftime(TIMESTAMP_FORMAT),
+            "end": day_end.strftime(TIMESTAMP_FORMAT),
+            "doctor_id": 7,
+        }
+        for line in dashboard_stats.explain(conn, schedule.RANGE_SQL, params):
+            print(f"today plan:       {line}")
+        for line in dashboard_stats.explain(conn, schedule.DOCTOR_RANGE_SQL, params):
+            print(f"doctor week plan: {line}")
+        print()
+
+        measure("today, all doctors", lambda: schedule.appointments_today(conn), args.repeat)
+        measure("this week, one doctor", lambda: schedule.doctor_week(conn, 7), args.repeat)
+        measure(
+            "this week, all doctors",
+            lambda: schedule.appointments_between(conn, week_start, week_end),
+            max(1, args.repeat // 10),
+        )
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Benchmark: typeahead latency per search source with a million indexed records.
+
+Run from the repository root:
+    python -m benchmarks.bench_search [--patients N] [--messages N]
+"""
+import argparse
+import os
+import random
+import sqlite3
+import statistics
+import tempfile
+import time
+
+import global_search
+from migrate import migrate
+
+FIRST_NAMES = "Ram Sita Hari Gita Krishna Maya Bikash Anita Suman Rita Nabin Puja Sagar Asha".split()
+LAST_NAMES = "Koirala Sharma Thapa Singh Gurung Shrestha Rai Tamang Karki Bhattarai Adhikari".split()
+TYPED = ("k", "ko", "koi", "koir", "sh", "shre", "ram k", "gita sh", "zzz")
+
+
+def name(rng):
+    return f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+
+
+def populate(conn, patients, message_rows, users=5000, doctors=300, seed=1):
+    rng = random.Random(seed)
+    with conn:
+        conn.executemany(
+            "INSERT INTO users (username, password, email, full_name) VALUES (?, ?, ?, ?)",
+            ((f"staff{i}", "secret", f"staff{i}@example.com", name(rng)) for i in range(users)),
+        )
+        conn.executemany(
+            "INSERT INTO doctors (full_name, specialty) VALUES (?, ?)",
+            ((f"Dr. {name(rng)}", "General") for _ in range(doctors)),
+        )
+        conn.executemany(
+            "INSERT INTO patients (full_name, phone) VALUES (?, ?)",
+            ((name(rng), f"98{rng.randrange(10**8):08d}") for _ in range(patients)),
+        )
+        conn.executemany(
+            "INSERT INTO messages (sender, body) VALUES (?, ?)",
+            ((f"staff{rng.randrange(users)}", f"Report ready for {name(rng)}") for _ in range(message_rows)),
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--patients", type=int, default=1_000_000)
+    parser.add_argument("--messages", type=int, default=200_000)
+    parser.add_argument("--repeat", type=int, default=30)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        conn = sqlite3.connect(os.path.join(tmp, "bench.db"))
+        migrate(conn)
+
+        start = time.perf_counter()
+        populate(conn, args.patients, args.messages)
+        print(f"indexed {args.patients} patients, {args.messages} messages "
+              f"in {time.perf_counter() - start:.1f} s\n")
+
+        print(f"{'typed':<10}" + "".join(f"{s:>12}" for s in global_search.SOURCES) + f"{'all':>12}")
+        for text in TYPED:
+            per_source = {}
+            for source in global_search.SOURCES:
+                samples = []
+                for _ in range(args.repeat):
+                    t0 = time.perf_counter()
+                    global_search.search_source(conn, source, text)
+                    samples.append((time.perf_counter() - t0) * 1000)
+                per_source[source] = statistics.median(samples)
+            cells = "".join(f"{per_source[s]:>9.3f} ms" for s in global_search.SOURCES)
+            print(f"{text!r:<10}{cells}{sum(per_source.values()):>9.3f} ms")
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Benchmark: warm-start schema check, legacy init_database versus migrate().
+
+Run from the repository root:
+    python -m benchmarks.bench_startup [--iterations N]
+"""
+import argparse
+import os
+import sqlite3
+import tempfile
+import time
+
+from migrate import migrate
+
+
+def legacy_init_database(conn):
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username TEXT NOT NULL UNIQUE,
+            password TEXT NOT NULL,
+            email TEXT NOT NULL UNIQUE,
+            full_name TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """
+    )
+    cursor = conn.execute("SELECT 1 FROM users WHERE username = ?", ("admin",))
+    if cursor.fetchone() is None:
+        conn.execute(
+            "INSERT INTO users (username, password, email, full_name) VALUES (?, ?, ?, ?)",
+            ("admin", "password", "admin@nima-hospital.com", "Administrator"),
+        )
+    conn.commit()
+
+
+def timed(label, iterations, db_path, init):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        conn = sqlite3.connect(db_path)
+        init(conn)
+        conn.close()
+    elapsed = time.perf_counter() - start
+    per_start_us = elapsed / iterations * 1e6
+    print(f"{label:<16} {per_start_us:8.1f} us per start")
+    return per_start_us
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "bench.db")
+        with sqlite3.connect(db_path) as conn:
+            migrate(conn)
+
+        legacy = timed("init_database", args.iterations, db_path, legacy_init_database)
+        warm = timed("migrate (warm)", args.iterations, db_path, migrate)
+        print(f"speed-up         {legacy / warm:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
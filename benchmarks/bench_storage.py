@@ -0,0 +1,50 @@
+"""
+Benchmark: the register -> login -> reset flow against each storage backend.
+
+Run from the repository root:
+    python -m benchmarks.bench_storage [--flows N]
+
+Uses a small fixed KDF cost so the backends, not the hashing, are compared.
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from passwords import HAVE_SCRYPT, PasswordHasher
+from storage import MemoryStorage, SQLiteStorage
+
+
+def flow(store, n):
+    username = f"user{n}"
+    email = f"{username}@example.com"
+    store.create_user(f"User {n}", email, username, "secret1")
+    store.validate_login(username, "secret1")
+    found = store.find_user_by_email(email)
+    store.update_user_password(found, "secret2")
+    store.validate_login(username, "secret2")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--flows", type=int, default=500)
+    args = parser.parse_args()
+
+    hasher = PasswordHasher(cost=2 ** 10 if HAVE_SCRYPT else 1_000)
+    with tempfile.TemporaryDirectory() as tmp:
+        backends = {
+            "memory": MemoryStorage(hasher=hasher),
+            "sqlite :memory:": SQLiteStorage(":memory:", hasher=hasher),
+            "sqlite file": SQLiteStorage(os.path.join(tmp, "bench.db"), hasher=hasher),
+        }
+        for name, store in backends.items():
+            start = time.perf_counter()
+            for n in range(args.flows):
+                flow(store, n)
+            elapsed = time.perf_counter() - start
+            print(f"{name:<16} {args.flows / elapsed:>10.0f} flows/s  {elapsed / args.flows * 1e6:8.1f} us/flow")
+            store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+Benchmark: concurrent writers, each on its own connection versus one DatabaseWriter.
+
+1, 4 and 16 threads each post messages and notifications as fast as they
+can. "direct" gives every thread its own connection and commits each write
+itself, contending for the write lock through busy_timeout; "writer" sends
+the same writes to one DatabaseWriter, which group-commits whatever is
+queued. Reports write throughput, tail latency and "database is locked"
+failures.
+
+Run from the repository root:
+    python -m benchmarks.bench_writer [--writes 500] [--busy-timeout-ms 5000] [--journal wal]
+"""
+import argparse
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+import messages
+import notifications
+from db_pool import ConnectionPool
+from db_writer import DatabaseWriter
+from migrate import migrate
+
+THREADS = (1, 4, 16)
+
+
+def write(call, n, i):
+    if i % 2:
+        return call(notifications.add_notification, f"user{n}", f"Notification {i}")
+    return call(messages.post_message, f"user{n}", f"Message {i} from writer {n}")
+
+
+def run(threads, writes, make_caller):
+    latencies = []
+    errors = []
+    lock = threading.Lock()
+    barrier = threading.Barrier(threads)
+
+    def worker(n):
+        call, close = make_caller()
+        samples = []
+        failures = []
+        barrier.wait()
+        for i in range(writes):
+            t0 = time.perf_counter()
+            try:
+                write(call, n, i)
+            except sqlite3.OperationalError as e:
+                failures.append(str(e))
+                continue
+            samples.append((time.perf_counter() - t0) * 1000)
+        close()
+        with lock:
+            latencies.extend(samples)
+            errors.extend(failures)
+
+    workers = [threading.Thread(target=worker, args=(n,)) for n in range(threads)]
+    start = time.perf_counter()
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+    return sorted(latencies), time.perf_counter() - start, errors
+
+
+def report(label, threads, latencies, elapsed, errors):
+    pick = lambda f: latencies[min(len(latencies) - 1, int(f * len(latencies)))] if latencies else 0
+    print(f"{label:<7} {threads:>3} writers {len(latencies) / elapsed:>9.0f} writes/s  "
+          f"p50 {pick(0.50):7.2f} ms  p99 {pick(0.99):7.2f} ms  max {pick(1.0):8.2f} ms  "
+          f"locked {len(errors)}")
+
+
+def fresh_database(tmp, name, journal):
+    path = os.path.join(tmp, f"{name}.db")
+    conn = sqlite3.connect(path)
+    conn.execute(f"PRAGMA journal_mode = {journal}")
+    migrate(conn)
+    conn.close()
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--writes", type=int, default=500, help="writes per thread")
+    parser.add_argument("--busy-timeout-ms", type=int, default=5000)
+    parser.add_argument("--journal", choices=("wal", "delete"), default="wal")
+    args = parser.parse_args()
+    # Lock waits trip the slow-query log constantly
+    logging.getLogger("nima.sql").setLevel(logging.ERROR)
+    wal = args.journal == "wal"
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for threads in THREADS:
+            path = fresh_database(tmp, f"direct{threads}", args.journal)
+
+            def direct_caller():
+                conn = sqlite3.connect(path, timeout=args.busy_timeout_ms / 1000)
+                if wal:
+                    conn.execute("PRAGMA synchronous = NORMAL")
+                return (lambda fn, *a: fn(conn, *a)), conn.close
+
+            report("direct", threads, *run(threads, args.writes, direct_caller))
+
+            path = fresh_database(tmp, f"writer{threads}", args.journal)
+            pool = ConnectionPool(path, wal=wal)
+            writer = DatabaseWriter(pool, busy_timeout_ms=args.busy_timeout_ms)
+            report("writer", threads, *run(threads, args.writes, lambda: (writer.execute, lambda: None)))
+            stats = writer.stats()
+            print(f"{'':<7} {stats['batches']} commits, {stats['mean_batch']:.1f} writes per commit, "
+                  f"{stats['busy_retries']} busy retries")
+            writer.close()
+            pool.close_all()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+"""
+Bulk Import - stream staff accounts from CSV or JSONL into the users table
+
+Usage (headless):
+    python bulk_import.py staff.csv [--db hospital.db] [--chunk-size 5000] [--cost N]
+
+CSV files need a header row; JSONL files hold one object per line. Both
+use the columns full_name, email, username and password. Plain-text
+passwords are hashed on a KDF pool with one worker per CPU before they
+are written; values that are already hashes (see passwords.py) are
+stored as given.
+
+Speed depends on which passwords the file carries:
+
+- Pre-hashed (the fast route): rows are only validated and inserted,
+  about 15,000 rows/s, so 100k accounts take seconds. Export the hashes
+  from the old system in passwords.py's format, or hash them ahead of
+  time with passwords.PasswordHasher.
+- Plain text: every row goes through the KDF. Even at IMPORT_COST that
+  is about 280 rows/s per CPU, so 100k rows take around 6 minutes on
+  one core. At the calibrated login cost it would be ~60 ms a row and
+  hours in all, which is why imports use IMPORT_COST (``--cost`` to
+  change it). verify() reports those hashes as weaker than the
+  calibrated cost, so each account is rehashed at full strength on its
+  first login.
+
+(Figures from benchmarks/bench_import.py on a single core.)
+"""
+import argparse
+import csv
+import gzip
+import json
+import os
+import sqlite3
+
+from migrate import migrate
+from passwords import HAVE_SCRYPT, PasswordHasher, is_hashed
+
+FIELDS = ("full_name", "email", "username", "password")
+CHUNK_SIZE = 5000
+MIN_PASSWORD_LENGTH = 6
+# scrypt N or PBKDF2 iterations for imported plain-text passwords
+IMPORT_COST = 2 ** 10 if HAVE_SCRYPT else 1_000
+
+INSERT_SQL = "INSERT INTO users (full_name, email, username, password) VALUES (?, ?, ?, ?)"
+
+
+class ImportReport:
+    def __init__(self):
+        self.inserted = 0
+        self.conflicts = []   # (line number, username, error message)
+        self.invalid = []     # (line number, reason)
+
+    def summary(self):
+        return (
+            f"inserted {self.inserted}, "
+            f"conflicts {len(self.conflicts)}, "
+            f"invalid {len(self.invalid)}"
+        )
+
+
+def open_text(path):
+    if path.endswith(".gz"):
+        return gzip.open(path, "rt", encoding="utf-8", newline="")
+    return open(path, "r", encoding="utf-8", newline="")
+
+
+def read_rows(path):
+    # Yields (line number, dict) without reading the whole file
+    name = path[:-3] if path.endswith(".gz") else path
+    with open_text(path) as f:
+        if name.endswith((".jsonl", ".ndjson")):
+            for line_no, line in enumerate(f, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    yield line_no, json.loads(line)
+                except json.JSONDecodeError as e:
+                    yield line_no, e
+        else:
+            reader = csv.DictReader(f)
+            for record in reader:
+                yield reader.line_num, record
+
+
+def validate_row(record):
+    if not isinstance(record, dict):
+        return None, f"unreadable row: {record}"
+    values = tuple(str(record.get(field) or "").strip() for field in FIELDS)
+    full_name, email, username, password = values
+    missing = [field for field, value in zip(FIELDS, values) if not value]
+    if missing:
+        return None, "missing " + ", ".join(missing)
+    if "@" not in email:
+        return None, f"invalid email {email!r}"
+    if not is_hashed(password) and len(password) < MIN_PASSWORD_LENGTH:
+        return None, f"password shorter than {MIN_PASSWORD_LENGTH} characters"
+    return values, None
+
+
+def hash_chunk(chunk, hasher):
+    plain = [i for i, (_, values) in enumerate(chunk) if not is_hashed(values[3])]
+    hashes = hasher.hash_many([chunk[i][1][3] for i in plain])
+    for i, hashed in zip(plain, hashes):
+        line_no, values = chunk[i]
+        chunk[i] = (line_no, values[:3] + (hashed,))
+
+
+def import_hasher(cost=IMPORT_COST):
+    return PasswordHasher(cost=cost)
+
+
+def insert_chunk(conn, chunk, report, hasher):
+    hash_chunk(chunk, hasher)
+    rows = [values for _, values in chunk]
+    try:
+        with conn:
+            conn.executemany(INSERT_SQL, rows)
+        report.inserted += len(rows)
+        return
+    except sqlite3.IntegrityError:
+        pass
+
+    # Somewhere in the chunk is a duplicate; redo it row by row in one
+    # transaction so the good rows still land and each clash is reported
+    with conn:
+        for line_no, values in chunk:
+            try:
+                conn.execute(INSERT_SQL, values)
+                report.inserted += 1
+            except sqlite3.IntegrityError as e:
+                report.conflicts.append((line_no, values[2], str(e)))
+
+
+def import_users(conn, path, chunk_size=CHUNK_SIZE, hasher=None):
+    report = ImportReport()
+    own_hasher = hasher is None
+    if own_hasher:
+        hasher = import_hasher()
+    chunk = []
+    try:
+        for line_no, record in read_rows(path):
+            values, error = validate_row(record)
+            if error:
+                report.invalid.append((line_no, error))
+                continue
+            chunk.append((line_no, values))
+            if len(chunk) >= chunk_size:
+                insert_chunk(conn, chunk, report, hasher)
+                chunk = []
+        if chunk:
+            insert_chunk(conn, chunk, report, hasher)
+    finally:
+        if own_hasher:
+            hasher.shutdown()
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Bulk import staff accounts into hospital.db",
+        epilog="Pre-hashed passwords import at ~15,000 rows/s (100k rows in seconds). "
+               "Plain-text passwords are hashed on import at ~280 rows/s per CPU "
+               "(100k rows take ~6 minutes on one core); pre-hash them for large imports.",
+    )
+    parser.add_argument("path", help="CSV or JSONL file (optionally .gz)")
+    parser.add_argument(
+        "--db",
+        default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "hospital.db"),
+    )
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    parser.add_argument(
+        "--cost", type=int, default=IMPORT_COST,
+        help="KDF cost for plain-text passwords (scrypt N or PBKDF2 iterations); "
+             "below the calibrated cost, accounts are rehashed at their first login",
+    )
+    args = parser.parse_args()
+
+    conn = sqlite3.connect(args.db)
+    hasher = import_hasher(args.cost)
+    try:
+        migrate(conn)
+        report = import_users(conn, args.path, args.chunk_size, hasher)
+    finally:
+        hasher.shutdown()
+        conn.close()
+
+    for line_no, username, message in report.conflicts:
+        print(f"line {line_no}: {username}: {message}")
+    for line_no, reason in report.invalid:
+        print(f"line {line_no}: {reason}")
+    print(report.summary())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""
+Change Feed - keeps the visible page current while other terminals write
+
+Triggers (migration 0012) bump a per-table version in change_counters on
+every insert, update and delete. The feed polls on a worker: locally it
+first reads ``PRAGMA data_version`` on its own connection, which only
+moves when some other connection has committed, so an idle database
+costs one pragma per poll; only then are the counters read and compared
+with the last poll. Against the API service the counters are read
+directly (identical requests from many terminals are coalesced there).
+
+The page shown in ``self.content`` registers which tables it renders and
+a callback. Changed tables are collected and handed to that callback at
+most once per frame; the page fetches only what is newer than what it
+last drew (or diffs its small visible window) and hands the result back
+through ``paint``, which applies every queued update in one frame.
+"""
+import sqlite3
+import threading
+
+POLL_MS = 1000
+FRAME_MS = 16
+
+
+def change_versions(conn):
+    return dict(conn.execute("SELECT tbl, version FROM change_counters").fetchall())
+
+
+class ChangeFeed:
+    def __init__(self, app, poll_ms=POLL_MS, frame_ms=FRAME_MS):
+        self.app = app
+        self.poll_ms = poll_ms
+        self.frame_ms = frame_ms
+        self.versions = None
+        self.data_version = None
+        self._conn = None
+        self._lock = threading.Lock()
+        self._watch = None   # (tables, on_change) for the visible page
+        self._changed = set()
+        self._paints = []
+        self._future = None
+        self._frame_id = None
+        self._after_id = None
+
+    # ------------- POLLING (worker thread) -------------
+    def _local_versions(self):
+        if self._conn is None:
+            # Never written through, so every commit elsewhere moves data_version
+            pool = self.app.db_pool
+            self._conn = sqlite3.connect(pool.db_path, uri=pool.uri, check_same_thread=False)
+        data_version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+        if data_version == self.data_version:
+            return None
+        self.data_version = data_version
+        return change_versions(self._conn)
+
+    def poll(self):
+        """Returns the set of tables changed since the previous poll."""
+        with self._lock:
+            if self.app.api is None:
+                versions = self._local_versions()
+            else:
+                versions = self.app.query("change_versions")
+            if versions is None:
+                return set()
+            previous, self.versions = self.versions, versions
+            if previous is None:
+                return set()
+            return {table for table, version in versions.items() if previous.get(table) != version}
+
+    # ------------- TK THREAD -------------
+    def start(self):
+        self._after_id = self.app.after(self.poll_ms, self._tick)
+
+    def _tick(self):
+        # A poll dropped by repo.cancel_all() is done too, so this never sticks
+        if self._watch is not None and (self._future is None or self._future.done()):
+            self._future = self.app.repo.submit(self.poll, on_success=self._deliver)
+        self._after_id = self.app.after(self.poll_ms, self._tick)
+
+    def _deliver(self, changed):
+        if self._watch is None:
+            return
+        changed &= self._watch[0]
+        if changed:
+            self._changed |= changed
+            self._schedule_frame()
+
+    def watch(self, tables, on_change):
+        """Make on_change(changed_tables) the visible page's refresh hook."""
+        self._watch = (set(tables), on_change)
+        self._changed = set()
+        self._paints = []
+
+    def unwatch(self):
+        self._watch = None
+        self._changed = set()
+        self._paints = []
+
+    def paint(self, fn, *args):
+        """Queue a widget update for the next frame."""
+        self._paints.append((fn, args))
+        self._schedule_frame()
+
+    def _schedule_frame(self):
+        if self._frame_id is None:
+            self._frame_id = self.app.after(self.frame_ms, self._frame)
+
+    def _frame(self):
+        self._frame_id = None
+        paints, self._paints = self._paints, []
+        changed, self._changed = self._changed, set()
+        for fn, args in paints:
+            fn(*args)
+        if changed and self._watch is not None:
+            self._watch[1](changed)
+
+    def stop(self):
+        for after_id in (self._after_id, self._frame_id):
+            if after_id is not None:
+                self.app.after_cancel(after_id)
+        self._after_id = self._frame_id = None
+        self.unwatch()
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+if __name__ == "__main__":
+    print("change_feed.py is a support module. Run main_app.py for the full application.")
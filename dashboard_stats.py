@@ -0,0 +1,116 @@
+"""
+Dashboard Stats - counters behind the dashboard cards
+
+Usage (headless consistency check):
+    python dashboard_stats.py [path/to/hospital.db] [--repair]
+"""
+import argparse
+import os
+import sqlite3
+
+# The dashboard reads the trigger-maintained stat_counters table
+# (migrations 0004, 0014): three primary-key lookups in a single row.
+# Daily buckets are local calendar days
+SUMMARY_SQL = """
+    SELECT
+        (SELECT value FROM stat_counters
+         WHERE metric = 'patients' AND bucket = date('now', 'localtime')),
+        (SELECT value FROM stat_counters WHERE metric = 'doctors' AND bucket = ''),
+        (SELECT value FROM stat_counters
+         WHERE metric = 'operations' AND bucket = date('now', 'localtime'))
+"""
+
+# Indexed aggregates over the base tables, used to verify the counters.
+# Each is answered from an index range: created_at / scheduled_at bounded
+# to the current local day (as UTC bounds), and the active flag for doctors.
+NEW_PATIENTS_SQL = """
+    SELECT COUNT(*) FROM patients
+    WHERE created_at >= datetime('now', 'localtime', 'start of day', 'utc')
+"""
+DOCTORS_SQL = "SELECT COUNT(*) FROM doctors WHERE active = 1"
+OPERATIONS_SQL = """
+    SELECT COUNT(*) FROM operations
+    WHERE scheduled_at >= datetime('now', 'localtime', 'start of day', 'utc')
+      AND scheduled_at < datetime('now', 'localtime', 'start of day', '+1 day', 'utc')
+"""
+
+REBUILD_SQL = """
+    SELECT 'doctors', '', COUNT(*) FROM doctors WHERE active
+    UNION ALL
+    SELECT 'patients', date(created_at, 'localtime'), COUNT(*) FROM patients GROUP BY 2
+    UNION ALL
+    SELECT 'operations', date(scheduled_at, 'localtime'), COUNT(*) FROM operations GROUP BY 2
+"""
+
+
+def dashboard_counts(conn):
+    new_patients, doctors, operations = conn.execute(SUMMARY_SQL).fetchone()
+    return {
+        "new_patients": new_patients or 0,
+        "doctors": doctors or 0,
+        "operations": operations or 0,
+    }
+
+
+def dashboard_counts_indexed(conn):
+    return {
+        "new_patients": conn.execute(NEW_PATIENTS_SQL).fetchone()[0],
+        "doctors": conn.execute(DOCTORS_SQL).fetchone()[0],
+        "operations": conn.execute(OPERATIONS_SQL).fetchone()[0],
+    }
+
+
+def explain(conn, sql, params=()):
+    return [row[-1] for row in conn.execute("EXPLAIN QUERY PLAN " + sql, params)]
+
+
+# ------------- CONSISTENCY CHECK -------------
+def check_counters(conn, repair=False):
+    """Recount every metric from the base tables and compare.
+
+    Returns a list of (metric, bucket, stored, actual) mismatches. Empty
+    buckets are ignored on both sides. With repair=True the counters
+    table is rewritten from the recount in one transaction.
+    """
+    stored = {
+        (metric, bucket): value
+        for metric, bucket, value in conn.execute("SELECT metric, bucket, value FROM stat_counters")
+        if value
+    }
+    actual = {
+        (metric, bucket): value
+        for metric, bucket, value in conn.execute(REBUILD_SQL)
+        if value
+    }
+
+    mismatches = [
+        (metric, bucket, stored.get((metric, bucket), 0), actual.get((metric, bucket), 0))
+        for metric, bucket in sorted(stored.keys() | actual.keys())
+        if stored.get((metric, bucket), 0) != actual.get((metric, bucket), 0)
+    ]
+
+    if repair and mismatches:
+        with conn:
+            conn.execute("DELETE FROM stat_counters")
+            conn.execute("INSERT INTO stat_counters (metric, bucket, value) " + REBUILD_SQL)
+    return mismatches
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Verify the dashboard counters in hospital.db")
+    parser.add_argument(
+        "db",
+        nargs="?",
+        default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "hospital.db"),
+    )
+    parser.add_argument("--repair", action="store_true", help="rebuild the counters on mismatch")
+    args = parser.parse_args()
+
+    with sqlite3.connect(args.db) as conn:
+        mismatches = check_counters(conn, repair=args.repair)
+    for metric, bucket, stored, actual in mismatches:
+        print(f"{metric} [{bucket or 'total'}]: stored {stored}, actual {actual}")
+    if not mismatches:
+        print("counters are consistent")
+    elif args.repair:
+        print(f"rebuilt counters ({len(mismatches)} mismatch(es) fixed)")
@@ -0,0 +1,301 @@
+"""
+Datagen - deterministic synthetic hospital data for load testing
+
+Usage (headless):
+    python datagen.py --db load.db --total 10000000 [--seed 42] [--end 2026-10-01]
+    python datagen.py --db load.db --patients 200000 --appointments 1000000
+
+The same --seed and --end always produce the same rows (bar the salt of
+the one password hash all users share). Distributions
+are skewed the way a real hospital is: a few doctors carry most of the
+appointments (Zipf), visits cluster in morning and afternoon peaks, and
+message length has a long tail (log-normal).
+
+With --fast-load (the default) the FTS and counter triggers on the loaded
+tables are dropped for the load and the derived tables are rebuilt once at
+the end, which is much cheaper than maintaining them row by row.
+"""
+import argparse
+import itertools
+import os
+import random
+import sqlite3
+import time
+from datetime import datetime, timedelta
+
+import dashboard_stats
+from migrate import migrate
+from passwords import default_hasher
+from schedule import to_utc
+from timestamps import TIMESTAMP_FORMAT
+
+CHUNK = 50_000
+# Every generated user logs in with this; one hash is shared by all rows
+PASSWORD = "password123"
+
+# Share of --total given to each table
+PROPORTIONS = {
+    "users": 0.01,
+    "doctors": 0.0005,
+    "patients": 0.20,
+    "appointments": 0.50,
+    "operations": 0.0395,
+    "messages": 0.25,
+}
+LOADED_TABLES = ("users", "doctors", "patients", "appointments", "operations", "messages")
+
+FIRST_NAMES = (
+    "Ram Sita Hari Gita Krishna Maya Bikash Anita Suman Rita Nabin Puja Sagar Asha "
+    "Rajesh Sunita Dipak Kamala Prakash Sarita Manish Nirjala Safalta Soniya Siddharth"
+).split()
+LAST_NAMES = (
+    "Koirala Sharma Thapa Singh Gurung Shrestha Rai Tamang Karki Bhattarai Adhikari "
+    "Khanal Gautam Bayak Pandey Poudel Magar Joshi Basnet Acharya"
+).split()
+SPECIALTIES = (
+    "General Medicine", "Surgery", "Pediatrics", "Cardiology", "Orthopedics",
+    "Gynecology", "Neurology", "Dermatology", "Radiology", "Emergency",
+)
+PROCEDURES = ("Appendectomy", "Cataract surgery", "C-section", "Knee replacement", "Angioplasty", "Biopsy")
+NOTES = ("Consultation", "Follow-up", "Routine check", "Lab review", "Vaccination", "Post-op review")
+WORDS = (
+    "patient report ready blood test appointment reschedule ward discharge surgery "
+    "theatre pharmacy insulin xray scan follow-up urgent meeting shift handover "
+    "consultant nurse bed admission referral allergy dressing please confirm today "
+    "tomorrow morning evening room lab results pending approved"
+).split()
+
+# Relative visit volume per local hour of day: morning and afternoon peaks
+HOUR_WEIGHTS = [0, 0, 0, 0, 0, 0, 1, 4, 10, 14, 12, 9, 5, 6, 11, 12, 9, 5, 3, 2, 1, 1, 0, 0]
+DURATION_MINUTES = (15, 30, 45, 60, 120)
+DURATION_WEIGHTS = (30, 40, 10, 15, 5)
+
+
+class Generator:
+    def __init__(self, seed, end, history_days):
+        self.rng = random.Random(seed)
+        self.password_hash = default_hasher().hash(PASSWORD)
+        self.end = end
+        self.history_days = history_days
+        self.hour_cum = list(itertools.accumulate(HOUR_WEIGHTS))
+        self.duration_cum = list(itertools.accumulate(DURATION_WEIGHTS))
+
+    def name(self):
+        return f"{self.rng.choice(FIRST_NAMES)} {self.rng.choice(LAST_NAMES)}"
+
+    def zipf_cum(self, n, s=1.1):
+        return list(itertools.accumulate(1 / (rank ** s) for rank in range(1, n + 1)))
+
+    def moment(self, days_ahead=0):
+        # Random day in the history window (optionally extending into the
+        # future), at a peak-weighted local hour on a 15-minute boundary,
+        # returned in UTC like every stored timestamp
+        rng = self.rng
+        day = rng.randrange(-self.history_days, days_ahead + 1)
+        hour = rng.choices(range(24), cum_weights=self.hour_cum)[0]
+        return to_utc(self.end + timedelta(days=day, hours=hour, minutes=15 * rng.randrange(4)))
+
+    def users(self, n, first_id=1):
+        # The suffix is the id the row will get, so names and emails stay
+        # unique across repeated runs into the same database
+        for i in range(first_id, first_id + n):
+            first, last = self.rng.choice(FIRST_NAMES), self.rng.choice(LAST_NAMES)
+            yield (
+                f"{first.lower()}.{last.lower()}{i}",
+                self.password_hash,
+                f"{first.lower()}.{last.lower()}{i}@nima-hospital.com",
+                f"{first} {last}",
+                self.moment().strftime(TIMESTAMP_FORMAT),
+            )
+
+    def doctors(self, n):
+        for _ in range(n):
+            yield (f"Dr. {self.name()}", self.rng.choice(SPECIALTIES), int(self.rng.random() > 0.05))
+
+    def patients(self, n):
+        rng = self.rng
+        for _ in range(n):
+            yield (
+                self.name(),
+                f"{rng.randrange(1940, 2025)}-{rng.randrange(1, 13):02d}-{rng.randrange(1, 29):02d}",
+                rng.choice(("F", "M")),
+                f"98{rng.randrange(10 ** 8):08d}",
+                self.moment().strftime(TIMESTAMP_FORMAT),
+            )
+
+    def appointments(self, n, doctors, patients):
+        rng = self.rng
+        doctor_cum = self.zipf_cum(doctors)
+        doctor_ids = range(1, doctors + 1)
+        for _ in range(n):
+            start = self.moment(days_ahead=30)
+            minutes = rng.choices(DURATION_MINUTES, cum_weights=self.duration_cum)[0]
+            yield (
+                rng.choices(doctor_ids, cum_weights=doctor_cum)[0],
+                rng.randrange(1, patients + 1) if patients else None,
+                start.strftime(TIMESTAMP_FORMAT),
+                (start + timedelta(minutes=minutes)).strftime(TIMESTAMP_FORMAT),
+                rng.choice(NOTES),
+            )
+
+    def operations(self, n, doctors, patients):
+        rng = self.rng
+        doctor_cum = self.zipf_cum(doctors)
+        doctor_ids = range(1, doctors + 1)
+        for _ in range(n):
+            yield (
+                rng.randrange(1, patients + 1),
+                rng.choices(doctor_ids, cum_weights=doctor_cum)[0],
+                rng.choice(PROCEDURES),
+                self.moment(days_ahead=30).strftime(TIMESTAMP_FORMAT),
+            )
+
+    def messages(self, n, usernames):
+        rng = self.rng
+        sender_cum = self.zipf_cum(len(usernames), s=0.8)
+        # Messages are appended as they are posted, so ids follow time
+        # (keyset paging and archiving rely on it)
+        for moment in sorted(self.moment() for _ in range(n)):
+            words = min(400, max(1, int(rng.lognormvariate(2.3, 0.9))))
+            yield (
+                rng.choices(usernames, cum_weights=sender_cum)[0],
+                " ".join(rng.choices(WORDS, k=words)),
+                moment.strftime(TIMESTAMP_FORMAT),
+            )
+
+
+INSERTS = {
+    "users": "INSERT INTO users (username, password, email, full_name, created_at) VALUES (?, ?, ?, ?, ?)",
+    "doctors": "INSERT INTO doctors (full_name, specialty, active) VALUES (?, ?, ?)",
+    "patients": """
+        INSERT INTO patients (full_name, date_of_birth, gender, phone, created_at)
+        VALUES (?, ?, ?, ?, ?)
+    """,
+    "appointments": """
+        INSERT INTO appointments (doctor_id, patient_id, starts_at, ends_at, notes)
+        VALUES (?, ?, ?, ?, ?)
+    """,
+    "operations": "INSERT INTO operations (patient_id, doctor_id, procedure, scheduled_at) VALUES (?, ?, ?, ?)",
+    "messages": "INSERT INTO messages (sender, body, created_at) VALUES (?, ?, ?)",
+}
+
+
+def load(conn, table, rows, total):
+    start = time.perf_counter()
+    loaded = 0
+    while True:
+        chunk = list(itertools.islice(rows, CHUNK))
+        if not chunk:
+            break
+        with conn:
+            conn.executemany(INSERTS[table], chunk)
+        loaded += len(chunk)
+        print(f"\r  {table:<13} {loaded:>10}/{total}", end="", flush=True)
+    elapsed = time.perf_counter() - start
+    rate = loaded / elapsed if elapsed else 0
+    print(f"\r  {table:<13} {loaded:>10} rows in {elapsed:7.1f} s ({rate:,.0f} rows/s)")
+
+
+def drop_triggers(conn):
+    # Triggers that maintain derived tables (FTS, counters) for loaded tables
+    triggers = conn.execute(
+        f"""
+        SELECT name, sql FROM sqlite_master
+        WHERE type = 'trigger' AND tbl_name IN ({', '.join('?' * len(LOADED_TABLES))})
+        """,
+        LOADED_TABLES,
+    ).fetchall()
+    with conn:
+        for name, _ in triggers:
+            conn.execute(f"DROP TRIGGER {name}")
+    return triggers
+
+
+def restore_derived(conn, triggers):
+    with conn:
+        for _, sql in triggers:
+            conn.execute(sql)
+        # The change-feed triggers were off too; tell open terminals
+        conn.execute("UPDATE change_counters SET version = version + 1")
+    fts_tables = [
+        row[0] for row in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table' AND sql LIKE 'CREATE VIRTUAL TABLE%fts5%'"
+        )
+    ]
+    for fts in fts_tables:
+        start = time.perf_counter()
+        with conn:
+            conn.execute(f"INSERT INTO {fts} ({fts}) VALUES ('rebuild')")
+        print(f"  rebuilt {fts} in {time.perf_counter() - start:.1f} s")
+    dashboard_stats.check_counters(conn, repair=True)
+
+
+def generate(conn, counts, seed=42, end=None, history_days=730, fast_load=True):
+    # end is a local midnight; the generated timestamps are UTC
+    end = end or datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    gen = Generator(seed, end, history_days)
+
+    # Ids continue after whatever the database already holds
+    base = {t: conn.execute(f"SELECT COALESCE(MAX(id), 0) FROM {t}").fetchone()[0] for t in LOADED_TABLES}
+    doctors = base["doctors"] + counts["doctors"]
+    patients = base["patients"] + counts["patients"]
+
+    triggers = drop_triggers(conn) if fast_load else []
+    try:
+        load(conn, "users", gen.users(counts["users"], base["users"] + 1), counts["users"])
+        load(conn, "doctors", gen.doctors(counts["doctors"]), counts["doctors"])
+        load(conn, "patients", gen.patients(counts["patients"]), counts["patients"])
+        if doctors:
+            load(conn, "appointments", gen.appointments(counts["appointments"], doctors, patients), counts["appointments"])
+            if patients:
+                load(conn, "operations", gen.operations(counts["operations"], doctors, patients), counts["operations"])
+        usernames = [row[0] for row in conn.execute("SELECT username FROM users ORDER BY id")]
+        if usernames:
+            load(conn, "messages", gen.messages(counts["messages"], usernames), counts["messages"])
+    finally:
+        if fast_load:
+            restore_derived(conn, triggers)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate synthetic hospital data")
+    parser.add_argument("--db", required=True, help="database to fill (created and migrated if missing)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--end", help="last day of history, YYYY-MM-DD (default: today, local time)")
+    parser.add_argument("--history-days", type=int, default=730)
+    parser.add_argument("--total", type=int, help="split this many rows across all tables")
+    for table in PROPORTIONS:
+        parser.add_argument(f"--{table}", type=int)
+    parser.add_argument("--no-fast-load", dest="fast_load", action="store_false")
+    args = parser.parse_args()
+
+    counts = {}
+    for table, share in PROPORTIONS.items():
+        explicit = getattr(args, table)
+        if explicit is not None:
+            counts[table] = explicit
+        elif args.total:
+            counts[table] = max(1, int(args.total * share))
+        else:
+            counts[table] = 0
+    if not any(counts.values()):
+        parser.error("give --total or at least one per-table count")
+
+    end = datetime.strptime(args.end, "%Y-%m-%d") if args.end else None
+    conn = sqlite3.connect(args.db)
+    conn.execute("PRAGMA journal_mode = WAL")
+    # Safe to relax while bulk loading a scratch database
+    conn.execute("PRAGMA synchronous = OFF")
+    conn.execute("PRAGMA cache_size = -262144")
+    migrate(conn)
+
+    start = time.perf_counter()
+    print(f"generating into {os.path.abspath(args.db)} (seed {args.seed})")
+    generate(conn, counts, args.seed, end, args.history_days, args.fast_load)
+    conn.execute("ANALYZE")
+    conn.close()
+    print(f"done: {sum(counts.values()):,} rows in {time.perf_counter() - start:.1f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Connection Pool - long-lived, per-thread SQLite connections
+"""
+import os
+import sqlite3
+import threading
+
+from sql_stats import InstrumentedConnection
+
+STATEMENT_CACHE_SIZE = 256
+# How long a connection waits on another writer before "database is locked"
+BUSY_TIMEOUT_MS = int(os.environ.get("NIMA_BUSY_TIMEOUT_MS", "5000"))
+
+
+class ConnectionPool:
+    """Hands out one persistent connection per thread for a database file.
+
+    Opening a connection means opening the file, reading the schema and
+    setting up a fresh statement cache, so the pool keeps each thread's
+    connection alive and reuses it for every later call on that thread.
+    """
+
+    def __init__(self, db_path, cached_statements=STATEMENT_CACHE_SIZE, wal=True, uri=False,
+                 instrumented=True):
+        self.db_path = db_path
+        self.cached_statements = cached_statements
+        self.wal = wal
+        self.uri = uri
+        self.factory = InstrumentedConnection if instrumented else sqlite3.Connection
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._connections = []
+        # One hit counter per thread, so the hot path needs no lock;
+        # stats() sums them
+        self._hit_counters = []
+        self.misses = 0
+
+    @property
+    def hits(self):
+        with self._lock:
+            return sum(counter[0] for counter in self._hit_counters)
+
+    def connect(self):
+        local = self._local
+        conn = getattr(local, "conn", None)
+        if conn is not None:
+            local.hits[0] += 1
+            return conn
+
+        conn = self._open()
+        local.conn = conn
+        local.hits = [0]
+        with self._lock:
+            self.misses += 1
+            self._connections.append(conn)
+            self._hit_counters.append(local.hits)
+        return conn
+
+    def _open(self):
+        conn = sqlite3.connect(
+            self.db_path,
+            cached_statements=self.cached_statements,
+            check_same_thread=False,
+            uri=self.uri,
+            factory=self.factory,
+        )
+        conn.execute(f"PRAGMA busy_timeout = {BUSY_TIMEOUT_MS}")
+        if self.wal:
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.execute("PRAGMA synchronous = NORMAL")
+        return conn
+
+    def stats(self):
+        hits, misses = self.hits, self.misses
+        total = hits + misses
+        return {
+            "hits": hits,
+            "misses": misses,
+            "open_connections": len(self._connections),
+            "hit_ratio": hits / total if total else 0.0,
+        }
+
+    def close_all(self):
+        with self._lock:
+            connections, self._connections = self._connections, []
+        for conn in connections:
+            try:
+                conn.close()
+            except sqlite3.ProgrammingError:
+                pass
+        self._local = threading.local()
+
+
+if __name__ == "__main__":
+    print("db_pool.py is a support module. Run main_app.py for the full application.")
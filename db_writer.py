@@ -0,0 +1,189 @@
+"""
+DB Writer - one thread performs every write, in group commits
+
+Readers keep their per-thread pooled connections, but writes are queued
+to a single writer thread, so the app itself never holds two write
+locks at once and never sees "database is locked" from its own threads.
+Each job is ``fn(conn, *args)`` and ``submit`` returns a Future for its
+result.
+
+The writer takes whatever is queued (up to max_batch jobs) and runs it
+in one BEGIN IMMEDIATE ... COMMIT, so a burst of writes costs one commit
+instead of one each. Every job runs inside its own SAVEPOINT: a job that
+raises is rolled back alone and its Future gets the exception, while the
+rest of the group still commits. Futures resolve only after the COMMIT.
+
+Other processes (a second terminal, a bulk import) can still hold the
+lock. BEGIN and COMMIT wait up to busy_timeout_ms, then retry with
+jittered exponential backoff before failing the group.
+
+Jobs get a connection that is already inside the group transaction.
+``with conn:`` blocks in existing data-layer functions are no-ops there,
+so those functions can be queued unchanged. Jobs must not commit. One
+that ends the group transaction anyway (``commit()``, or an error that
+makes SQLite abort it) leaves the group's outcome unknown: every job in
+the group fails with that error, the writer rolls back whatever is left
+and carries on with the next group.
+"""
+import queue
+import random
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+
+from db_pool import BUSY_TIMEOUT_MS
+
+MAX_BATCH = 256
+RETRIES = 5
+BACKOFF = 0.01
+
+
+def is_busy(error):
+    message = str(error).lower()
+    return "locked" in message or "busy" in message
+
+
+class InTransaction:
+    """Connection proxy handed to jobs: ``with conn:`` neither commits nor rolls back."""
+
+    __slots__ = ("_conn",)
+
+    def __init__(self, conn):
+        self._conn = conn
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+class DatabaseWriter:
+    def __init__(self, pool, busy_timeout_ms=BUSY_TIMEOUT_MS, max_batch=MAX_BATCH,
+                 retries=RETRIES, backoff=BACKOFF):
+        self.pool = pool
+        self.busy_timeout_ms = busy_timeout_ms
+        self.max_batch = max_batch
+        self.retries = retries
+        self.backoff = backoff
+        self.batches = 0
+        self.jobs = 0
+        self.busy_retries = 0
+        self._queue = queue.SimpleQueue()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="db-writer", daemon=True)
+        self._thread.start()
+
+    def submit(self, fn, *args):
+        future = Future()
+        if threading.current_thread() is self._thread:
+            # A job that writes again runs inline rather than deadlocking
+            future.set_result(fn(self._proxy, *args))
+            return future
+        if self._closed:
+            raise RuntimeError("DatabaseWriter is closed")
+        self._queue.put((future, fn, args))
+        return future
+
+    def execute(self, fn, *args):
+        """submit() and wait for the result (re-raising the job's error)."""
+        return self.submit(fn, *args).result()
+
+    def stats(self):
+        return {
+            "batches": self.batches,
+            "jobs": self.jobs,
+            "busy_retries": self.busy_retries,
+            "mean_batch": self.jobs / self.batches if self.batches else 0.0,
+        }
+
+    def _retry(self, fn, *args):
+        for attempt in range(self.retries + 1):
+            try:
+                return fn(*args)
+            except sqlite3.OperationalError as e:
+                if not is_busy(e) or attempt == self.retries:
+                    raise
+                self.busy_retries += 1
+                time.sleep(self.backoff * (2 ** attempt) * random.uniform(0.5, 1.5))
+
+    def _run(self):
+        conn = self.pool.connect()
+        conn.execute(f"PRAGMA busy_timeout = {int(self.busy_timeout_ms)}")
+        self._proxy = InTransaction(conn)
+        stopping = False
+        while not stopping:
+            job = self._queue.get()
+            if job is None:
+                break
+            batch = [job]
+            while len(batch) < self.max_batch:
+                try:
+                    job = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if job is None:
+                    stopping = True
+                    break
+                batch.append(job)
+            self._commit(conn, batch)
+
+    def _commit(self, conn, batch):
+        batch = [job for job in batch if job[0].set_running_or_notify_cancel()]
+        if not batch:
+            return
+        try:
+            self._retry(conn.execute, "BEGIN IMMEDIATE")
+        except sqlite3.Error as e:
+            for future, _, _ in batch:
+                future.set_exception(e)
+            return
+
+        outcomes = []
+        try:
+            for future, fn, args in batch:
+                conn.execute("SAVEPOINT job")
+                try:
+                    result = fn(self._proxy, *args)
+                except Exception as e:
+                    conn.execute("ROLLBACK TO job")
+                    conn.execute("RELEASE job")
+                    outcomes.append((future, None, e))
+                else:
+                    conn.execute("RELEASE job")
+                    outcomes.append((future, result, None))
+            self._retry(conn.commit)
+        except sqlite3.Error as e:
+            # COMMIT failed, or a job ended the transaction and its savepoint
+            # is gone; no Future has been resolved yet
+            if conn.in_transaction:
+                try:
+                    conn.rollback()
+                except sqlite3.Error:
+                    pass
+            for future, _, _ in batch:
+                future.set_exception(e)
+            return
+
+        self.batches += 1
+        self.jobs += len(outcomes)
+        for future, result, error in outcomes:
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(None)
+        self._thread.join(timeout=10)
+
+
+if __name__ == "__main__":
+    print("db_writer.py is a support module. Run main_app.py for the full application.")
@@ -0,0 +1,126 @@
+"""
+Export Users - stream the users table to CSV or JSONL in constant memory
+
+Usage (headless):
+    python export_users.py users.csv.gz [--db hospital.db]
+        [--columns id,username,email] [--since 2026-01-01] [--until 2026-02-01]
+
+The format follows the file extension (.csv or .jsonl, optionally .gz);
+use "-" to write to stdout.
+"""
+import argparse
+import csv
+import gzip
+import json
+import os
+import sqlite3
+import sys
+
+DEFAULT_COLUMNS = ("id", "username", "email", "full_name", "created_at")
+FETCH_SIZE = 1000
+
+
+def table_columns(conn, table="users"):
+    return [row[1] for row in conn.execute(f"PRAGMA table_info({table})")]
+
+
+def iter_users(conn, columns=DEFAULT_COLUMNS, since=None, until=None, fetch_size=FETCH_SIZE):
+    # SQLite steps the cursor lazily, so only one fetchmany() batch is ever
+    # held in memory no matter how large the table is. Columns are checked
+    # up front so a bad selection fails before any output is written.
+    known = table_columns(conn)
+    unknown = [c for c in columns if c not in known]
+    if unknown:
+        raise ValueError(f"Unknown column(s): {', '.join(unknown)}")
+
+    where, params = [], []
+    if since:
+        where.append("created_at >= ?")
+        params.append(since)
+    if until:
+        where.append("created_at < ?")
+        params.append(until)
+
+    sql = f"SELECT {', '.join(columns)} FROM users"
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    sql += " ORDER BY created_at, id" if where else " ORDER BY id"
+
+    return iter_cursor(conn.execute(sql, params), fetch_size)
+
+
+def iter_cursor(cursor, fetch_size=FETCH_SIZE):
+    try:
+        while True:
+            rows = cursor.fetchmany(fetch_size)
+            if not rows:
+                break
+            yield from rows
+    finally:
+        cursor.close()
+
+
+def open_output(path, compress):
+    if path == "-":
+        return sys.stdout
+    if compress:
+        return gzip.open(path, "wt", encoding="utf-8", newline="")
+    return open(path, "w", encoding="utf-8", newline="")
+
+
+def export_users(conn, path, fmt=None, compress=None, columns=DEFAULT_COLUMNS, since=None, until=None):
+    name = path[:-3] if path.endswith(".gz") else path
+    if compress is None:
+        compress = path.endswith(".gz")
+    if fmt is None:
+        fmt = "jsonl" if name.endswith((".jsonl", ".ndjson")) else "csv"
+
+    rows = iter_users(conn, columns, since, until)
+    count = 0
+    out = open_output(path, compress)
+    try:
+        if fmt == "jsonl":
+            for row in rows:
+                out.write(json.dumps(dict(zip(columns, row)), ensure_ascii=False))
+                out.write("\n")
+                count += 1
+        else:
+            writer = csv.writer(out)
+            writer.writerow(columns)
+            for row in rows:
+                writer.writerow(row)
+                count += 1
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export the users table from hospital.db")
+    parser.add_argument("path", help='output file (.csv/.jsonl, optionally .gz) or "-"')
+    parser.add_argument(
+        "--db",
+        default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "hospital.db"),
+    )
+    parser.add_argument("--format", choices=("csv", "jsonl"))
+    parser.add_argument("--gzip", action="store_true", default=None)
+    parser.add_argument("--columns", help="comma-separated column list")
+    parser.add_argument("--since", help="created_at lower bound (inclusive)")
+    parser.add_argument("--until", help="created_at upper bound (exclusive)")
+    args = parser.parse_args()
+
+    columns = tuple(c.strip() for c in args.columns.split(",")) if args.columns else DEFAULT_COLUMNS
+    conn = sqlite3.connect(f"file:{args.db}?mode=ro", uri=True)
+    try:
+        count = export_users(conn, args.path, args.format, args.gzip, columns, args.since, args.until)
+    except ValueError as e:
+        parser.error(str(e))
+    finally:
+        conn.close()
+    if args.path != "-":
+        print(f"exported {count} user(s) to {args.path}")
+
+
+if __name__ == "__main__":
+    main()
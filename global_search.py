@@ -0,0 +1,96 @@
+"""
+Global Search - typeahead over users, doctors, patients and messages
+"""
+import messages
+
+DEBOUNCE_MS = 30
+RESULTS_PER_SOURCE = 6
+
+# Each source is an FTS5 prefix lookup (migrations 0006 and 0007)
+SOURCE_SQL = {
+    "users": """
+        SELECT u.id, u.full_name || ' (' || u.username || ')'
+        FROM users_fts f JOIN users u ON u.id = f.rowid
+        WHERE users_fts MATCH ? LIMIT ?
+    """,
+    "doctors": """
+        SELECT d.id, d.full_name || COALESCE(' - ' || d.specialty, '')
+        FROM doctors_fts f JOIN doctors d ON d.id = f.rowid
+        WHERE doctors_fts MATCH ? LIMIT ?
+    """,
+    "patients": """
+        SELECT p.id, p.full_name
+        FROM patients_fts f JOIN patients p ON p.id = f.rowid
+        WHERE patients_fts MATCH ? LIMIT ?
+    """,
+    "messages": """
+        SELECT m.id, m.sender || ': ' || m.body
+        FROM messages_fts f JOIN messages m ON m.id = f.rowid
+        WHERE messages_fts MATCH ? ORDER BY f.rowid DESC LIMIT ?
+    """,
+}
+SOURCES = tuple(SOURCE_SQL)
+SOURCE_TITLES = {
+    "users": "Staff",
+    "doctors": "Doctors",
+    "patients": "Patients",
+    "messages": "Messages",
+}
+
+
+def search_source(conn, source, text, limit=RESULTS_PER_SOURCE):
+    query = messages.fts_query(text)
+    if query is None:
+        return []
+    return conn.execute(SOURCE_SQL[source], (query, limit)).fetchall()
+
+
+class GlobalSearch:
+    """Debounced typeahead controller for an Entry widget.
+
+    Each keystroke restarts a short timer; when it fires, one job per
+    source goes to the worker pool and its rows are handed to
+    ``on_results(source, rows)`` as soon as that source answers. Results
+    from an older keystroke are discarded.
+    """
+
+    def __init__(self, app, entry, on_results, on_clear):
+        self.app = app
+        self.entry = entry
+        self.on_results = on_results
+        self.on_clear = on_clear
+        self.generation = 0
+        self._after_id = None
+        entry.bind("<KeyRelease>", self._on_key, add="+")
+
+    def _on_key(self, event):
+        if event.keysym in ("Up", "Down", "Return", "Escape", "Tab"):
+            return
+        if self._after_id is not None:
+            self.app.after_cancel(self._after_id)
+        self._after_id = self.app.after(DEBOUNCE_MS, self.run)
+
+    def run(self):
+        self._after_id = None
+        self.generation += 1
+        generation = self.generation
+        text = self.entry.get().strip()
+        if not text:
+            self.on_clear()
+            return
+
+        for source in SOURCES:
+            self.app.repo.submit(
+                self.app.search_source,
+                source,
+                text,
+                on_success=lambda rows, source=source: self._deliver(generation, source, rows),
+            )
+
+    def _deliver(self, generation, source, rows):
+        if generation == self.generation:
+            self.on_results(source, rows)
+
+
+if __name__ == "__main__":
+    print("global_search.py is a support module. Run main_app.py for the full application.")
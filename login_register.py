@@ -5,6 +5,7 @@ Run Order: Third
 """
 from config import tk, messagebox, LOGIN_BG, LOGIN_CARD_BG, LOGIN_ACCENT, LOGIN_BUTTON, LOGIN_BG, BORDER, TEXT_MAIN, TEXT_MUTED, FONT_NORMAL, FONT_SMALL, ACCENT
 from Authbase import Authbase
+from availability import AvailabilityCheck
 
 class LoginRegisterPages(Authbase):
     def __init__(self, app):
@@ -122,11 +123,15 @@ class LoginRegisterPages(Authbase):
             username = username_entry.get().strip()
             password = password_entry.get().strip()
             
-            if self.app.validate_login(username, password):
-                messagebox.showinfo("Success", "Login successful!")
-                self.app.show_main_app()
-            else:
-                messagebox.showerror("Error", "Invalid username or password")
+            def on_result(session):
+                if session:
+                    self.app.session = session
+                    messagebox.showinfo("Success", f"Login successful! Welcome, {session.display_name}.")
+                    self.app.show_main_app()
+                else:
+                    messagebox.showerror("Error", "Invalid username or password")
+
+            self.run_async(login_button, self.app.login, (username, password), on_result)
 
         login_button = tk.Button(
             card_inner,
@@ -201,6 +206,12 @@ class LoginRegisterPages(Authbase):
         password_entry = self.create_entry_field(card_inner, "Password", show="•")
         confirm_entry = self.create_entry_field(card_inner, "Confirm Password", show="•")
 
+        # Live availability under Email and Username
+        for entry, kind in ((email_entry, "email"), (username_entry, "username")):
+            status_label = tk.Label(entry.master, text="", font=FONT_SMALL, bg=LOGIN_CARD_BG, anchor="w")
+            status_label.pack(fill="x")
+            AvailabilityCheck(self.app, entry, status_label, kind)
+
         # Terms
         terms_frame = tk.Frame(card_inner, bg=LOGIN_CARD_BG)
         terms_frame.pack(fill="x", pady=(0, 25))
@@ -240,13 +251,21 @@ class LoginRegisterPages(Authbase):
                 messagebox.showerror("Error", "Please accept the Terms and Conditions")
                 return
             
-            created, error_message = self.app.create_user(name, email, username, password)
-            if not created:
-                messagebox.showerror("Error", error_message or "Registration failed")
-                return
-            
-            messagebox.showinfo("Success", "Registration successful! Please login.")
-            self.show_login_page()
+            def on_result(result):
+                created, error_message = result
+                if not created:
+                    messagebox.showerror("Error", error_message or "Registration failed")
+                    return
+
+                messagebox.showinfo("Success", "Registration successful! Please login.")
+                self.show_login_page()
+
+            self.run_async(
+                register_button,
+                self.app.create_user,
+                (name, email, username, password),
+                on_result,
+            )
 
         register_button = tk.Button(
             card_inner,
@@ -3,13 +3,37 @@
 PART 5/5 - Main Application Class and Dashboard Pages
 Run Order: Fifth (Last)
 """
-import sqlite3
+import logging
+import threading
 from config import tk, messagebox, ttk, Image, ImageTk, os, BG_MAIN, BG_SIDEBAR, BG_TOPBAR, BG_CARD, BG_PRIMARY, BG_SOFT_BLUE, BORDER, TEXT_MAIN, TEXT_MUTED, ACCENT, LOGIN_BG, LOGIN_BUTTON, FONT_TITLE, FONT_SUBTITLE, FONT_NORMAL, FONT_SMALL
 from login_register import LoginRegisterPages
 from password_reset import PasswordResetPages
+from db_pool import ConnectionPool
+from storage import SQLiteStorage
+from async_repo import AsyncRepository
+from migrate import migrate
+from audit_log import AuditLog
+from api_client import RemoteAuditLog, RemoteStorage
+from api_service import QUERIES, READ_ONLY
+from db_writer import DatabaseWriter
+from reset_codes import ResetCodeStore
+from session import Session
+from availability import AvailabilityIndex
+from change_feed import ChangeFeed
+from backups import BackupScheduler
+import schedule
+import messages
+import global_search
+import sql_stats
+
+BADGE_REFRESH_MS = 5000
+RESET_SWEEP_MS = 60_000
+
+sql_log = logging.getLogger("nima.sql")
+
 
 class HospitalApp(tk.Tk):
-    def __init__(self):
+    def __init__(self, storage=None):
         super().__init__()
         self.title("NIMA Hospital - Login")
         self.geometry("1080x650")
@@ -17,17 +41,56 @@ class HospitalApp(tk.Tk):
         self.resizable(True, True)
 
         self.db_path = os.path.join(os.path.dirname(__file__), "hospital.db")
-        self.init_database()
-        
-        # Temporary storage for password reset codes
-        self.reset_codes = {}
-
-        # notifications data
-        self.notifications = [
-            "2 new patients registered.",
-            "Lab report ready for Patient #1021.",
-            "Staff meeting at 3:00 PM.",
-        ]
+        # User accounts go through a pluggable backend (storage.py); the
+        # other pages share its SQLite pool, or hospital.db otherwise
+        self.storage = storage or SQLiteStorage(self.db_path)
+        # With a RemoteStorage every data call goes to the API service
+        # (api_service.py) and this terminal never opens the file
+        self.api = getattr(self.storage, "client", None)
+        if self.api is None:
+            self.db_pool = getattr(self.storage, "pool", None) or ConnectionPool(self.db_path)
+            self.init_database()
+            # Every local write goes through one writer thread (db_writer.py)
+            self.writer = getattr(self.storage, "writer", None) or DatabaseWriter(self.db_pool)
+            self.audit = AuditLog(self.db_pool, writer=self.writer)
+        else:
+            self.db_pool = None
+            self.writer = None
+            self.audit = RemoteAuditLog(self.api)
+
+        # Profile of the logged-in staff member (session.py), None when logged out
+        self.session = None
+
+        # Worker pool for queries issued from the UI
+        self.repo = AsyncRepository(self)
+        # Pushes other terminals' writes into the visible page (change_feed.py)
+        self.feed = ChangeFeed(self)
+        self.feed.start()
+        self.protocol("WM_DELETE_WINDOW", self.on_close)
+
+        # Bloom filters of taken usernames/emails for the register page,
+        # loaded on their own thread so page changes can't cancel it
+        self.availability = AvailabilityIndex()
+        threading.Thread(
+            target=self.availability.load, args=(self.storage,), name="availability", daemon=True
+        ).start()
+
+        # Password reset codes: expiring, capped, persisted in hospital.db.
+        # Against the service they are issued and checked there instead
+        self.reset_codes = None
+        if self.api is None:
+            self.reset_codes = ResetCodeStore(self.db_pool, writer=self.writer)
+            self.after(RESET_SWEEP_MS, self.sweep_reset_codes)
+
+        # Online, throttled snapshots (backups.py) when NIMA_BACKUP_DIR is set
+        # and this terminal owns the file
+        self.backups = None
+        backup_dir = os.environ.get("NIMA_BACKUP_DIR")
+        if backup_dir and self.db_pool is not None and not self.db_pool.uri:
+            self.backups = BackupScheduler(self.db_pool.db_path, backup_dir).start()
+
+        # Notifications popup, reused between openings
+        self.notif_win = None
 
         # image storage
         self.images = {}
@@ -42,81 +105,148 @@ class HospitalApp(tk.Tk):
 
     # ------------- DATABASE -------------
     def get_db_connection(self):
-        return sqlite3.connect(self.db_path)
+        # Pooled per-thread connection; ``with conn:`` commits but keeps it open
+        return self.db_pool.connect()
 
     def init_database(self):
-        with self.get_db_connection() as conn:
-            conn.execute(
-                """
-                CREATE TABLE IF NOT EXISTS users (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    username TEXT NOT NULL UNIQUE,
-                    password TEXT NOT NULL,
-                    email TEXT NOT NULL UNIQUE,
-                    full_name TEXT NOT NULL,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-                """
-            )
+        # Schema lives in migrations/; a warm start is a single PRAGMA read
+        migrate(self.get_db_connection())
 
-            cursor = conn.execute("SELECT 1 FROM users WHERE username = ?", ("admin",))
-            if cursor.fetchone() is None:
-                conn.execute(
-                    """
-                    INSERT INTO users (username, password, email, full_name)
-                    VALUES (?, ?, ?, ?)
-                    """,
-                    ("admin", "password", "admin@nima-hospital.com", "Administrator"),
-                )
-            conn.commit()
+    def query(self, name, *args):
+        # Data-layer call (api_service.QUERIES) on the service or the local file
+        if self.api is not None:
+            return self.api.call(name, *args)
+        if name in READ_ONLY:
+            return QUERIES[name](self.get_db_connection(), *args)
+        return self.writer.execute(QUERIES[name], *args)
+
+    @property
+    def current_user(self):
+        return self.session.username if self.session else None
 
     def validate_login(self, username, password):
-        with self.get_db_connection() as conn:
-            cursor = conn.execute(
-                "SELECT 1 FROM users WHERE username = ? AND password = ?",
-                (username, password),
-            )
-            return cursor.fetchone() is not None
+        valid = self.storage.validate_login(username, password)
+        self.audit.record("login_success" if valid else "login_failure", username)
+        return valid
+
+    def login(self, username, password):
+        # Runs on a worker: verify, then load the profile the pages will use
+        if not self.validate_login(username, password):
+            return None
+        profile = self.storage.get_profile(username)
+        return Session.from_profile(profile) if profile else None
 
     def username_exists(self, username):
-        with self.get_db_connection() as conn:
-            cursor = conn.execute("SELECT 1 FROM users WHERE username = ?", (username,))
-            return cursor.fetchone() is not None
+        return self.storage.username_exists(username)
 
     def create_user(self, full_name, email, username, password):
-        try:
-            with self.get_db_connection() as conn:
-                conn.execute(
-                    """
-                    INSERT INTO users (full_name, email, username, password)
-                    VALUES (?, ?, ?, ?)
-                    """,
-                    (full_name, email, username, password),
-                )
-                conn.commit()
-            return True, None
-        except sqlite3.IntegrityError:
-            return False, "Username or email already exists"
+        created, error_message = self.storage.create_user(full_name, email, username, password)
+        self.audit.record("register" if created else "register_conflict", username, email)
+        if created:
+            self.availability.add(username, email)
+        return created, error_message
+
+    def identity_taken(self, kind, value):
+        # Confirms a possible Bloom-filter hit with an indexed lookup
+        if kind == "email":
+            return self.storage.find_user_by_email(value) is not None
+        return self.storage.username_exists(value)
 
     def find_user_by_email(self, email):
-        with self.get_db_connection() as conn:
-            cursor = conn.execute(
-                "SELECT username FROM users WHERE email = ?",
-                (email,),
-            )
-            row = cursor.fetchone()
-            if row:
-                return row[0]
-            return None
+        return self.storage.find_user_by_email(email)
 
-    def update_user_password(self, username, new_password):
-        with self.get_db_connection() as conn:
-            cursor = conn.execute(
-                "UPDATE users SET password = ? WHERE username = ?",
-                (new_password, username),
+    # Password reset: these run on a worker, as the service may answer them
+    def issue_reset_code(self, email):
+        """(username, code) for a registered email, else None.
+
+        Against the service the code is None: the service delivers it.
+        """
+        if self.api is not None:
+            username = self.storage.find_user_by_email(email) if self.storage.issue_reset_code(email) else None
+            issued = (username, None) if username else None
+        else:
+            username = self.storage.find_user_by_email(email)
+            issued = (username, self.reset_codes.issue(email)) if username else None
+        if issued:
+            self.audit.record("reset_code_issued", issued[0], email)
+        return issued
+
+    def verify_reset_code(self, email, code):
+        if self.api is not None:
+            return self.storage.verify_reset_code(email, code)
+        return self.reset_codes.verify(email, code)
+
+    def reset_password(self, email, code, username, new_password):
+        # The code is checked again where the password is written
+        if self.api is not None:
+            updated = self.storage.reset_password(email, code, new_password)
+        else:
+            updated = (
+                self.reset_codes.verify(email, code)
+                and self.storage.update_user_password(username, new_password)
             )
-            conn.commit()
-            return cursor.rowcount > 0
+            if updated:
+                self.reset_codes.discard(email)
+        if updated:
+            self.audit.record("password_changed", username)
+            session = self.session
+            if session is not None and session.username == username:
+                self.session = None
+        return updated
+
+    def sweep_reset_codes(self):
+        # Expired codes are also dropped lazily; this keeps the table tidy
+        self.repo.submit(self.reset_codes.sweep)
+        self.after(RESET_SWEEP_MS, self.sweep_reset_codes)
+
+    def audit_events(self, username=None, since=None, until=None, limit=100):
+        self.audit.flush()
+        return self.query("audit_events", username, since, until, None, limit)
+
+    def dashboard_counts(self):
+        return self.query("dashboard_counts")
+
+    def appointments_today(self):
+        return self.query("appointments_today")
+
+    def doctor_week(self, doctor_id):
+        return self.query("doctor_week", doctor_id)
+
+    def list_doctors(self):
+        return self.query("list_doctors")
+
+    def recent_messages(self, before_id=None):
+        return self.query("recent_messages", before_id)
+
+    def messages_after(self, after_id):
+        return self.query("messages_after", after_id)
+
+    def search_messages(self, text, before_id=None):
+        return self.query("search_messages", text, before_id)
+
+    def post_message(self, body):
+        return self.query("post_message", self.current_user or "Staff", body)
+
+    def search_source(self, source, text):
+        return self.query("search_source", source, text)
+
+    def notify(self, username, message):
+        self.repo.submit(
+            self.add_notification, username, message,
+            on_success=lambda _: self.refresh_badge(),
+        )
+
+    def add_notification(self, username, message):
+        return self.query("add_notification", username, message)
+
+    def unread_notification_count(self):
+        return self.query("unread_count", self.current_user)
+
+    def unread_notifications(self, after_id=0):
+        return self.query("unread_since", self.current_user, after_id)
+
+    def mark_notifications_read(self, up_to_id=None):
+        return self.query("mark_all_read", self.current_user, up_to_id)
 
     # ------------- IMAGE LOADING -------------
     def load_images(self):
@@ -154,11 +284,12 @@ class HospitalApp(tk.Tk):
     def show_reset_code_page(self, email, username):
         self.password_reset.show_reset_code_page(email, username)
 
-    def show_new_password_page(self, email, username):
-        self.password_reset.show_new_password_page(email, username)
+    def show_new_password_page(self, email, username, code):
+        self.password_reset.show_new_password_page(email, username, code)
 
     # ------------- MAIN APP -------------
     def show_main_app(self):
+        self.repo.cancel_all()
         for widget in self.winfo_children():
             widget.destroy()
 
@@ -227,6 +358,18 @@ class HospitalApp(tk.Tk):
             btn.pack(fill="x", ipady=6)
             self.menu_buttons[text] = btn
 
+        # Signed-in user, straight from the session (no query)
+        if self.session:
+            tk.Label(
+                self.sidebar,
+                text=f"{self.session.display_name}\n{self.session.role.title()} · {self.session.email}",
+                font=FONT_SMALL,
+                bg=BG_SIDEBAR,
+                fg=TEXT_MUTED,
+                justify="left",
+                wraplength=180,
+            ).pack(side="bottom", anchor="w", padx=18, pady=12)
+
         # Right area
         self.right_area = tk.Frame(self, bg=BG_MAIN)
         self.right_area.pack(side="left", fill="both", expand=True)
@@ -254,6 +397,72 @@ class HospitalApp(tk.Tk):
         search_box.place(x=65, y=30, width=220, height=22)
         tk.Label(self.topbar, text="🔍", bg=BG_TOPBAR).place(x=45, y=30)
 
+        # Search results dropdown, filled per source as each one answers
+        dropdown = tk.Listbox(
+            self.right_area,
+            font=FONT_SMALL,
+            bg="#ffffff",
+            activestyle="dotbox",
+            bd=0,
+            highlightthickness=1,
+            highlightbackground=BORDER,
+        )
+        results = {}
+        hits = []
+        shown = {"generation": None}
+
+        def hide_dropdown():
+            results.clear()
+            dropdown.place_forget()
+
+        def show_results(source, rows):
+            if shown["generation"] != search.generation:
+                shown["generation"] = search.generation
+                results.clear()
+            results[source] = rows
+
+            dropdown.delete(0, "end")
+            hits.clear()
+            for name in global_search.SOURCES:
+                for row_id, label in results.get(name, ()):
+                    dropdown.insert("end", f"{global_search.SOURCE_TITLES[name]}  ·  {label}")
+                    hits.append((name, row_id, label))
+            if not hits:
+                dropdown.insert("end", "No matches")
+
+            dropdown.config(height=min(max(len(hits), 1), 12))
+            dropdown.place(in_=search_box, x=0, rely=1.0, y=2, width=420)
+            dropdown.lift()
+
+        def open_hit(event=None):
+            selection = dropdown.curselection()
+            if not selection or selection[0] >= len(hits):
+                return
+            source, row_id, label = hits[selection[0]]
+            hide_dropdown()
+            search_box.delete(0, "end")
+            if source == "doctors":
+                self.show_schedule()
+            elif source == "messages":
+                self.show_messages()
+            else:
+                messagebox.showinfo(global_search.SOURCE_TITLES[source], label)
+
+        def focus_dropdown(event):
+            if hits:
+                dropdown.focus_set()
+                dropdown.selection_clear(0, "end")
+                dropdown.selection_set(0)
+                dropdown.activate(0)
+
+        search = global_search.GlobalSearch(self, search_box, show_results, hide_dropdown)
+        self.global_search = search
+        search_box.bind("<Down>", focus_dropdown)
+        search_box.bind("<Escape>", lambda e: hide_dropdown())
+        dropdown.bind("<Double-Button-1>", open_hit)
+        dropdown.bind("<Return>", open_hit)
+        dropdown.bind("<Escape>", lambda e: (hide_dropdown(), search_box.focus_set()))
+
         def upcoming():
             messagebox.showinfo("Upcoming", "Showing upcoming appointments (demo).")
 
@@ -287,60 +496,6 @@ class HospitalApp(tk.Tk):
         btn_support.place(relx=0.72, y=16, width=100, height=28, anchor="n")
 
         # Notification button
-        def open_notifications():
-            win = tk.Toplevel(self)
-            win.title("Notifications")
-            win.geometry("320x260")
-            win.resizable(False, False)
-            win.configure(bg=BG_CARD)
-
-            tk.Label(
-                win,
-                text="Notifications",
-                font=FONT_SUBTITLE,
-                bg=BG_CARD,
-                fg=TEXT_MAIN,
-            ).pack(pady=(10, 5))
-
-            frame_list = tk.Frame(win, bg=BG_CARD)
-            frame_list.pack(fill="both", expand=True, padx=10, pady=(0, 10))
-
-            listbox = tk.Listbox(
-                frame_list,
-                font=FONT_NORMAL,
-                bg="#ffffff",
-                height=8,
-                bd=0,
-                highlightthickness=1,
-                highlightbackground=BORDER,
-            )
-            listbox.pack(fill="both", expand=True)
-
-            if self.notifications:
-                for n in self.notifications:
-                    listbox.insert("end", "• " + n)
-            else:
-                listbox.insert("end", "No new notifications.")
-
-            def clear_notifs():
-                self.notifications.clear()
-                listbox.delete(0, "end")
-                listbox.insert("end", "No new notifications.")
-                self.badge_label.config(text="0", bg="#cccccc")
-
-            btn_clear = tk.Button(
-                win,
-                text="Clear all",
-                font=FONT_SMALL,
-                bg=ACCENT,
-                fg="white",
-                bd=0,
-                relief="flat",
-                cursor="hand2",
-                command=clear_notifs,
-            )
-            btn_clear.pack(pady=(0, 10), ipadx=10, ipady=3)
-
         bell_frame = tk.Frame(self.topbar, bg=BG_TOPBAR)
         bell_frame.place(relx=0.83, rely=0.1)
 
@@ -351,19 +506,20 @@ class HospitalApp(tk.Tk):
             bg=BG_TOPBAR,
             bd=0,
             cursor="hand2",
-            command=open_notifications,
+            command=self.open_notifications,
         )
         bell_btn.pack(side="left")
 
         self.badge_label = tk.Label(
             bell_frame,
-            text=str(len(self.notifications)),
-            bg=ACCENT if self.notifications else "#cccccc",
+            text="0",
+            bg="#cccccc",
             fg="white",
             font=("Segoe UI", 8, "bold"),
             padx=4,
         )
         self.badge_label.place(x=20, y=0)
+        self.badge_tick(self.badge_label)
 
         # Minimize & maximize
         def do_minimize():
@@ -397,7 +553,114 @@ class HospitalApp(tk.Tk):
         )
         btn_max.place(relx=0.97, rely=0.2, width=24, height=24)
 
+    # ------------- NOTIFICATIONS -------------
+    def set_badge(self, count):
+        if self.badge_label.winfo_exists():
+            self.badge_label.config(text=str(count), bg=ACCENT if count else "#cccccc")
+
+    def refresh_badge(self):
+        if not self.current_user:
+            return
+        self.repo.submit(self.unread_notification_count, on_success=self.set_badge)
+        if self.notif_win is not None and self.notif_win.winfo_exists() and self.notif_win.winfo_viewable():
+            self.fetch_new_notifications()
+
+    def badge_tick(self, label):
+        # Cheap counter poll; stops once this topbar has been destroyed
+        if not label.winfo_exists():
+            return
+        self.refresh_badge()
+        self.after(BADGE_REFRESH_MS, self.badge_tick, label)
+
+    def open_notifications(self):
+        win = self.notif_win
+        if win is not None and win.winfo_exists():
+            win.deiconify()
+            win.lift()
+            self.fetch_new_notifications()
+            return
+
+        win = tk.Toplevel(self)
+        win.title("Notifications")
+        win.geometry("320x260")
+        win.resizable(False, False)
+        win.configure(bg=BG_CARD)
+        # Closing only hides the popup so the next open reuses it
+        win.protocol("WM_DELETE_WINDOW", win.withdraw)
+
+        tk.Label(
+            win,
+            text="Notifications",
+            font=FONT_SUBTITLE,
+            bg=BG_CARD,
+            fg=TEXT_MAIN,
+        ).pack(pady=(10, 5))
+
+        frame_list = tk.Frame(win, bg=BG_CARD)
+        frame_list.pack(fill="both", expand=True, padx=10, pady=(0, 10))
+
+        self.notif_list = tk.Listbox(
+            frame_list,
+            font=FONT_NORMAL,
+            bg="#ffffff",
+            height=8,
+            bd=0,
+            highlightthickness=1,
+            highlightbackground=BORDER,
+        )
+        self.notif_list.pack(fill="both", expand=True)
+        self.notif_list.insert("end", "No new notifications.")
+        self.notif_placeholder = True
+        self.notif_last_id = 0
+
+        def clear_notifs():
+            def on_cleared(_):
+                if not self.notif_list.winfo_exists():
+                    return
+                self.notif_list.delete(0, "end")
+                self.notif_list.insert("end", "No new notifications.")
+                self.notif_placeholder = True
+                self.refresh_badge()
+
+            self.repo.submit(self.mark_notifications_read, self.notif_last_id, on_success=on_cleared)
+
+        btn_clear = tk.Button(
+            win,
+            text="Clear all",
+            font=FONT_SMALL,
+            bg=ACCENT,
+            fg="white",
+            bd=0,
+            relief="flat",
+            cursor="hand2",
+            command=clear_notifs,
+        )
+        btn_clear.pack(pady=(0, 10), ipadx=10, ipady=3)
+
+        self.notif_win = win
+        self.fetch_new_notifications()
+
+    def fetch_new_notifications(self):
+        # Only rows newer than the last one shown are fetched and appended
+        self.repo.submit(
+            self.unread_notifications,
+            self.notif_last_id,
+            on_success=self.append_notifications,
+        )
+
+    def append_notifications(self, rows):
+        if not rows or not self.notif_list.winfo_exists():
+            return
+        if self.notif_placeholder:
+            self.notif_list.delete(0, "end")
+            self.notif_placeholder = False
+        for notif_id, message, created_at in rows:
+            self.notif_list.insert("end", "• " + message)
+        self.notif_last_id = rows[-1][0]
+
     def clear_content(self):
+        self.repo.cancel_all()
+        self.feed.unwatch()
         for w in self.content.winfo_children():
             w.destroy()
 
@@ -443,10 +706,30 @@ class HospitalApp(tk.Tk):
                 fg=TEXT_MUTED,
             )
             title_lbl.pack(anchor="w")
-
-        stat_card(stats_frame, 45, "New patients", "#ffafcc")
-        stat_card(stats_frame, 17, "Doctors", "#9bf6ff")
-        stat_card(stats_frame, 15, "Operations", "#caffbf")
+            return num_lbl
+
+        count_labels = {
+            "new_patients": stat_card(stats_frame, "…", "New patients", "#ffafcc"),
+            "doctors": stat_card(stats_frame, "…", "Doctors", "#9bf6ff"),
+            "operations": stat_card(stats_frame, "…", "Operations", "#caffbf"),
+        }
+
+        shown_counts = {}
+
+        def show_counts(counts):
+            # Only cards whose number moved are touched
+            for key, lbl in count_labels.items():
+                if lbl.winfo_exists() and shown_counts.get(key) != counts[key]:
+                    lbl.config(text=str(counts[key]))
+                    shown_counts[key] = counts[key]
+
+        self.repo.submit(self.dashboard_counts, on_success=show_counts)
+        self.feed.watch(
+            ("patients", "doctors", "operations"),
+            lambda changed: self.repo.submit(
+                self.dashboard_counts, on_success=lambda counts: self.feed.paint(show_counts, counts)
+            ),
+        )
 
         middle = tk.Frame(self.content, bg=BG_MAIN)
         middle.pack(fill="both", expand=True, padx=25, pady=20)
@@ -625,9 +908,25 @@ class HospitalApp(tk.Tk):
         frame = tk.Frame(self.content, bg=BG_MAIN)
         frame.pack(fill="both", expand=True, padx=40, pady=30)
 
-        tk.Label(frame, text="Messages", font=FONT_TITLE, bg=BG_MAIN).pack(
-            anchor="w", pady=(0, 10)
+        header = tk.Frame(frame, bg=BG_MAIN)
+        header.pack(fill="x", pady=(0, 10))
+
+        tk.Label(header, text="Messages", font=FONT_TITLE, bg=BG_MAIN).pack(side="left")
+
+        search_entry = tk.Entry(header, font=FONT_NORMAL, relief="solid", bd=1)
+        search_entry.pack(side="right", ipady=3)
+        tk.Label(header, text="🔍", bg=BG_MAIN).pack(side="right", padx=(0, 4))
+
+        btn_older = tk.Button(
+            frame,
+            text="Load older messages",
+            font=FONT_SMALL,
+            relief="groove",
+            bd=1,
+            bg="#f7f7f7",
+            cursor="hand2",
         )
+        btn_older.pack(anchor="w", pady=(0, 5))
 
         msg_list = tk.Listbox(
             frame,
@@ -641,22 +940,91 @@ class HospitalApp(tk.Tk):
         )
         msg_list.pack(fill="x")
 
-        sample_msgs = [
-            "Patient #1003: Requesting appointment reschedule.",
-            "Lab: Blood report ready for Mr. Koirala.",
-            "Admin: Staff meeting at 3:00 PM in Conference Room.",
-        ]
-        for m in sample_msgs:
-            msg_list.insert("end", m)
+        # Oldest id on screen is the keyset cursor for the next page and
+        # the newest one for the change feed; "query" is the active search,
+        # or None for the plain timeline
+        state = {"oldest_id": None, "newest_id": None, "query": None, "loaded": False}
+
+        def show_page(rows):
+            if not msg_list.winfo_exists():
+                return
+            first_page = state["oldest_id"] is None
+            # Pages arrive newest first; older pages go above what is shown
+            for row in rows:
+                msg_list.insert(0, messages.format_message(row))
+            if rows:
+                state["oldest_id"] = rows[-1][0]
+                if first_page:
+                    state["newest_id"] = rows[0][0]
+            state["loaded"] = True
+            if len(rows) < messages.PAGE_SIZE:
+                btn_older.config(state="disabled")
+            if first_page:
+                msg_list.see("end")
+
+        def load_page():
+            if state["query"]:
+                self.repo.submit(
+                    self.search_messages, state["query"], state["oldest_id"], on_success=show_page
+                )
+            else:
+                self.repo.submit(self.recent_messages, state["oldest_id"], on_success=show_page)
+
+        def append(rows):
+            # New messages, oldest first; the feed and send() may both
+            # deliver the same row
+            if not msg_list.winfo_exists() or state["query"]:
+                return
+            added = False
+            for row in rows:
+                if state["newest_id"] is None or row[0] > state["newest_id"]:
+                    msg_list.insert("end", messages.format_message(row))
+                    state["newest_id"] = row[0]
+                    added = True
+            if added:
+                msg_list.see("end")
+            if len(rows) == messages.PAGE_SIZE:
+                fetch_newer()
+
+        def fetch_newer(changed=None):
+            # Until the first page is in, it will include anything new anyway
+            if state["query"] or not state["loaded"]:
+                return
+            self.repo.submit(
+                self.messages_after,
+                state["newest_id"],
+                on_success=lambda rows: self.feed.paint(append, rows),
+            )
+
+        def reset(query):
+            state["oldest_id"] = None
+            state["newest_id"] = None
+            state["loaded"] = False
+            state["query"] = query
+            msg_list.delete(0, "end")
+            btn_older.config(state="normal")
+            load_page()
+
+        btn_older.config(command=load_page)
+        search_entry.bind("<Return>", lambda e: reset(search_entry.get().strip() or None))
+        load_page()
+        self.feed.watch(("messages",), fetch_newer)
 
         entry = tk.Entry(frame, font=FONT_NORMAL)
         entry.pack(fill="x", pady=(15, 5))
 
         def send():
             text = entry.get().strip()
-            if text:
-                msg_list.insert("end", "You: " + text)
-                entry.delete(0, "end")
+            if not text:
+                return
+
+            def on_sent(row):
+                append([row])
+
+            entry.delete(0, "end")
+            self.repo.submit(self.post_message, text, on_success=on_sent)
+
+        entry.bind("<Return>", lambda e: send())
 
         btn = tk.Button(
             frame,
@@ -686,12 +1054,28 @@ class HospitalApp(tk.Tk):
         card.pack(fill="both", expand=True)
         card.pack_propagate(False)
 
+        header = tk.Frame(card, bg=BG_CARD)
+        header.pack(fill="x", padx=15, pady=(8, 0))
+
         tk.Label(
-            card,
+            header,
             text="Doctor Schedule",
             font=FONT_SUBTITLE,
             bg=BG_CARD,
-        ).pack(anchor="w", padx=15, pady=(8, 0))
+        ).pack(side="left")
+
+        # "All doctors" shows today; picking a doctor shows their week
+        all_doctors = "All doctors - today"
+        doctor_ids = {}
+        doctor_var = tk.StringVar(value=all_doctors)
+        doctor_combo = ttk.Combobox(
+            header,
+            textvariable=doctor_var,
+            values=[all_doctors],
+            state="readonly",
+            width=28,
+        )
+        doctor_combo.pack(side="right")
 
         columns = ("Time", "Doctor Name", "Duty / Notes")
         tree = ttk.Treeview(
@@ -710,15 +1094,62 @@ class HospitalApp(tk.Tk):
             tree.heading(col, text=col)
             tree.column(col, width=150, anchor="center")
 
-        data = [
-            ("8:00-10:00", "Dr. Sharma", "Outpatient consultants"),
-            ("10:00-12:00", "Dr. Koirala", "Routine checks, IP rounds"),
-            ("12:00-2:00", "Dr. Singh", "Surgery / OT duty"),
-            ("2:00-5:00", "Dr. Thapa", "Follow-up appointments"),
-        ]
+        # iid -> values currently in the tree, so a refresh only touches
+        # the rows that were added, changed or removed
+        shown_rows = {}
+
+        def show_rows(rows, with_day=False):
+            if not tree.winfo_exists():
+                return
+            wanted = {}
+            for appt_id, starts_at, ends_at, doctor_name, notes in rows:
+                slot = schedule.format_slot(starts_at, ends_at, with_day)
+                wanted[str(appt_id)] = (slot, doctor_name, notes)
+            if not rows:
+                wanted["empty"] = ("", "No appointments", "")
+
+            for iid in list(shown_rows):
+                if iid not in wanted:
+                    tree.delete(iid)
+                    del shown_rows[iid]
+            for index, (iid, values) in enumerate(wanted.items()):
+                if iid not in shown_rows:
+                    tree.insert("", index, iid=iid, values=values)
+                else:
+                    if shown_rows[iid] != values:
+                        tree.item(iid, values=values)
+                    if tree.index(iid) != index:
+                        tree.move(iid, "", index)
+                shown_rows[iid] = values
+
+        def fill_doctors(doctors):
+            for doctor_id, name in doctors:
+                doctor_ids[name + " - this week"] = doctor_id
+            if doctor_combo.winfo_exists():
+                doctor_combo.config(values=[all_doctors] + list(doctor_ids))
+
+        def load(event=None, paint=show_rows):
+            doctor_id = doctor_ids.get(doctor_var.get())
+            if doctor_id is None:
+                self.repo.submit(self.appointments_today, on_success=paint)
+            else:
+                self.repo.submit(
+                    self.doctor_week,
+                    doctor_id,
+                    on_success=lambda rows: paint(rows, True),
+                )
 
-        for row in data:
-            tree.insert("", "end", values=row)
+        def refresh(changed):
+            # The visible window is a day or a week, so re-reading it and
+            # diffing in show_rows is cheap
+            if "doctors" in changed:
+                self.repo.submit(self.list_doctors, on_success=lambda d: self.feed.paint(fill_doctors, d))
+            load(paint=lambda *args: self.feed.paint(show_rows, *args))
+
+        doctor_combo.bind("<<ComboboxSelected>>", load)
+        self.repo.submit(self.list_doctors, on_success=fill_doctors)
+        load()
+        self.feed.watch(("appointments", "doctors"), refresh)
 
     def show_settings(self):
         self.clear_content()
@@ -790,14 +1221,36 @@ class HospitalApp(tk.Tk):
         )
         btn.pack(pady=(0, 20), ipadx=20, ipady=6)
 
+    def on_close(self):
+        sql_log.info("%s", sql_stats.STATS.report())
+        self.feed.stop()
+        if self.backups is not None:
+            self.backups.stop()
+        self.repo.shutdown()
+        self.audit.close()
+        if self.writer is not None:
+            self.writer.close()
+        self.storage.close()
+        if self.db_pool is not None:
+            self.db_pool.close_all()
+        self.destroy()
+
     def logout(self):
         result = messagebox.askyesno("Logout", "Are you sure you want to logout?")
         if result:
+            self.audit.record("logout", self.current_user)
+            self.audit.flush()
+            self.session = None
+            self.feed.unwatch()
             self.title("NIMA Hospital - Login")
             self.configure(bg=LOGIN_BG)
             self.show_login_page()
 
 
 if __name__ == "__main__":
-    app = HospitalApp()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(levelname)s %(message)s")
+    # NIMA_API=host:port (or unix:/path) runs this terminal against api_service.py,
+    # authenticating with the shared NIMA_API_TOKEN
+    api_address = os.environ.get("NIMA_API")
+    app = HospitalApp(RemoteStorage(api_address) if api_address else None)
     app.mainloop()
@@ -0,0 +1,104 @@
+"""
+Messages - persistent staff messages with keyset paging and FTS5 search
+
+Paging and search past the oldest hot message continue into the archive
+files (archive.py); new-message polling only covers hot messages.
+"""
+from datetime import datetime
+
+import archive
+from schedule import to_local
+from timestamps import TIMESTAMP_FORMAT
+
+PAGE_SIZE = 50
+
+# Keyset pagination: each page continues below the smallest id already
+# shown, so fetching page N costs the same as page 1
+RECENT_SELECT = """
+    SELECT id, sender, body, created_at FROM {t}
+    WHERE id < :before_id
+"""
+# Newest first: (result column, descending) for archive.select
+RECENT_ORDER = ((1, True),)
+RECENT_SQL = RECENT_SELECT.format(t="messages") + """
+    ORDER BY 1 DESC
+    LIMIT :limit
+"""
+# {t}_fts is the FTS index beside each copy of messages; its hidden
+# column, named after the table, takes the MATCH in every schema
+SEARCH_SELECT = """
+    SELECT m.id, m.sender, m.body, m.created_at
+    FROM {t}_fts f JOIN {t} m ON m.id = f.rowid
+    WHERE f.messages_fts MATCH :query AND f.rowid < :before_id
+"""
+SEARCH_SQL = SEARCH_SELECT.format(t="messages") + """
+    ORDER BY f.rowid DESC
+    LIMIT :limit
+"""
+NEWER_SQL = """
+    SELECT id, sender, body, created_at FROM messages
+    WHERE id > ?
+    ORDER BY id
+    LIMIT ?
+"""
+NO_CURSOR = 2 ** 63 - 1
+
+
+def recent_messages(conn, before_id=None, limit=PAGE_SIZE):
+    params = {"before_id": before_id or NO_CURSOR, "limit": limit}
+    rows = conn.execute(RECENT_SQL, params).fetchall()
+    if len(rows) < limit and archive.archived_before(conn, "messages") is not None:
+        # Ran out of hot messages: include the archives
+        rows = archive.select(conn, "messages", None, RECENT_SELECT, params, RECENT_ORDER, limit)
+    return rows
+
+
+def messages_after(conn, after_id=None, limit=PAGE_SIZE):
+    # Oldest first: what arrived since the newest message on screen
+    return conn.execute(NEWER_SQL, (after_id or 0, limit)).fetchall()
+
+
+def fts_query(text):
+    # Quote each word so user input is never parsed as FTS5 syntax; the
+    # last word is a prefix so results appear while it is still typed
+    terms = ['"' + word.replace('"', '""') + '"' for word in text.split()]
+    if not terms:
+        return None
+    terms[-1] += "*"
+    return " ".join(terms)
+
+
+def search_messages(conn, text, before_id=None, limit=PAGE_SIZE):
+    query = fts_query(text)
+    if query is None:
+        return []
+    params = {"query": query, "before_id": before_id or NO_CURSOR, "limit": limit}
+    rows = conn.execute(SEARCH_SQL, params).fetchall()
+    if len(rows) < limit and archive.archived_before(conn, "messages") is not None:
+        rows = archive.select(
+            conn, "messages", None, SEARCH_SELECT, params, RECENT_ORDER, limit,
+            tables=("messages", "messages_fts"),
+        )
+    return rows
+
+
+def post_message(conn, sender, body):
+    with conn:
+        cursor = conn.execute(
+            "INSERT INTO messages (sender, body) VALUES (?, ?)",
+            (sender, body),
+        )
+    return conn.execute(
+        "SELECT id, sender, body, created_at FROM messages WHERE id = ?",
+        (cursor.lastrowid,),
+    ).fetchone()
+
+
+def format_message(row):
+    _, sender, body, created_at = row
+    when = to_local(datetime.strptime(created_at, TIMESTAMP_FORMAT))
+    return f"[{when:%Y-%m-%d %H:%M}] {sender}: {body}"
+
+
+if __name__ == "__main__":
+    print("messages.py is a support module. Run main_app.py for the full application.")
@@ -0,0 +1,69 @@
+"""
+Migrate - versioned schema upgrades tracked in PRAGMA user_version
+
+Usage (headless):
+    python migrate.py [path/to/hospital.db]
+"""
+import importlib
+import os
+import sqlite3
+import sys
+
+MIGRATIONS_PACKAGE = "migrations"
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), MIGRATIONS_PACKAGE)
+
+
+def discover():
+    # Only file names are read here; modules are imported when pending
+    found = []
+    for filename in os.listdir(MIGRATIONS_DIR):
+        stem, ext = os.path.splitext(filename)
+        number = stem.split("_", 1)[0]
+        if ext == ".py" and number.isdigit():
+            found.append((int(number), stem))
+    found.sort()
+    return found
+
+
+def latest_version():
+    found = discover()
+    return found[-1][0] if found else 0
+
+
+def current_version(conn):
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrate(conn):
+    """Apply every pending migration in one transaction.
+
+    Returns the number of migrations applied. On an up-to-date database
+    this is a single PRAGMA read and no DDL runs at all.
+    """
+    found = discover()
+    if not found or current_version(conn) >= found[-1][0]:
+        return 0
+
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        # Another process may have migrated while we waited for the lock
+        version = current_version(conn)
+        pending = [(number, stem) for number, stem in found if number > version]
+        for number, stem in pending:
+            module = importlib.import_module(f"{MIGRATIONS_PACKAGE}.{stem}")
+            module.upgrade(conn)
+            conn.execute(f"PRAGMA user_version = {number}")
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return len(pending)
+
+
+if __name__ == "__main__":
+    db_path = sys.argv[1] if len(sys.argv) > 1 else os.path.join(
+        os.path.dirname(os.path.abspath(__file__)), "hospital.db"
+    )
+    with sqlite3.connect(db_path) as conn:
+        applied = migrate(conn)
+        print(f"{db_path}: applied {applied} migration(s), schema version {current_version(conn)}")
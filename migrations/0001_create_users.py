@@ -0,0 +1,23 @@
+"""Users table and the seeded administrator account."""
+
+
+def upgrade(conn):
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username TEXT NOT NULL UNIQUE,
+            password TEXT NOT NULL,
+            email TEXT NOT NULL UNIQUE,
+            full_name TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """
+    )
+    conn.execute(
+        """
+        INSERT OR IGNORE INTO users (username, password, email, full_name)
+        VALUES (?, ?, ?, ?)
+        """,
+        ("admin", "password", "admin@nima-hospital.com", "Administrator"),
+    )
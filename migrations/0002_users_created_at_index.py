@@ -0,0 +1,5 @@
+"""Index users by creation time for range exports and reports."""
+
+
+def upgrade(conn):
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_users_created_at ON users(created_at)")
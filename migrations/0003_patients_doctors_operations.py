@@ -0,0 +1,56 @@
+"""Patients, doctors and operations, indexed for the dashboard counters."""
+
+
+def upgrade(conn):
+    conn.execute(
+        """
+        CREATE TABLE patients (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            full_name TEXT NOT NULL,
+            date_of_birth TEXT,
+            gender TEXT,
+            phone TEXT,
+            status TEXT NOT NULL DEFAULT 'admitted',
+            created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+        )
+        """
+    )
+    conn.execute(
+        """
+        CREATE TABLE doctors (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            full_name TEXT NOT NULL,
+            specialty TEXT,
+            active INTEGER NOT NULL DEFAULT 1,
+            created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+        )
+        """
+    )
+    conn.execute(
+        """
+        CREATE TABLE operations (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            patient_id INTEGER NOT NULL REFERENCES patients(id),
+            doctor_id INTEGER NOT NULL REFERENCES doctors(id),
+            procedure TEXT NOT NULL,
+            scheduled_at TIMESTAMP NOT NULL,
+            status TEXT NOT NULL DEFAULT 'scheduled'
+        )
+        """
+    )
+
+    # "New patients today" is a range count over created_at
+    conn.execute("CREATE INDEX idx_patients_created_at ON patients(created_at)")
+    conn.execute("CREATE INDEX idx_doctors_active ON doctors(active)")
+    conn.execute("CREATE INDEX idx_operations_scheduled_at ON operations(scheduled_at)")
+    conn.execute("CREATE INDEX idx_operations_doctor ON operations(doctor_id, scheduled_at)")
+
+    conn.executemany(
+        "INSERT INTO doctors (full_name, specialty) VALUES (?, ?)",
+        [
+            ("Dr. Sharma", "Outpatient"),
+            ("Dr. Koirala", "Internal Medicine"),
+            ("Dr. Singh", "Surgery"),
+            ("Dr. Manish Thapa", "General Medicine"),
+        ],
+    )
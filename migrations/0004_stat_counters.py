@@ -0,0 +1,109 @@
+"""Trigger-maintained counters so dashboard cards are a primary-key read.
+
+Daily metrics are bucketed by UTC date ('YYYY-MM-DD'); running totals use
+the empty bucket.
+"""
+
+TRIGGERS = [
+    # patients: one bucket per creation day
+    """
+    CREATE TRIGGER trg_patients_count_insert AFTER INSERT ON patients BEGIN
+        INSERT INTO stat_counters (metric, bucket, value)
+        VALUES ('patients', date(NEW.created_at), 1)
+        ON CONFLICT (metric, bucket) DO UPDATE SET value = value + 1;
+    END
+    """,
+    """
+    CREATE TRIGGER trg_patients_count_delete AFTER DELETE ON patients BEGIN
+        UPDATE stat_counters SET value = value - 1
+        WHERE metric = 'patients' AND bucket = date(OLD.created_at);
+    END
+    """,
+    """
+    CREATE TRIGGER trg_patients_count_update AFTER UPDATE OF created_at ON patients
+    WHEN date(OLD.created_at) IS NOT date(NEW.created_at) BEGIN
+        UPDATE stat_counters SET value = value - 1
+        WHERE metric = 'patients' AND bucket = date(OLD.created_at);
+        INSERT INTO stat_counters (metric, bucket, value)
+        VALUES ('patients', date(NEW.created_at), 1)
+        ON CONFLICT (metric, bucket) DO UPDATE SET value = value + 1;
+    END
+    """,
+    # doctors: a single running total of active doctors
+    """
+    CREATE TRIGGER trg_doctors_count_insert AFTER INSERT ON doctors WHEN NEW.active BEGIN
+        UPDATE stat_counters SET value = value + 1 WHERE metric = 'doctors' AND bucket = '';
+    END
+    """,
+    """
+    CREATE TRIGGER trg_doctors_count_delete AFTER DELETE ON doctors WHEN OLD.active BEGIN
+        UPDATE stat_counters SET value = value - 1 WHERE metric = 'doctors' AND bucket = '';
+    END
+    """,
+    """
+    CREATE TRIGGER trg_doctors_count_update AFTER UPDATE OF active ON doctors
+    WHEN (OLD.active != 0) IS NOT (NEW.active != 0) BEGIN
+        UPDATE stat_counters SET value = value + CASE WHEN NEW.active THEN 1 ELSE -1 END
+        WHERE metric = 'doctors' AND bucket = '';
+    END
+    """,
+    # operations: one bucket per scheduled day
+    """
+    CREATE TRIGGER trg_operations_count_insert AFTER INSERT ON operations BEGIN
+        INSERT INTO stat_counters (metric, bucket, value)
+        VALUES ('operations', date(NEW.scheduled_at), 1)
+        ON CONFLICT (metric, bucket) DO UPDATE SET value = value + 1;
+    END
+    """,
+    """
+    CREATE TRIGGER trg_operations_count_delete AFTER DELETE ON operations BEGIN
+        UPDATE stat_counters SET value = value - 1
+        WHERE metric = 'operations' AND bucket = date(OLD.scheduled_at);
+    END
+    """,
+    """
+    CREATE TRIGGER trg_operations_count_update AFTER UPDATE OF scheduled_at ON operations
+    WHEN date(OLD.scheduled_at) IS NOT date(NEW.scheduled_at) BEGIN
+        UPDATE stat_counters SET value = value - 1
+        WHERE metric = 'operations' AND bucket = date(OLD.scheduled_at);
+        INSERT INTO stat_counters (metric, bucket, value)
+        VALUES ('operations', date(NEW.scheduled_at), 1)
+        ON CONFLICT (metric, bucket) DO UPDATE SET value = value + 1;
+    END
+    """,
+]
+
+
+def upgrade(conn):
+    conn.execute(
+        """
+        CREATE TABLE stat_counters (
+            metric TEXT NOT NULL,
+            bucket TEXT NOT NULL DEFAULT '',
+            value INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (metric, bucket)
+        ) WITHOUT ROWID
+        """
+    )
+    for sql in TRIGGERS:
+        conn.execute(sql)
+
+    # Backfill from whatever rows already exist
+    conn.execute(
+        """
+        INSERT INTO stat_counters (metric, bucket, value)
+        SELECT 'doctors', '', COUNT(*) FROM doctors WHERE active
+        """
+    )
+    conn.execute(
+        """
+        INSERT INTO stat_counters (metric, bucket, value)
+        SELECT 'patients', date(created_at), COUNT(*) FROM patients GROUP BY 2
+        """
+    )
+    conn.execute(
+        """
+        INSERT INTO stat_counters (metric, bucket, value)
+        SELECT 'operations', date(scheduled_at), COUNT(*) FROM operations GROUP BY 2
+        """
+    )
@@ -0,0 +1,26 @@
+"""Appointments and duty shifts per doctor, indexed for time-range queries.
+
+An appointment may last at most one day. Range queries rely on that bound
+to turn "overlaps [start, end)" into a bounded scan of the starts_at index.
+"""
+
+
+def upgrade(conn):
+    conn.execute(
+        """
+        CREATE TABLE appointments (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            doctor_id INTEGER NOT NULL REFERENCES doctors(id),
+            patient_id INTEGER REFERENCES patients(id),
+            starts_at TIMESTAMP NOT NULL,
+            ends_at TIMESTAMP NOT NULL,
+            notes TEXT NOT NULL DEFAULT '',
+            CHECK (ends_at > starts_at),
+            CHECK (julianday(ends_at) - julianday(starts_at) <= 1)
+        )
+        """
+    )
+    # "What is on today" scans starts_at; "Dr. X this week" seeks on the
+    # doctor and scans that doctor's slice in time order
+    conn.execute("CREATE INDEX idx_appointments_starts_at ON appointments(starts_at)")
+    conn.execute("CREATE INDEX idx_appointments_doctor ON appointments(doctor_id, starts_at)")
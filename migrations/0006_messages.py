@@ -0,0 +1,57 @@
+"""Persistent staff messages with an FTS5 full-text index."""
+
+
+def upgrade(conn):
+    conn.execute(
+        """
+        CREATE TABLE messages (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            sender TEXT NOT NULL,
+            body TEXT NOT NULL,
+            created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+        )
+        """
+    )
+    conn.execute("CREATE INDEX idx_messages_created_at ON messages(created_at)")
+
+    # External-content FTS table: the text lives once, in messages
+    conn.execute(
+        """
+        CREATE VIRTUAL TABLE messages_fts USING fts5(
+            body, sender, content='messages', content_rowid='id'
+        )
+        """
+    )
+    conn.execute(
+        """
+        CREATE TRIGGER trg_messages_fts_insert AFTER INSERT ON messages BEGIN
+            INSERT INTO messages_fts (rowid, body, sender) VALUES (NEW.id, NEW.body, NEW.sender);
+        END
+        """
+    )
+    conn.execute(
+        """
+        CREATE TRIGGER trg_messages_fts_delete AFTER DELETE ON messages BEGIN
+            INSERT INTO messages_fts (messages_fts, rowid, body, sender)
+            VALUES ('delete', OLD.id, OLD.body, OLD.sender);
+        END
+        """
+    )
+    conn.execute(
+        """
+        CREATE TRIGGER trg_messages_fts_update AFTER UPDATE ON messages BEGIN
+            INSERT INTO messages_fts (messages_fts, rowid, body, sender)
+            VALUES ('delete', OLD.id, OLD.body, OLD.sender);
+            INSERT INTO messages_fts (rowid, body, sender) VALUES (NEW.id, NEW.body, NEW.sender);
+        END
+        """
+    )
+
+    conn.executemany(
+        "INSERT INTO messages (sender, body) VALUES (?, ?)",
+        [
+            ("Patient #1003", "Requesting appointment reschedule."),
+            ("Lab", "Blood report ready for Mr. Koirala."),
+            ("Admin", "Staff meeting at 3:00 PM in Conference Room."),
+        ],
+    )
@@ -0,0 +1,52 @@
+"""Prefix-indexed FTS5 tables behind the topbar search box.
+
+Each searchable table gets an external-content FTS5 index kept current by
+triggers, so new rows are searchable as soon as they are committed. The
+prefix option stores 1-3 character prefixes so typeahead queries like
+'ko*' are index seeks instead of term scans.
+"""
+
+SOURCES = {
+    "users": ("username", "full_name", "email"),
+    "doctors": ("full_name", "specialty"),
+    "patients": ("full_name", "phone"),
+}
+
+
+def upgrade(conn):
+    for table, columns in SOURCES.items():
+        fts = f"{table}_fts"
+        cols = ", ".join(columns)
+        new_cols = ", ".join(f"NEW.{c}" for c in columns)
+        old_cols = ", ".join(f"OLD.{c}" for c in columns)
+
+        conn.execute(
+            f"""
+            CREATE VIRTUAL TABLE {fts} USING fts5(
+                {cols}, content='{table}', content_rowid='id', prefix='1 2 3'
+            )
+            """
+        )
+        conn.execute(
+            f"""
+            CREATE TRIGGER trg_{fts}_insert AFTER INSERT ON {table} BEGIN
+                INSERT INTO {fts} (rowid, {cols}) VALUES (NEW.id, {new_cols});
+            END
+            """
+        )
+        conn.execute(
+            f"""
+            CREATE TRIGGER trg_{fts}_delete AFTER DELETE ON {table} BEGIN
+                INSERT INTO {fts} ({fts}, rowid, {cols}) VALUES ('delete', OLD.id, {old_cols});
+            END
+            """
+        )
+        conn.execute(
+            f"""
+            CREATE TRIGGER trg_{fts}_update AFTER UPDATE OF {cols} ON {table} BEGIN
+                INSERT INTO {fts} ({fts}, rowid, {cols}) VALUES ('delete', OLD.id, {old_cols});
+                INSERT INTO {fts} (rowid, {cols}) VALUES (NEW.id, {new_cols});
+            END
+            """
+        )
+        conn.execute(f"INSERT INTO {fts} ({fts}) VALUES ('rebuild')")
@@ -0,0 +1,65 @@
+"""Per-user notifications with a trigger-maintained unread counter."""
+
+
+def upgrade(conn):
+    conn.execute(
+        """
+        CREATE TABLE notifications (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username TEXT NOT NULL,
+            message TEXT NOT NULL,
+            created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            read_at TIMESTAMP
+        )
+        """
+    )
+    # Only unread rows are indexed, so the popup and "Clear all" touch the
+    # unread tail no matter how much read history a user has
+    conn.execute(
+        """
+        CREATE INDEX idx_notifications_unread ON notifications(username, id)
+        WHERE read_at IS NULL
+        """
+    )
+    conn.execute(
+        """
+        CREATE TABLE notification_counters (
+            username TEXT PRIMARY KEY,
+            unread INTEGER NOT NULL DEFAULT 0
+        ) WITHOUT ROWID
+        """
+    )
+    conn.execute(
+        """
+        CREATE TRIGGER trg_notifications_unread_insert AFTER INSERT ON notifications
+        WHEN NEW.read_at IS NULL BEGIN
+            INSERT INTO notification_counters (username, unread) VALUES (NEW.username, 1)
+            ON CONFLICT (username) DO UPDATE SET unread = unread + 1;
+        END
+        """
+    )
+    conn.execute(
+        """
+        CREATE TRIGGER trg_notifications_unread_read AFTER UPDATE OF read_at ON notifications
+        WHEN OLD.read_at IS NULL AND NEW.read_at IS NOT NULL BEGIN
+            UPDATE notification_counters SET unread = unread - 1 WHERE username = NEW.username;
+        END
+        """
+    )
+    conn.execute(
+        """
+        CREATE TRIGGER trg_notifications_unread_delete AFTER DELETE ON notifications
+        WHEN OLD.read_at IS NULL BEGIN
+            UPDATE notification_counters SET unread = unread - 1 WHERE username = OLD.username;
+        END
+        """
+    )
+
+    conn.executemany(
+        "INSERT INTO notifications (username, message) VALUES ('admin', ?)",
+        [
+            ("2 new patients registered.",),
+            ("Lab report ready for Patient #1021.",),
+            ("Staff meeting at 3:00 PM.",),
+        ],
+    )
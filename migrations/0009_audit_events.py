@@ -0,0 +1,17 @@
+"""Append-only audit trail for authentication events."""
+
+
+def upgrade(conn):
+    conn.execute(
+        """
+        CREATE TABLE audit_events (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            ts TIMESTAMP NOT NULL,
+            username TEXT,
+            event TEXT NOT NULL,
+            detail TEXT NOT NULL DEFAULT ''
+        )
+        """
+    )
+    conn.execute("CREATE INDEX idx_audit_events_user_ts ON audit_events(username, ts)")
+    conn.execute("CREATE INDEX idx_audit_events_ts ON audit_events(ts)")
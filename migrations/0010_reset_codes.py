@@ -0,0 +1,14 @@
+"""Outstanding password reset codes, so they survive a restart."""
+
+
+def upgrade(conn):
+    conn.execute(
+        """
+        CREATE TABLE reset_codes (
+            email TEXT PRIMARY KEY,
+            code TEXT NOT NULL,
+            expires_at REAL NOT NULL
+        ) WITHOUT ROWID
+        """
+    )
+    conn.execute("CREATE INDEX idx_reset_codes_expires_at ON reset_codes(expires_at)")
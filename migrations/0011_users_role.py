@@ -0,0 +1,6 @@
+"""Give every account a role; the seeded admin is the only administrator."""
+
+
+def upgrade(conn):
+    conn.execute("ALTER TABLE users ADD COLUMN role TEXT NOT NULL DEFAULT 'staff'")
+    conn.execute("UPDATE users SET role = 'admin' WHERE username = 'admin'")
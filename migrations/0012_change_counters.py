@@ -0,0 +1,27 @@
+"""Per-table change counters, bumped by triggers, for the UI change feed."""
+
+TRACKED_TABLES = ("patients", "doctors", "operations", "appointments", "messages", "notifications")
+
+
+def upgrade(conn):
+    conn.execute(
+        """
+        CREATE TABLE change_counters (
+            tbl TEXT PRIMARY KEY,
+            version INTEGER NOT NULL DEFAULT 0
+        ) WITHOUT ROWID
+        """
+    )
+    conn.executemany(
+        "INSERT INTO change_counters (tbl) VALUES (?)",
+        [(table,) for table in TRACKED_TABLES],
+    )
+    for table in TRACKED_TABLES:
+        for op in ("INSERT", "UPDATE", "DELETE"):
+            conn.execute(
+                f"""
+                CREATE TRIGGER trg_{table}_changes_{op.lower()} AFTER {op} ON {table} BEGIN
+                    UPDATE change_counters SET version = version + 1 WHERE tbl = '{table}';
+                END
+                """
+            )
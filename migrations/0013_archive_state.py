@@ -0,0 +1,12 @@
+"""How far back each archived table has been moved into per-year archive files."""
+
+
+def upgrade(conn):
+    conn.execute(
+        """
+        CREATE TABLE archive_state (
+            tbl TEXT PRIMARY KEY,
+            archived_before TIMESTAMP NOT NULL
+        ) WITHOUT ROWID
+        """
+    )
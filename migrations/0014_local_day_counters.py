@@ -0,0 +1,52 @@
+"""Bucket the daily dashboard counters by local calendar day instead of UTC.
+
+Timestamps stay UTC; only the bucket key moves. 'localtime' is the time
+zone of the process running the statement, so every terminal and the API
+service are expected to run in the hospital's zone.
+"""
+
+DAILY = {"patients": "created_at", "operations": "scheduled_at"}
+
+
+def upgrade(conn):
+    for table, column in DAILY.items():
+        for op in ("insert", "delete", "update"):
+            conn.execute(f"DROP TRIGGER trg_{table}_count_{op}")
+        new_day = f"date(NEW.{column}, 'localtime')"
+        old_day = f"date(OLD.{column}, 'localtime')"
+        conn.execute(
+            f"""
+            CREATE TRIGGER trg_{table}_count_insert AFTER INSERT ON {table} BEGIN
+                INSERT INTO stat_counters (metric, bucket, value)
+                VALUES ('{table}', {new_day}, 1)
+                ON CONFLICT (metric, bucket) DO UPDATE SET value = value + 1;
+            END
+            """
+        )
+        conn.execute(
+            f"""
+            CREATE TRIGGER trg_{table}_count_delete AFTER DELETE ON {table} BEGIN
+                UPDATE stat_counters SET value = value - 1
+                WHERE metric = '{table}' AND bucket = {old_day};
+            END
+            """
+        )
+        conn.execute(
+            f"""
+            CREATE TRIGGER trg_{table}_count_update AFTER UPDATE OF {column} ON {table}
+            WHEN {old_day} IS NOT {new_day} BEGIN
+                UPDATE stat_counters SET value = value - 1
+                WHERE metric = '{table}' AND bucket = {old_day};
+                INSERT INTO stat_counters (metric, bucket, value)
+                VALUES ('{table}', {new_day}, 1)
+                ON CONFLICT (metric, bucket) DO UPDATE SET value = value + 1;
+            END
+            """
+        )
+        conn.execute("DELETE FROM stat_counters WHERE metric = ?", (table,))
+        conn.execute(
+            f"""
+            INSERT INTO stat_counters (metric, bucket, value)
+            SELECT '{table}', date({column}, 'localtime'), COUNT(*) FROM {table} GROUP BY 2
+            """
+        )
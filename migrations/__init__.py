@@ -0,0 +1,7 @@
+"""
+Schema migrations for hospital.db
+
+Each module is named ``NNNN_description.py`` and defines ``upgrade(conn)``.
+Modules are applied in numeric order by ``migrate.migrate``; the number of
+the last applied module is stored in ``PRAGMA user_version``.
+"""
@@ -0,0 +1,53 @@
+"""
+Notifications - persistent per-user notification queue
+"""
+
+PAGE_SIZE = 100
+
+
+def add_notification(conn, username, message):
+    with conn:
+        cursor = conn.execute(
+            "INSERT INTO notifications (username, message) VALUES (?, ?)",
+            (username, message),
+        )
+    return cursor.lastrowid
+
+
+def unread_count(conn, username):
+    # Primary-key read of the trigger-maintained counter (migration 0008)
+    row = conn.execute(
+        "SELECT unread FROM notification_counters WHERE username = ?",
+        (username,),
+    ).fetchone()
+    return row[0] if row else 0
+
+
+def unread_since(conn, username, after_id=0, limit=PAGE_SIZE):
+    return conn.execute(
+        """
+        SELECT id, message, created_at FROM notifications
+        WHERE username = ? AND read_at IS NULL AND id > ?
+        ORDER BY id
+        LIMIT ?
+        """,
+        (username, after_id, limit),
+    ).fetchall()
+
+
+def mark_all_read(conn, username, up_to_id=None):
+    # up_to_id limits the update to what the user has actually seen, so a
+    # notification that lands while the popup is open stays unread
+    with conn:
+        cursor = conn.execute(
+            """
+            UPDATE notifications SET read_at = CURRENT_TIMESTAMP
+            WHERE username = ? AND read_at IS NULL AND id <= ?
+            """,
+            (username, up_to_id if up_to_id is not None else 2 ** 63 - 1),
+        )
+    return cursor.rowcount
+
+
+if __name__ == "__main__":
+    print("notifications.py is a support module. Run main_app.py for the full application.")
@@ -3,7 +3,7 @@
 PART 4/5 - Password Reset Pages (Forgot Password, Reset Code, New Password)
 Run Order: Fourth
 """
-from config import tk, messagebox, random, string, LOGIN_BG, LOGIN_CARD_BG, LOGIN_ACCENT, LOGIN_BUTTON, LOGIN_BG, BORDER, TEXT_MAIN, TEXT_MUTED, FONT_NORMAL, FONT_SMALL
+from config import tk, messagebox, LOGIN_BG, LOGIN_CARD_BG, LOGIN_ACCENT, LOGIN_BUTTON, LOGIN_BG, BORDER, TEXT_MAIN, TEXT_MUTED, FONT_NORMAL, FONT_SMALL
 from Authbase import Authbase
 
 class PasswordResetPages(Authbase):
@@ -70,20 +70,26 @@ class PasswordResetPages(Authbase):
                 messagebox.showerror("Error", "Please enter your email address")
                 return
 
-            username = self.app.find_user_by_email(email)
-
-            if username:
-                reset_code = ''.join(random.choices(string.digits, k=6))
-                self.app.reset_codes[email] = reset_code
-                
-                messagebox.showinfo(
-                    "Reset Code", 
-                    f"DEMO MODE - Reset code: {reset_code}\n\nIn a real application, this would be sent to your email."
-                )
-                
-                self.show_reset_code_page(email, username)
-            else:
-                messagebox.showerror("Error", "Email not found in our records")
+            def on_result(issued):
+                if issued:
+                    username, reset_code = issued
+
+                    if reset_code is None:
+                        messagebox.showinfo(
+                            "Reset Code",
+                            "A reset code has been sent.\n\nDEMO MODE - it is in the API service's log."
+                        )
+                    else:
+                        messagebox.showinfo(
+                            "Reset Code",
+                            f"DEMO MODE - Reset code: {reset_code}\n\nIn a real application, this would be sent to your email."
+                        )
+
+                    self.show_reset_code_page(email, username)
+                else:
+                    messagebox.showerror("Error", "Email not found in our records")
+
+            self.run_async(send_button, self.app.issue_reset_code, (email,), on_result)
 
         send_button = tk.Button(
             card_inner,
@@ -169,16 +175,18 @@ class PasswordResetPages(Authbase):
 
         def verify_code():
             entered_code = code_entry.get().strip()
-            stored_code = self.app.reset_codes.get(email)
             
             if not entered_code:
                 messagebox.showerror("Error", "Please enter the reset code")
                 return
             
-            if stored_code and entered_code == stored_code:
-                self.show_new_password_page(email, username)
-            else:
-                messagebox.showerror("Error", "Invalid reset code")
+            def on_result(valid):
+                if valid:
+                    self.show_new_password_page(email, username, entered_code)
+                else:
+                    messagebox.showerror("Error", "Invalid or expired reset code")
+
+            self.run_async(verify_button, self.app.verify_reset_code, (email, entered_code), on_result)
 
         verify_button = tk.Button(
             card_inner,
@@ -205,10 +213,14 @@ class PasswordResetPages(Authbase):
         )
         resend_link.pack(pady=(0, 15))
         
+        def show_resent(issued):
+            if issued and issued[1] is None:
+                messagebox.showinfo("Code Resent", "DEMO MODE - The new code is in the API service's log.")
+            elif issued:
+                messagebox.showinfo("Code Resent", f"DEMO MODE - New code: {issued[1]}")
+
         def resend_code():
-            new_code = ''.join(random.choices(string.digits, k=6))
-            self.app.reset_codes[email] = new_code
-            messagebox.showinfo("Code Resent", f"DEMO MODE - New code: {new_code}")
+            self.app.repo.submit(self.app.issue_reset_code, email, on_success=show_resent)
         
         resend_link.bind("<Button-1>", lambda e: resend_code())
 
@@ -224,7 +236,7 @@ class PasswordResetPages(Authbase):
         back_link.bind("<Button-1>", lambda e: self.app.show_login_page())
 
     # ------------- NEW PASSWORD PAGE -------------
-    def show_new_password_page(self, email, username):
+    def show_new_password_page(self, email, username, code):
         self.clear_window()
 
         main_container = tk.Frame(self.app, bg=LOGIN_BG)
@@ -319,15 +331,15 @@ class PasswordResetPages(Authbase):
                 messagebox.showerror("Error", "Password must be at least 6 characters")
                 return
 
-            if not self.app.update_user_password(username, newpass):
-                messagebox.showerror("Error", "Unable to update password for this user")
-                return
-            
-            if email in self.app.reset_codes:
-                del self.app.reset_codes[email]
-            
-            messagebox.showinfo("Success", "Password reset successful! Please login with your new password.")
-            self.app.show_login_page()
+            def on_result(updated):
+                if not updated:
+                    messagebox.showerror("Error", "Unable to update password for this user")
+                    return
+
+                messagebox.showinfo("Success", "Password reset successful! Please login with your new password.")
+                self.app.show_login_page()
+
+            self.run_async(reset_button, self.app.reset_password, (email, code, username, newpass), on_result)
 
         reset_button = tk.Button(
             card_inner,
@@ -0,0 +1,190 @@
+"""
+Passwords - salted KDF hashes with a cost calibrated to the host
+
+Stored values look like ``scrypt$16384$8$1$<salt>$<hash>`` (or
+``pbkdf2_sha256$<iterations>$<salt>$<hash>`` where hashlib has no scrypt).
+The cost is picked by timing the KDF on this machine so that one hash takes
+about NIMA_KDF_TARGET_MS (default 100 ms), never below a safe floor:
+scrypt N = MIN_SCRYPT_N (16 MB of memory per hash) or
+MIN_PBKDF2_ITERATIONS. The floor wins over the target, so a smaller
+target does not make hashes cheaper than that; on a slow host a hash at
+the floor can take longer than the target (about 60 ms on one core of
+the benchmark box).
+
+Hashing is CPU-bound and deliberately slow, so it runs on a worker pool
+with one thread per CPU (hashlib releases the GIL while it works), and
+concurrent logins only queue once every core is busy. Callers on the Tk
+thread must still go through app.repo so the window keeps repainting.
+
+Plain-text values left over from before hashing still verify, and
+verify() reports them (and hashes made at a lower cost) as needing a
+rehash, so the storage backends upgrade them on the next good login.
+"""
+import base64
+import hashlib
+import hmac
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+TARGET_MS = float(os.environ.get("NIMA_KDF_TARGET_MS", "100"))
+SCRYPT_R = 8
+SCRYPT_P = 1
+MIN_SCRYPT_N = 2 ** 14
+MIN_PBKDF2_ITERATIONS = 100_000
+SALT_BYTES = 16
+KEY_BYTES = 32
+HASH_WORKERS = os.cpu_count() or 1
+
+HAVE_SCRYPT = hasattr(hashlib, "scrypt")
+
+
+def b64(data):
+    return base64.b64encode(data).decode("ascii")
+
+
+def scrypt(password, salt, n, r=SCRYPT_R, p=SCRYPT_P):
+    # maxmem must cover the 128 * r * n bytes scrypt allocates
+    return hashlib.scrypt(
+        password.encode("utf-8"), salt=salt, n=n, r=r, p=p,
+        maxmem=256 * r * n, dklen=KEY_BYTES,
+    )
+
+
+def pbkdf2(password, salt, iterations):
+    return hashlib.pbkdf2_hmac("sha256", password.encode("utf-8"), salt, iterations, KEY_BYTES)
+
+
+def parse(stored):
+    """Returns (scheme, cost, params, salt, digest), or None for plain text."""
+    parts = stored.split("$")
+    try:
+        if parts[0] == "scrypt" and len(parts) == 6:
+            n, r, p = int(parts[1]), int(parts[2]), int(parts[3])
+            return "scrypt", n, (n, r, p), base64.b64decode(parts[4]), base64.b64decode(parts[5])
+        if parts[0] == "pbkdf2_sha256" and len(parts) == 4:
+            iterations = int(parts[1])
+            return "pbkdf2_sha256", iterations, (iterations,), base64.b64decode(parts[2]), base64.b64decode(parts[3])
+    except ValueError:
+        pass
+    return None
+
+
+def is_hashed(stored):
+    return parse(stored) is not None
+
+
+def calibrate(target_ms=TARGET_MS, scheme=None):
+    """Time the KDF here and return (scheme, cost) for about target_ms a hash."""
+    scheme = scheme or ("scrypt" if HAVE_SCRYPT else "pbkdf2_sha256")
+    salt = os.urandom(SALT_BYTES)
+    if scheme == "scrypt":
+        # Cost doubles with n, so double until the next step would overshoot
+        n = 2 ** 10
+        while True:
+            start = time.perf_counter()
+            scrypt("calibrate", salt, n)
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            if elapsed_ms * 2 > target_ms or n >= 2 ** 20:
+                break
+            n *= 2
+        return scheme, max(n, MIN_SCRYPT_N)
+
+    probe = 20_000
+    start = time.perf_counter()
+    pbkdf2("calibrate", salt, probe)
+    per_iteration_ms = (time.perf_counter() - start) * 1000 / probe
+    return scheme, max(int(target_ms / per_iteration_ms), MIN_PBKDF2_ITERATIONS)
+
+
+class PasswordHasher:
+    """Hashes and verifies passwords on its own thread pool.
+
+    The cost is calibrated lazily on first use (a few hundred ms, once per
+    hasher) unless ``cost`` is given.
+    """
+
+    def __init__(self, target_ms=TARGET_MS, scheme=None, cost=None, workers=HASH_WORKERS):
+        self.target_ms = target_ms
+        self.scheme = scheme or ("scrypt" if HAVE_SCRYPT else "pbkdf2_sha256")
+        self._cost = cost
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="kdf")
+        # Verified against for unknown usernames so a miss costs as much as a hit
+        self._dummy = None
+
+    @property
+    def cost(self):
+        if self._cost is None:
+            with self._lock:
+                if self._cost is None:
+                    self._cost = calibrate(self.target_ms, self.scheme)[1]
+        return self._cost
+
+    def _hash(self, password):
+        salt = os.urandom(SALT_BYTES)
+        if self.scheme == "scrypt":
+            digest = scrypt(password, salt, self.cost)
+            return f"scrypt${self.cost}${SCRYPT_R}${SCRYPT_P}${b64(salt)}${b64(digest)}"
+        digest = pbkdf2(password, salt, self.cost)
+        return f"pbkdf2_sha256${self.cost}${b64(salt)}${b64(digest)}"
+
+    def _verify(self, password, stored):
+        parsed = parse(stored)
+        if parsed is None:
+            # Legacy plain-text value
+            ok = hmac.compare_digest(stored.encode("utf-8"), password.encode("utf-8"))
+            return ok, ok
+        scheme, cost, params, salt, digest = parsed
+        if scheme == "scrypt":
+            candidate = scrypt(password, salt, *params)
+        else:
+            candidate = pbkdf2(password, salt, *params)
+        ok = hmac.compare_digest(candidate, digest)
+        return ok, ok and self._weaker(scheme, cost)
+
+    def _weaker(self, scheme, cost):
+        return scheme != self.scheme or cost < self.cost
+
+    def hash(self, password):
+        return self._pool.submit(self._hash, password).result()
+
+    def hash_many(self, passwords):
+        return list(self._pool.map(self._hash, passwords))
+
+    def verify(self, password, stored):
+        """Returns (matches, needs_rehash); stored=None burns one hash and fails."""
+        if stored is None:
+            if self._dummy is None:
+                self._dummy = self.hash("unknown user")
+            self._pool.submit(self._verify, password, self._dummy).result()
+            return False, False
+        return self._pool.submit(self._verify, password, stored).result()
+
+    def needs_rehash(self, stored):
+        parsed = parse(stored)
+        return parsed is None or self._weaker(parsed[0], parsed[1])
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False)
+
+
+_default = None
+_default_lock = threading.Lock()
+
+
+def default_hasher():
+    """Process-wide hasher shared by the storage backends."""
+    global _default
+    with _default_lock:
+        if _default is None:
+            _default = PasswordHasher()
+        return _default
+
+
+if __name__ == "__main__":
+    target = float(sys.argv[1]) if len(sys.argv) > 1 else TARGET_MS
+    scheme, cost = calibrate(target)
+    print(f"{scheme} cost {cost} for a {target:.0f} ms target")
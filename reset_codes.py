@@ -0,0 +1,160 @@
+"""
+Reset Codes - bounded, expiring store for password reset codes
+
+Codes live in an OrderedDict keyed by email. Every code gets the same
+TTL, so insertion order is also expiry order: expired codes are always at
+the front and a sweep only touches the entries it removes. Issuing a code
+first drops expired entries from the front and then, at capacity, evicts
+the oldest live one, so memory stays flat however many resets are
+requested. A code survives MAX_ATTEMPTS wrong guesses; the next one
+discards it, so a six-digit code can't be found by trying them all.
+With a connection pool the store also writes through to the
+reset_codes table (migration 0010) and reloads live codes on start-up.
+Given a DatabaseWriter those writes are queued to it instead, so issuing
+a code on the Tk thread never waits on the write lock; memory stays the
+source of truth either way.
+"""
+import hmac
+import secrets
+import threading
+import time
+from collections import OrderedDict
+
+RESET_CODE_TTL = 15 * 60
+RESET_CODE_CAPACITY = 10_000
+CODE_DIGITS = 6
+MAX_ATTEMPTS = 5
+
+
+def store_code(conn, email, code, expires_at, evicted=()):
+    with conn:
+        conn.execute(
+            "INSERT OR REPLACE INTO reset_codes (email, code, expires_at) VALUES (?, ?, ?)",
+            (email, code, expires_at),
+        )
+        if evicted:
+            conn.executemany("DELETE FROM reset_codes WHERE email = ?", [(e,) for e in evicted])
+
+
+def delete_code(conn, email):
+    with conn:
+        conn.execute("DELETE FROM reset_codes WHERE email = ?", (email,))
+
+
+def delete_expired(conn, now):
+    with conn:
+        conn.execute("DELETE FROM reset_codes WHERE expires_at <= ?", (now,))
+
+
+class ResetCodeStore:
+    def __init__(self, pool=None, ttl=RESET_CODE_TTL, capacity=RESET_CODE_CAPACITY, clock=time.time,
+                 writer=None, max_attempts=MAX_ATTEMPTS):
+        self.pool = pool
+        self.writer = writer
+        self.ttl = ttl
+        self.capacity = capacity
+        self.clock = clock
+        self.max_attempts = max_attempts
+        self._codes = OrderedDict()   # email -> (code, expires_at)
+        self._failures = {}           # email -> wrong guesses at its live code
+        self._lock = threading.Lock()
+        self.evicted = 0
+        if pool is not None:
+            self._load()
+
+    def _load(self):
+        now = self.clock()
+        # The clean-up is queued like every other write; the read skips
+        # expired rows itself, so it needn't wait for it
+        self._write(delete_expired, now)
+        rows = self.pool.connect().execute(
+            """
+            SELECT email, code, expires_at FROM reset_codes
+            WHERE expires_at > ? ORDER BY expires_at DESC LIMIT ?
+            """,
+            (now, self.capacity),
+        ).fetchall()
+        for email, code, expires_at in reversed(rows):
+            self._codes[email] = (code, expires_at)
+
+    def _write(self, fn, *args):
+        if self.writer is not None:
+            self.writer.submit(fn, *args)
+        elif self.pool is not None:
+            fn(self.pool.connect(), *args)
+
+    def __len__(self):
+        return len(self._codes)
+
+    def _drop_expired(self, now):
+        expired = []
+        while self._codes:
+            email, (_, expires_at) = next(iter(self._codes.items()))
+            if expires_at > now:
+                break
+            del self._codes[email]
+            self._failures.pop(email, None)
+            expired.append(email)
+        return expired
+
+    def issue(self, email, code=None):
+        """Store a fresh code for email (replacing any earlier one) and return it."""
+        code = code or "".join(secrets.choice("0123456789") for _ in range(CODE_DIGITS))
+        now = self.clock()
+        expires_at = now + self.ttl
+        with self._lock:
+            self._drop_expired(now)
+            self._codes.pop(email, None)
+            self._failures.pop(email, None)
+            evicted = []
+            while len(self._codes) >= self.capacity:
+                evicted.append(self._codes.popitem(last=False)[0])
+                self._failures.pop(evicted[-1], None)
+            self._codes[email] = (code, expires_at)
+            self.evicted += len(evicted)
+
+        self._write(store_code, email, code, expires_at, evicted)
+        return code
+
+    def get(self, email):
+        """Returns the live code for email, or None if absent or expired."""
+        with self._lock:
+            entry = self._codes.get(email)
+            if entry is None:
+                return None
+            if entry[1] <= self.clock():
+                del self._codes[email]
+                self._failures.pop(email, None)
+                return None
+            return entry[0]
+
+    def verify(self, email, code):
+        stored = self.get(email)
+        if stored is None:
+            return False
+        if hmac.compare_digest(stored.encode("utf-8"), str(code).encode("utf-8")):
+            return True
+        with self._lock:
+            failures = self._failures.get(email, 0) + 1
+            self._failures[email] = failures
+        if failures > self.max_attempts:
+            self.discard(email)
+        return False
+
+    def discard(self, email):
+        with self._lock:
+            self._codes.pop(email, None)
+            self._failures.pop(email, None)
+        self._write(delete_code, email)
+
+    def sweep(self):
+        """Drop every expired code; returns how many were removed."""
+        now = self.clock()
+        with self._lock:
+            removed = len(self._drop_expired(now))
+        self._write(delete_expired, now)
+        return removed
+
+
+if __name__ == "__main__":
+    print("reset_codes.py is a support module. Run main_app.py for the full application.")
@@ -0,0 +1,121 @@
+"""
+Schedule - time-range queries over the appointments table
+
+All timestamps are stored as UTC strings in SQLite's 'YYYY-MM-DD
+HH:MM:SS' format. "Today" and "this week" are the hospital's local
+calendar days, converted to UTC bounds for the queries, and slots are
+shown in local time. Ranges older than the archive cutoff also read the yearly archive files
+(archive.py).
+"""
+from datetime import datetime, timedelta, timezone
+
+import archive
+from timestamps import TIMESTAMP_FORMAT
+
+# Appointments last at most a day (CHECK in migration 0005), so anything
+# overlapping [start, end) must have started after start - 1 day.
+# {t} is the appointments table, hot or archived
+RANGE_SELECT = """
+    SELECT a.id, a.starts_at, a.ends_at, d.full_name, a.notes
+    FROM {t} a JOIN doctors d ON d.id = a.doctor_id
+    WHERE a.starts_at >= datetime(:start, '-1 day')
+      AND a.starts_at < :end
+      AND a.ends_at > :start
+"""
+DOCTOR_RANGE_SELECT = """
+    SELECT a.id, a.starts_at, a.ends_at, d.full_name, a.notes
+    FROM {t} a JOIN doctors d ON d.id = a.doctor_id
+    WHERE a.doctor_id = :doctor_id
+      AND a.starts_at >= datetime(:start, '-1 day')
+      AND a.starts_at < :end
+      AND a.ends_at > :start
+"""
+# By start time: (result column, descending) for archive.select
+BY_START = ((2, False),)
+RANGE_SQL = RANGE_SELECT.format(t="appointments") + "    ORDER BY 2\n"
+DOCTOR_RANGE_SQL = DOCTOR_RANGE_SELECT.format(t="appointments") + "    ORDER BY 2\n"
+
+
+def utc_now():
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def to_utc(local):
+    """Naive local time -> naive UTC, as stored."""
+    return local.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def to_local(utc):
+    """Naive UTC, as stored -> naive local time."""
+    return utc.replace(tzinfo=timezone.utc).astimezone().replace(tzinfo=None)
+
+
+def local_day_bounds(first, days):
+    # Each end converted on its own, so a DST change gives a 23/25-hour day
+    start = datetime.combine(first, datetime.min.time())
+    return to_utc(start), to_utc(start + timedelta(days=days))
+
+
+def day_bounds(day=None):
+    """UTC bounds of the local calendar day containing day (local; default today)."""
+    return local_day_bounds((day or datetime.now()).date(), 1)
+
+
+def week_bounds(day=None):
+    """UTC bounds of the local Monday-to-Sunday week containing day."""
+    first = (day or datetime.now()).date()
+    return local_day_bounds(first - timedelta(days=first.weekday()), 7)
+
+
+def appointments_between(conn, start, end, doctor_id=None):
+    params = {
+        "start": start.strftime(TIMESTAMP_FORMAT),
+        "end": end.strftime(TIMESTAMP_FORMAT),
+        "doctor_id": doctor_id,
+    }
+    sql = RANGE_SELECT if doctor_id is None else DOCTOR_RANGE_SELECT
+    low = (start - timedelta(days=1)).strftime(TIMESTAMP_FORMAT)
+    return archive.select(conn, "appointments", low, sql, params, BY_START)
+
+
+def appointments_today(conn, day=None):
+    return appointments_between(conn, *day_bounds(day))
+
+
+def doctor_week(conn, doctor_id, day=None):
+    return appointments_between(conn, *week_bounds(day), doctor_id=doctor_id)
+
+
+def list_doctors(conn):
+    return conn.execute(
+        "SELECT id, full_name FROM doctors WHERE active = 1 ORDER BY full_name"
+    ).fetchall()
+
+
+def add_appointment(conn, doctor_id, starts_at, ends_at, notes="", patient_id=None):
+    with conn:
+        cursor = conn.execute(
+            """
+            INSERT INTO appointments (doctor_id, patient_id, starts_at, ends_at, notes)
+            VALUES (?, ?, ?, ?, ?)
+            """,
+            (
+                doctor_id,
+                patient_id,
+                starts_at.strftime(TIMESTAMP_FORMAT),
+                ends_at.strftime(TIMESTAMP_FORMAT),
+                notes,
+            ),
+        )
+    return cursor.lastrowid
+
+
+def format_slot(starts_at, ends_at, with_day=False):
+    start = to_local(datetime.strptime(starts_at, TIMESTAMP_FORMAT))
+    end = to_local(datetime.strptime(ends_at, TIMESTAMP_FORMAT))
+    slot = f"{start:%H:%M}-{end:%H:%M}"
+    return f"{start:%a %d} {slot}" if with_day else slot
+
+
+if __name__ == "__main__":
+    print("schedule.py is a support module. Run main_app.py for the full application.")
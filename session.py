@@ -0,0 +1,41 @@
+"""
+Session - the logged-in user's profile, loaded once at login
+
+HospitalApp keeps one Session while someone is logged in. Pages read the
+name, email and role from it instead of querying the users table on every
+render; it is dropped on logout and when that user's password changes.
+"""
+import time
+
+PROFILE_FIELDS = ("username", "full_name", "email", "role", "created_at")
+
+
+class Session:
+    __slots__ = PROFILE_FIELDS + ("started_at",)
+
+    def __init__(self, username, full_name, email, role, created_at):
+        self.username = username
+        self.full_name = full_name
+        self.email = email
+        self.role = role
+        self.created_at = created_at
+        self.started_at = time.time()
+
+    @classmethod
+    def from_profile(cls, profile):
+        return cls(*profile)
+
+    @property
+    def display_name(self):
+        return self.full_name or self.username
+
+    @property
+    def is_admin(self):
+        return self.role == "admin"
+
+    def __repr__(self):
+        return f"Session({self.username!r}, role={self.role!r})"
+
+
+if __name__ == "__main__":
+    print("session.py is a support module. Run main_app.py for the full application.")
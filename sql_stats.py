@@ -0,0 +1,155 @@
+"""
+SQL Stats - per-statement timing, latency histograms and a slow-query log
+
+Connections from db_pool are created as InstrumentedConnection, so every
+``execute``/``executemany`` - on the connection or on one of its
+``conn.cursor()`` cursors - is timed and recorded in STATS.
+Statements slower than STATS.slow_ms (NIMA_SLOW_QUERY_MS, default 50) are
+logged to the "nima.sql" logger together with their EXPLAIN QUERY PLAN.
+
+Timings cover what execute() itself does: the whole statement for writes,
+and the work up to the first row for SELECTs.
+"""
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+
+SLOW_QUERY_MS = float(os.environ.get("NIMA_SLOW_QUERY_MS", "50"))
+# Histogram buckets are powers of two in microseconds: <1us, <2us, ... <~67s
+BUCKETS = 27
+EXPLAINABLE = ("SELECT", "INSERT", "UPDATE", "DELETE", "WITH")
+
+log = logging.getLogger("nima.sql")
+
+
+def normalize(sql):
+    return re.sub(r"\s+", " ", sql).strip()
+
+
+class StatementStats:
+    __slots__ = ("sql", "count", "total", "max", "histogram")
+
+    def __init__(self, sql):
+        self.sql = sql
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.histogram = [0] * BUCKETS
+
+    def add(self, seconds):
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+        bucket = min(int(seconds * 1e6).bit_length(), BUCKETS - 1)
+        self.histogram[bucket] += 1
+
+    def percentile(self, fraction):
+        # Upper bound of the bucket holding the requested rank, in ms
+        rank = fraction * self.count
+        seen = 0
+        for bucket, n in enumerate(self.histogram):
+            seen += n
+            if seen >= rank and n:
+                return min((1 << bucket) / 1000, self.max * 1000)
+        return self.max * 1000
+
+
+class QueryStats:
+    def __init__(self, slow_ms=SLOW_QUERY_MS):
+        self.slow_ms = slow_ms
+        self.started = time.time()
+        self._stats = {}
+        self._by_text = {}
+        self._lock = threading.Lock()
+
+    def record(self, conn, sql, params, seconds, many=False):
+        with self._lock:
+            # Statement text is normalized once; later calls are a dict hit
+            stats = self._by_text.get(sql)
+            if stats is None:
+                key = normalize(sql)
+                stats = self._stats.get(key)
+                if stats is None:
+                    stats = self._stats[key] = StatementStats(key)
+                self._by_text[sql] = stats
+            stats.add(seconds)
+
+        if seconds * 1000 >= self.slow_ms:
+            plan = "" if many else self.explain(conn, sql, params)
+            log.warning("slow query %.1f ms: %s%s", seconds * 1000, stats.sql, plan)
+
+    def explain(self, conn, sql, params):
+        if not normalize(sql).upper().startswith(EXPLAINABLE):
+            return ""
+        try:
+            rows = sqlite3.Connection.execute(conn, "EXPLAIN QUERY PLAN " + sql, params).fetchall()
+        except sqlite3.Error:
+            return ""
+        return "".join(f"\n    plan: {row[-1]}" for row in rows)
+
+    def top(self, n=10):
+        with self._lock:
+            stats = list(self._stats.values())
+        stats.sort(key=lambda s: s.total, reverse=True)
+        return stats[:n]
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+            self._by_text.clear()
+        self.started = time.time()
+
+    def report(self, n=10):
+        lines = [
+            f"Top {n} statements by total time over {time.time() - self.started:.0f} s",
+            f"{'calls':>8} {'total ms':>10} {'mean ms':>8} {'p50':>7} {'p95':>7} {'p99':>7} {'max ms':>8}  statement",
+        ]
+        for s in self.top(n):
+            lines.append(
+                f"{s.count:>8} {s.total * 1000:>10.1f} {s.total / s.count * 1000:>8.3f} "
+                f"{s.percentile(0.50):>7.3f} {s.percentile(0.95):>7.3f} {s.percentile(0.99):>7.3f} "
+                f"{s.max * 1000:>8.3f}  {s.sql[:90]}"
+            )
+        return "\n".join(lines)
+
+
+STATS = QueryStats()
+
+
+class InstrumentedCursor(sqlite3.Cursor):
+    def execute(self, sql, parameters=()):
+        start = time.perf_counter()
+        cursor = super().execute(sql, parameters)
+        STATS.record(self.connection, sql, parameters, time.perf_counter() - start)
+        return cursor
+
+    def executemany(self, sql, seq_of_parameters):
+        start = time.perf_counter()
+        cursor = super().executemany(sql, seq_of_parameters)
+        STATS.record(self.connection, sql, None, time.perf_counter() - start, many=True)
+        return cursor
+
+
+class InstrumentedConnection(sqlite3.Connection):
+    def cursor(self, factory=InstrumentedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        start = time.perf_counter()
+        cursor = super().execute(sql, parameters)
+        STATS.record(self, sql, parameters, time.perf_counter() - start)
+        return cursor
+
+    def executemany(self, sql, seq_of_parameters):
+        start = time.perf_counter()
+        cursor = super().executemany(sql, seq_of_parameters)
+        STATS.record(self, sql, None, time.perf_counter() - start, many=True)
+        return cursor
+
+
+if __name__ == "__main__":
+    print("sql_stats.py is a support module. Run main_app.py for the full application.")
@@ -0,0 +1,244 @@
+"""
+Storage - user-account backends behind HospitalApp
+
+Every backend implements the same five account operations the pages use,
+so HospitalApp (and the legacy single-file app) can run against a file,
+an in-memory SQLite database or a plain Python dict. The shared
+behaviour is pinned down by storage_conformance.py.
+
+SQLiteStorage sends its writes through a DatabaseWriter, so accounts
+created or changed from several windows share group commits instead of
+fighting over the write lock.
+
+Passwords are stored as KDF hashes (see passwords.py). Plain-text or
+cheaper hashes are rewritten at the current cost on the next good login.
+"""
+import itertools
+import sqlite3
+import threading
+from datetime import datetime, timezone
+
+from db_pool import ConnectionPool
+from db_writer import DatabaseWriter
+from migrate import migrate
+from passwords import default_hasher
+from timestamps import TIMESTAMP_FORMAT
+
+DUPLICATE_USER = "Username or email already exists"
+
+
+class UserStorage:
+    def validate_login(self, username, password):
+        raise NotImplementedError
+
+    def username_exists(self, username):
+        raise NotImplementedError
+
+    def create_user(self, full_name, email, username, password):
+        """Returns (True, None) on success or (False, error message)."""
+        raise NotImplementedError
+
+    def find_user_by_email(self, email):
+        """Returns the username for an email address, or None."""
+        raise NotImplementedError
+
+    def update_user_password(self, username, new_password):
+        """Returns True if the user existed and was updated."""
+        raise NotImplementedError
+
+    def get_profile(self, username):
+        """Returns (username, full_name, email, role, created_at), or None."""
+        raise NotImplementedError
+
+    def user_count(self):
+        raise NotImplementedError
+
+    def iter_identities(self):
+        """Yields (username, email) for every account."""
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+# ------------- SQLITE -------------
+def insert_user(conn, full_name, email, username, hashed):
+    conn.execute(
+        """
+        INSERT INTO users (full_name, email, username, password)
+        VALUES (?, ?, ?, ?)
+        """,
+        (full_name, email, username, hashed),
+    )
+
+
+def set_password(conn, username, hashed, expected=None):
+    if expected is None:
+        cursor = conn.execute("UPDATE users SET password = ? WHERE username = ?", (hashed, username))
+    else:
+        # Only replace the value we verified, in case it changed meanwhile
+        cursor = conn.execute(
+            "UPDATE users SET password = ? WHERE username = ? AND password = ?",
+            (hashed, username, expected),
+        )
+    return cursor.rowcount > 0
+
+
+class SQLiteStorage(UserStorage):
+    """File-backed (or ``:memory:``) SQLite store using pooled connections."""
+
+    _memory_ids = itertools.count(1)
+
+    def __init__(self, db_path, hasher=None):
+        self.hasher = hasher or default_hasher()
+        self.anchor = None
+        if db_path == ":memory:":
+            # Per-thread connections must all see the same private
+            # database, so use a named memdb database (normal locking,
+            # unlike shared cache) and hold one connection open for its
+            # lifetime
+            db_path = f"file:/nima-memory-{next(self._memory_ids)}?vfs=memdb"
+            self.anchor = sqlite3.connect(db_path, uri=True, check_same_thread=False)
+            self.pool = ConnectionPool(db_path, wal=False, uri=True)
+        else:
+            self.pool = ConnectionPool(db_path)
+        self.db_path = db_path
+        migrate(self.pool.connect())
+        self.writer = DatabaseWriter(self.pool)
+
+    def connect(self):
+        return self.pool.connect()
+
+    def validate_login(self, username, password):
+        conn = self.connect()
+        row = conn.execute("SELECT password FROM users WHERE username = ?", (username,)).fetchone()
+        stored = row[0] if row else None
+        valid, needs_rehash = self.hasher.verify(password, stored)
+        if needs_rehash:
+            self.writer.execute(set_password, username, self.hasher.hash(password), stored)
+        return valid
+
+    def username_exists(self, username):
+        with self.connect() as conn:
+            cursor = conn.execute("SELECT 1 FROM users WHERE username = ?", (username,))
+            return cursor.fetchone() is not None
+
+    def create_user(self, full_name, email, username, password):
+        hashed = self.hasher.hash(password)
+        try:
+            self.writer.execute(insert_user, full_name, email, username, hashed)
+        except sqlite3.IntegrityError:
+            return False, DUPLICATE_USER
+        return True, None
+
+    def find_user_by_email(self, email):
+        with self.connect() as conn:
+            row = conn.execute(
+                "SELECT username FROM users WHERE email = ?",
+                (email,),
+            ).fetchone()
+            return row[0] if row else None
+
+    def update_user_password(self, username, new_password):
+        return self.writer.execute(set_password, username, self.hasher.hash(new_password))
+
+    def get_profile(self, username):
+        row = self.connect().execute(
+            "SELECT username, full_name, email, role, created_at FROM users WHERE username = ?",
+            (username,),
+        ).fetchone()
+        return tuple(row) if row else None
+
+    def user_count(self):
+        return self.connect().execute("SELECT COUNT(*) FROM users").fetchone()[0]
+
+    def iter_identities(self):
+        # Own cursor, so this can stream while the thread's connection is reused
+        cursor = self.connect().cursor()
+        cursor.arraysize = 1000
+        cursor.execute("SELECT username, email FROM users")
+        while True:
+            rows = cursor.fetchmany()
+            if not rows:
+                break
+            yield from rows
+
+    def close(self):
+        self.writer.close()
+        self.pool.close_all()
+        if self.anchor is not None:
+            self.anchor.close()
+            self.anchor = None
+
+
+# ------------- IN-MEMORY -------------
+class MemoryStorage(UserStorage):
+    """Dict-backed store with no I/O, for tests, benchmarks and the legacy app."""
+
+    def __init__(self, seed_admin=True, hasher=None):
+        self.hasher = hasher or default_hasher()
+        self.users = {}
+        self.emails = {}
+        self.lock = threading.Lock()
+        if seed_admin:
+            self.create_user("Administrator", "admin@nima-hospital.com", "admin", "password")
+            self.users["admin"]["role"] = "admin"
+
+    def validate_login(self, username, password):
+        user = self.users.get(username)
+        stored = user["password"] if user else None
+        valid, needs_rehash = self.hasher.verify(password, stored)
+        if needs_rehash:
+            hashed = self.hasher.hash(password)
+            with self.lock:
+                if user["password"] == stored:
+                    user["password"] = hashed
+        return valid
+
+    def username_exists(self, username):
+        return username in self.users
+
+    def create_user(self, full_name, email, username, password):
+        hashed = self.hasher.hash(password)
+        with self.lock:
+            if username in self.users or email in self.emails:
+                return False, DUPLICATE_USER
+            self.users[username] = {
+                "password": hashed,
+                "email": email,
+                "name": full_name,
+                "role": "staff",
+                "created_at": datetime.now(timezone.utc).strftime(TIMESTAMP_FORMAT),
+            }
+            self.emails[email] = username
+        return True, None
+
+    def find_user_by_email(self, email):
+        return self.emails.get(email)
+
+    def update_user_password(self, username, new_password):
+        hashed = self.hasher.hash(new_password)
+        with self.lock:
+            user = self.users.get(username)
+            if user is None:
+                return False
+            user["password"] = hashed
+        return True
+
+    def get_profile(self, username):
+        user = self.users.get(username)
+        if user is None:
+            return None
+        return username, user["name"], user["email"], user["role"], user["created_at"]
+
+    def user_count(self):
+        return len(self.users)
+
+    def iter_identities(self):
+        with self.lock:
+            identities = [(username, user["email"]) for username, user in self.users.items()]
+        return iter(identities)
+
+
+if __name__ == "__main__":
+    print("storage.py is a support module. Run main_app.py for the full application.")
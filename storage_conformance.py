@@ -0,0 +1,262 @@
+"""
+Storage Conformance - one behavioural check list every storage backend must pass
+
+Usage (headless):
+    python storage_conformance.py
+
+Each check gets a freshly built backend (with the seeded admin account)
+and raises AssertionError on any deviation from the UserStorage contract.
+The checks cover behaviour, not KDF strength, so the backends share a
+hasher with a cheap fixed cost. The remote backend additionally runs
+SERVICE_CHECKS for what only the API service enforces: the shared token,
+reset codes and the failed-login throttle.
+"""
+import os
+import secrets
+import sys
+import tempfile
+import threading
+import time
+
+from api_client import ApiClient, ApiError, RemoteStorage
+from api_service import LOGIN_MAX_FAILURES, ApiService, ServiceThread
+from passwords import HAVE_SCRYPT, PasswordHasher
+from reset_codes import MAX_ATTEMPTS as RESET_ATTEMPTS
+from storage import DUPLICATE_USER, MemoryStorage, SQLiteStorage
+
+
+def check_seeded_admin(store):
+    assert store.username_exists("admin")
+    assert store.validate_login("admin", "password")
+    assert store.find_user_by_email("admin@nima-hospital.com") == "admin"
+
+
+def check_repeated_login(store):
+    # The first login may rewrite a plain-text or cheaper hash; later ones
+    # must verify against the upgraded value
+    for _ in range(3):
+        assert store.validate_login("admin", "password")
+    assert not store.validate_login("admin", "Password")
+
+
+def check_create_and_login(store):
+    assert store.create_user("Jane Doe", "jane@example.com", "jane", "secret1") == (True, None)
+    assert store.username_exists("jane")
+    assert store.validate_login("jane", "secret1")
+    assert not store.validate_login("jane", "wrong")
+    assert not store.validate_login("nobody", "secret1")
+
+
+def check_duplicate_username(store):
+    assert store.create_user("Jane Doe", "jane@example.com", "jane", "secret1")[0]
+    assert store.create_user("Other", "other@example.com", "jane", "secret2") == (False, DUPLICATE_USER)
+    assert store.find_user_by_email("other@example.com") is None
+    assert store.validate_login("jane", "secret1")
+
+
+def check_duplicate_email(store):
+    assert store.create_user("Jane Doe", "jane@example.com", "jane", "secret1")[0]
+    assert store.create_user("Other", "jane@example.com", "other", "secret2") == (False, DUPLICATE_USER)
+    assert not store.username_exists("other")
+
+
+def check_find_user_by_email(store):
+    assert store.create_user("Jane Doe", "jane@example.com", "jane", "secret1")[0]
+    assert store.find_user_by_email("jane@example.com") == "jane"
+    assert store.find_user_by_email("JANE@example.com") is None
+    assert store.find_user_by_email("") is None
+
+
+def check_get_profile(store):
+    assert store.create_user("Jane Doe", "jane@example.com", "jane", "secret1")[0]
+    username, full_name, email, role, created_at = store.get_profile("jane")
+    assert (username, full_name, email, role) == ("jane", "Jane Doe", "jane@example.com", "staff")
+    assert created_at
+    assert store.get_profile("admin")[3] == "admin"
+    assert store.get_profile("nobody") is None
+
+
+def check_identities(store):
+    assert store.create_user("Jane Doe", "jane@example.com", "jane", "secret1")[0]
+    identities = set(store.iter_identities())
+    assert identities == {("admin", "admin@nima-hospital.com"), ("jane", "jane@example.com")}
+    assert store.user_count() == 2
+
+
+def check_update_password(store):
+    assert store.create_user("Jane Doe", "jane@example.com", "jane", "secret1")[0]
+    assert store.update_user_password("jane", "newsecret")
+    assert store.validate_login("jane", "newsecret")
+    assert not store.validate_login("jane", "secret1")
+    assert not store.update_user_password("nobody", "newsecret")
+
+
+def check_concurrent_creates(store):
+    results = []
+
+    def worker(n):
+        results.append(store.create_user(f"User {n}", f"user{n}@example.com", f"user{n}", "secret1")[0])
+        results.append(store.create_user("Dup", "dup@example.com", "dup", "secret1")[0])
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert results.count(True) == 9
+    assert all(store.username_exists(f"user{n}") for n in range(8))
+
+
+CHECKS = [
+    check_seeded_admin,
+    check_repeated_login,
+    check_create_and_login,
+    check_duplicate_username,
+    check_duplicate_email,
+    check_find_user_by_email,
+    check_get_profile,
+    check_identities,
+    check_update_password,
+    check_concurrent_creates,
+]
+
+
+# Service-only guards, run against the remote backend
+def check_token_required(store):
+    intruder = ApiClient(store.client.address, token="wrong")
+    try:
+        for method, params in (("user_count", ()), ("validate_login", ("admin", "password"))):
+            try:
+                intruder.call(method, *params)
+            except ApiError as e:
+                assert "unauthorized" in str(e)
+            else:
+                raise AssertionError(f"{method} answered without the token")
+        # Each request of a batch is checked, not just the first
+        responses = intruder._roundtrip([
+            {"id": 0, "token": store.client.token, "method": "user_count", "params": []},
+            {"id": 1, "method": "user_count", "params": []},
+        ])
+        assert "result" in responses[0] and responses[1]["error"] == "unauthorized"
+    finally:
+        intruder.close()
+    assert store.user_count() == 1
+
+
+def check_reset_code_enforced(store):
+    assert store.create_user("Jane Doe", "jane@example.com", "jane", "secret1")[0]
+    try:
+        store.client.call("update_user_password", "jane", "hijacked")
+    except ApiError:
+        pass
+    else:
+        raise AssertionError("raw password update accepted")
+    assert store.issue_reset_code("nobody@example.com") is False
+    # The reply only acknowledges; the code is delivered out of band
+    assert store.issue_reset_code("jane@example.com") is True
+    code = store.delivered_code("jane@example.com")
+    wrong = "000000" if code != "000000" else "111111"
+    assert not store.reset_password("jane@example.com", wrong, "hijacked")
+    assert store.reset_password("jane@example.com", code, "newsecret")
+    # A code works once
+    assert not store.reset_password("jane@example.com", code, "again1")
+    assert store.validate_login("jane", "newsecret")
+    # Too many wrong guesses burn the code
+    assert store.issue_reset_code("jane@example.com")
+    code = store.delivered_code("jane@example.com")
+    for _ in range(RESET_ATTEMPTS + 1):
+        assert not store.verify_reset_code("jane@example.com", wrong)
+    assert not store.verify_reset_code("jane@example.com", code)
+
+
+def check_login_throttled(store):
+    assert store.create_user("Jane Doe", "jane@example.com", "jane", "secret1")[0]
+    for _ in range(LOGIN_MAX_FAILURES):
+        assert not store.validate_login("jane", "wrong")
+    # Locked out from this client: even the right password is refused for now
+    assert not store.validate_login("jane", "secret1")
+    assert store.validate_login("admin", "password")
+    # ...but not from another terminal, so guessing can't lock the real user out
+    assert store.served.service.validate_login("jane", "secret1", peer="192.0.2.7")
+    assert not store.validate_login("jane", "secret1")
+
+
+SERVICE_CHECKS = [
+    check_token_required,
+    check_reset_code_enforced,
+    check_login_throttled,
+]
+
+
+class ServedStorage(RemoteStorage):
+    """RemoteStorage talking to a private ApiService on a background loop.
+
+    The service only changes passwords against a reset code, so
+    update_user_password goes through that flow, taking the delivered
+    code from the service object as the account's owner would from mail.
+    """
+
+    def __init__(self, db_path, hasher):
+        service = ApiService(db_path, hasher=hasher, token=secrets.token_hex(16), deliver=lambda *issued: None)
+        self.served = ServiceThread(service)
+        super().__init__(self.served.address, token=self.served.service.token)
+
+    def update_user_password(self, username, new_password):
+        profile = self.get_profile(username)
+        if profile is None:
+            return False
+        email = profile[2]
+        return self.issue_reset_code(email) and self.reset_password(email, self.delivered_code(email), new_password)
+
+    def delivered_code(self, email):
+        return self.served.service.reset_codes.get(email)
+
+    def close(self):
+        super().close()
+        self.served.stop()
+
+
+def run_conformance(factory, checks=CHECKS):
+    """Run every check against fresh backends; returns a list of failures."""
+    failures = []
+    for check in checks:
+        store = factory()
+        try:
+            check(store)
+        except Exception as e:
+            failures.append((check.__name__, e))
+        finally:
+            store.close()
+    return failures
+
+
+def main():
+    tmp = tempfile.TemporaryDirectory()
+    counter = iter(range(10 ** 6))
+    hasher = PasswordHasher(cost=2 ** 10 if HAVE_SCRYPT else 1_000)
+    remote = lambda: ServedStorage(os.path.join(tmp.name, f"store{next(counter)}.db"), hasher)
+    suites = [
+        ("memory", lambda: MemoryStorage(hasher=hasher), CHECKS),
+        ("sqlite :memory:", lambda: SQLiteStorage(":memory:", hasher=hasher), CHECKS),
+        ("sqlite file", lambda: SQLiteStorage(os.path.join(tmp.name, f"store{next(counter)}.db"), hasher=hasher),
+         CHECKS),
+        ("remote (api)", remote, CHECKS),
+        ("api guards", remote, SERVICE_CHECKS),
+    ]
+
+    failed = False
+    for name, factory, checks in suites:
+        start = time.perf_counter()
+        failures = run_conformance(factory, checks)
+        elapsed = (time.perf_counter() - start) * 1000
+        status = "ok" if not failures else f"{len(failures)} failed"
+        print(f"{name:<16} {len(checks):>2} checks  {elapsed:8.1f} ms  {status}")
+        for check_name, error in failures:
+            failed = True
+            print(f"    {check_name}: {type(error).__name__}: {error}")
+    tmp.cleanup()
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
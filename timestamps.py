@@ -0,0 +1,9 @@
+"""
+Timestamps - the one text format every stored timestamp uses
+
+SQLite's CURRENT_TIMESTAMP and datetime() write UTC as 'YYYY-MM-DD
+HH:MM:SS', which also sorts correctly as text. Python code that writes,
+parses or compares stored timestamps uses TIMESTAMP_FORMAT from here.
+"""
+
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
@@ -0,0 +1,224 @@
+"""
+Writer Conformance - the invariants DatabaseWriter promises its callers
+
+Usage (headless):
+    python writer_conformance.py
+
+Each check gets a fresh WAL database with a one-column table and its own
+DatabaseWriter, and raises AssertionError on any deviation from the
+contract in db_writer.py: one writer thread, one transaction per group,
+a failing job rolled back alone, Futures that resolve after the COMMIT
+with the job's own result or exception, and a writer that outlives a
+job ending the transaction itself.
+"""
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+from db_pool import ConnectionPool
+from db_writer import DatabaseWriter
+
+
+def insert(conn, value):
+    with conn:
+        conn.execute("INSERT INTO items (value) VALUES (?)", (value,))
+    return value
+
+
+def insert_then_fail(conn, value):
+    insert(conn, value)
+    raise ValueError(f"job {value} failed")
+
+
+def values(path):
+    conn = sqlite3.connect(path)
+    try:
+        return sorted(row[0] for row in conn.execute("SELECT value FROM items"))
+    finally:
+        conn.close()
+
+
+def gated(writer):
+    """Occupy the writer until the returned event is set, so later jobs queue up as one group."""
+    release = threading.Event()
+    started = threading.Event()
+
+    def gate(conn):
+        started.set()
+        release.wait(5)
+
+    future = writer.submit(gate)
+    started.wait(5)
+    return release, future
+
+
+def check_single_thread(writer, path):
+    threads = set()
+    lock = threading.Lock()
+
+    def record(conn, value):
+        with lock:
+            threads.add(threading.get_ident())
+        return insert(conn, value)
+
+    def client(n):
+        for i in range(20):
+            writer.execute(record, n * 100 + i)
+
+    clients = [threading.Thread(target=client, args=(n,)) for n in range(8)]
+    for t in clients:
+        t.start()
+    for t in clients:
+        t.join()
+    assert threads == {writer._thread.ident}
+    assert len(values(path)) == 160
+
+
+def check_one_transaction_per_group(writer, path):
+    release, gate = gated(writer)
+    seen_by_reader = []
+
+    def peek(conn):
+        # Runs last in the group: nothing the group wrote is visible outside yet
+        seen_by_reader.append(values(path))
+        return conn.in_transaction
+
+    futures = [writer.submit(insert, i) for i in range(10)]
+    last = writer.submit(peek)
+    release.set()
+    gate.result(5)
+    assert last.result(5) is True
+    assert seen_by_reader == [[]]
+    assert [f.result(5) for f in futures] == list(range(10))
+    stats = writer.stats()
+    assert (stats["batches"], stats["jobs"]) == (2, 12), stats
+
+
+def check_failed_job_rolls_back_alone(writer, path):
+    release, gate = gated(writer)
+    ok_before = writer.submit(insert, 1)
+    failing = writer.submit(insert_then_fail, 2)
+    ok_after = writer.submit(insert, 3)
+    release.set()
+    assert (ok_before.result(5), ok_after.result(5)) == (1, 3)
+    try:
+        failing.result(5)
+    except ValueError as e:
+        assert str(e) == "job 2 failed"
+    else:
+        raise AssertionError("failing job's future resolved without its exception")
+    assert values(path) == [1, 3]
+    assert writer.stats()["batches"] == 2
+
+
+def check_futures_resolve_after_commit(writer, path):
+    visible = []
+    done = threading.Event()
+
+    def on_done(future):
+        visible.append(values(path))
+        done.set()
+
+    writer.submit(insert, 7).add_done_callback(on_done)
+    done.wait(5)
+    assert visible == [[7]]
+
+
+def check_begin_failure_fails_group(writer, path):
+    blocker = sqlite3.connect(path, isolation_level=None)
+    blocker.execute("BEGIN IMMEDIATE")
+    try:
+        futures = [writer.submit(insert, i) for i in range(3)]
+        for future in futures:
+            try:
+                future.result(5)
+            except sqlite3.OperationalError as e:
+                assert "locked" in str(e).lower()
+            else:
+                raise AssertionError("write succeeded while another connection held the lock")
+    finally:
+        blocker.execute("ROLLBACK")
+        blocker.close()
+    assert writer.execute(insert, 9) == 9
+    assert values(path) == [9]
+
+
+def check_nested_submit_runs_inline(writer, path):
+    def outer(conn):
+        insert(conn, 1)
+        return writer.submit(insert, 2).result(0)
+
+    assert writer.execute(outer) == 2
+    assert values(path) == [1, 2]
+
+
+def check_broken_transaction_fails_group(writer, path):
+    def commit_early(conn, value):
+        insert(conn, value)
+        conn.commit()
+        return value
+
+    assert writer.execute(insert, 1) == 1
+    broken = writer.submit(commit_early, 2)
+    try:
+        broken.result(5)
+    except sqlite3.OperationalError as e:
+        assert "savepoint" in str(e).lower()
+    else:
+        raise AssertionError("job that committed the group transaction succeeded")
+    assert writer._thread.is_alive()
+    assert writer.execute(insert, 3) == 3
+    # The stray commit made 2 permanent; the next group committed normally
+    assert values(path) == [1, 2, 3]
+
+
+CHECKS = [
+    check_single_thread,
+    check_one_transaction_per_group,
+    check_failed_job_rolls_back_alone,
+    check_futures_resolve_after_commit,
+    check_begin_failure_fails_group,
+    check_nested_submit_runs_inline,
+    check_broken_transaction_fails_group,
+]
+
+
+def run_conformance(tmp):
+    """Run every check against a fresh database and writer; returns a list of failures."""
+    failures = []
+    for n, check in enumerate(CHECKS):
+        path = os.path.join(tmp, f"writer{n}.db")
+        conn = sqlite3.connect(path)
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.execute("CREATE TABLE items (value INTEGER)")
+        conn.close()
+        pool = ConnectionPool(path, instrumented=False)
+        # Short waits so the lock check fails fast instead of after seconds
+        writer = DatabaseWriter(pool, busy_timeout_ms=50, retries=1, backoff=0.01)
+        try:
+            check(writer, path)
+        except Exception as e:
+            failures.append((check.__name__, e))
+        finally:
+            writer.close()
+            pool.close_all()
+    return failures
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        start = time.perf_counter()
+        failures = run_conformance(tmp)
+        elapsed = (time.perf_counter() - start) * 1000
+    status = "ok" if not failures else f"{len(failures)} failed"
+    print(f"{'db writer':<16} {len(CHECKS):>2} checks  {elapsed:8.1f} ms  {status}")
+    for check_name, error in failures:
+        print(f"    {check_name}: {type(error).__name__}: {error}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())